@@ -23,6 +23,9 @@ from . import priorities
 from . import render_style
 from . import tskins
 from . import aether_materials
+from . import material_pool
+from . import mesh_revision
+from . import overlay_manager
 
 # Import importers conditionally to avoid circular imports
 try:
@@ -44,6 +47,7 @@ if has_importers:
         *tskins.classes,
         *render_style.classes,
         *aether_materials.classes,
+        *material_pool.classes,
         *importer_317.classes,
         *importer_667.classes,
     )
@@ -57,18 +61,11 @@ else:
         *tskins.classes,
         *render_style.classes,
         *aether_materials.classes,
+        *material_pool.classes,
     )
 
-weight_draw_handler = None
-priority_overlay_handler = None
-priority_text_handler = None
-tskin_overlay_handler = None
-tskin_text_handler = None
-
 def register():
     """Register all parts of the addon."""
-    global weight_draw_handler, priority_overlay_handler, priority_text_handler, tskin_overlay_handler, tskin_text_handler
-    
     # Register all classes FIRST
     for cls in classes:
         bpy.utils.register_class(cls)
@@ -79,6 +76,15 @@ def register():
         default=False,
         update=weighter.force_viewport_redraw
     )
+    bpy.types.Scene.weight_overlay_mode = bpy.props.EnumProperty(
+        name="Weight Display", description="How VSKIN weights are shown in the viewport",
+        items=[
+            ('LABELS', "Labels", "Weight values next to the vertices nearest the 3D cursor"),
+            ('HEATMAP', "Heatmap", "Weighted vertices as colored points (blue = 0, red = 1)"),
+            ('BOTH', "Both", "Heatmap points plus weight values"),
+        ],
+        default='BOTH', update=weighter.force_viewport_redraw
+    )
     bpy.types.Scene.exporter_output_dir = bpy.props.StringProperty(
         name="Output Directory", description="Directory to export files",
         default="", subtype='DIR_PATH', maxlen=1024
@@ -87,6 +93,27 @@ def register():
         name="Format", description="Choose the export file format",
         items=[('DAT', "DAT", "Export as .dat")], default='DAT'
     )
+    bpy.types.Scene.exporter_optimize_strips = bpy.props.BoolProperty(
+        name="Optimize Face Order", description="Reorder triangles into strips so the face index block compresses better (changes face order)",
+        default=False
+    )
+    bpy.types.Scene.exporter_vertex_order = bpy.props.EnumProperty(
+        name="Vertex Order", description="Reorder vertices so the delta-encoded coordinates take fewer bytes",
+        items=[
+            ('NONE', "Blender Order", "Keep Blender's vertex order"),
+            ('TRAVERSAL', "Face Traversal", "Order vertices by first use in the exported faces"),
+            ('MORTON', "Spatial (Morton)", "Order vertices along a Z-order curve"),
+        ],
+        default='NONE'
+    )
+    bpy.types.Scene.exporter_skip_unchanged = bpy.props.BoolProperty(
+        name="Skip Unchanged", description="Skip objects whose export data has not changed since their last export to this directory",
+        default=True
+    )
+    bpy.types.Scene.exporter_use_parallel = bpy.props.BoolProperty(
+        name="Parallel Encode & Write", description="Encode and write exported files in worker threads while the next object is gathered",
+        default=True
+    )
     bpy.types.Scene.rsps_priority_to_apply = bpy.props.IntProperty(
         name="Priority", description="Priority value to apply to selected faces (0-255)",
         default=10, min=0, max=255
@@ -96,6 +123,15 @@ def register():
         default=False, update=weighter.force_viewport_redraw
     )
     
+    bpy.types.Scene.rsps_label_budget = bpy.props.IntProperty(
+        name="Label Budget", description="Maximum number of priority/TSKIN/weight labels drawn per viewport (nearest first)",
+        default=400, min=1, max=20000
+    )
+    bpy.types.Scene.rsps_show_overlay_stats = bpy.props.BoolProperty(
+        name="Show Overlay Timings", description="Show the per-frame draw time of each RS overlay in the viewport",
+        default=False, update=weighter.force_viewport_redraw
+    )
+    
     # TSKIN properties
     bpy.types.Scene.rsps_tskin_to_apply = bpy.props.IntProperty(
         name="TSKIN Group", description="Group value to apply to selected faces (0-255)",
@@ -117,37 +153,10 @@ def register():
     if "main" not in pmn_texturing.preview_collections:
         pmn_texturing.preview_collections["main"] = bpy.utils.previews.new()
         
-    # Add draw handlers with proper wrapper functions
-    def weight_draw_wrapper():
-        weighter.draw_weights_callback(None, bpy.context)
+    mesh_revision.register_handlers()
     
-    def priority_overlay_wrapper():
-        priorities.draw_priority_overlay(bpy.context)
-    
-    def priority_text_wrapper():
-        priorities.draw_priority_text(bpy.context)
-    
-    def tskin_overlay_wrapper():
-        tskins.draw_tskin_overlay(bpy.context)
-    
-    def tskin_text_wrapper():
-        tskins.draw_tskin_text(bpy.context)
-    
-    weight_draw_handler = bpy.types.SpaceView3D.draw_handler_add(
-        weight_draw_wrapper, (), 'WINDOW', 'POST_PIXEL'
-    )
-    priority_overlay_handler = bpy.types.SpaceView3D.draw_handler_add(
-        priority_overlay_wrapper, (), 'WINDOW', 'POST_VIEW'
-    )
-    priority_text_handler = bpy.types.SpaceView3D.draw_handler_add(
-        priority_text_wrapper, (), 'WINDOW', 'POST_PIXEL'
-    )
-    tskin_overlay_handler = bpy.types.SpaceView3D.draw_handler_add(
-        tskin_overlay_wrapper, (), 'WINDOW', 'POST_VIEW'
-    )
-    tskin_text_handler = bpy.types.SpaceView3D.draw_handler_add(
-        tskin_text_wrapper, (), 'WINDOW', 'POST_PIXEL'
-    )
+    # One POST_VIEW and one POST_PIXEL handler dispatch every viewport overlay
+    overlay_manager.register_handlers()
     
     # NEW: Add importers to file menu (only if available)
     if has_importers:
@@ -159,8 +168,6 @@ def register():
 
 def unregister():
     """Unregister all parts of the addon."""
-    global weight_draw_handler, priority_overlay_handler, priority_text_handler, tskin_overlay_handler, tskin_text_handler
-    
     # NEW: Remove importers from file menu (only if available)
     if has_importers:
         try:
@@ -170,21 +177,9 @@ def unregister():
             pass
     
     # Remove draw handlers first
-    if weight_draw_handler:
-        bpy.types.SpaceView3D.draw_handler_remove(weight_draw_handler, 'WINDOW')
-        weight_draw_handler = None
-    if priority_overlay_handler:
-        bpy.types.SpaceView3D.draw_handler_remove(priority_overlay_handler, 'WINDOW')
-        priority_overlay_handler = None
-    if priority_text_handler:
-        bpy.types.SpaceView3D.draw_handler_remove(priority_text_handler, 'WINDOW')
-        priority_text_handler = None
-    if tskin_overlay_handler:
-        bpy.types.SpaceView3D.draw_handler_remove(tskin_overlay_handler, 'WINDOW')
-        tskin_overlay_handler = None
-    if tskin_text_handler:
-        bpy.types.SpaceView3D.draw_handler_remove(tskin_text_handler, 'WINDOW')
-        tskin_text_handler = None
+    overlay_manager.unregister_handlers()
+    
+    mesh_revision.unregister_handlers()
     
     pcoll = pmn_texturing.preview_collections.get("main")
     if pcoll: bpy.utils.previews.remove(pcoll)
@@ -193,10 +188,17 @@ def unregister():
     # Clean up properties
     try:
         del bpy.types.Scene.show_weight_overlay
+        del bpy.types.Scene.weight_overlay_mode
         del bpy.types.Scene.exporter_output_dir
         del bpy.types.Scene.exporter_format
+        del bpy.types.Scene.exporter_optimize_strips
+        del bpy.types.Scene.exporter_vertex_order
+        del bpy.types.Scene.exporter_skip_unchanged
+        del bpy.types.Scene.exporter_use_parallel
         del bpy.types.Scene.rsps_priority_to_apply
         del bpy.types.Scene.rsps_show_priority_visuals
+        del bpy.types.Scene.rsps_label_budget
+        del bpy.types.Scene.rsps_show_overlay_stats
         del bpy.types.Scene.rsps_tskin_to_apply
         del bpy.types.Scene.rsps_show_tskin_visuals
         del bpy.types.Scene.rs_pmn
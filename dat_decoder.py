@@ -0,0 +1,518 @@
+# dat_decoder.py
+# Blender-independent decoding helpers for RuneScape .dat model data.
+import struct
+import numpy as np
+
+# Precompiled big-endian readers shared by every stream
+_UNSIGNED_SHORT = struct.Struct('>H')
+_SIGNED_SHORT = struct.Struct('>h')
+
+# =============================================================================
+# DATA STREAM (shared by the 317 and 667 importers)
+# =============================================================================
+class DataStream:
+    """
+    Sequential reader over a memoryview of the model buffer.
+    Sections and sub-streams are views into the original bytes, never copies.
+    """
+    def __init__(self, data, offset=0):
+        self.data = data if isinstance(data, memoryview) else memoryview(data)
+        self.offset = offset
+
+    def read_byte(self):
+        if self.offset >= len(self.data):
+            return 0
+        byte = self.data[self.offset]
+        self.offset += 1
+        return byte
+
+    def read_signed_byte(self):
+        val = self.read_byte()
+        return val - 256 if val > 127 else val
+
+    def read_unsigned_short(self):
+        if self.offset + 1 >= len(self.data):
+            return 0
+        value = _UNSIGNED_SHORT.unpack_from(self.data, self.offset)[0]
+        self.offset += 2
+        return value
+
+    def read_signed_short(self):
+        if self.offset + 1 >= len(self.data):
+            return 0
+        value = _SIGNED_SHORT.unpack_from(self.data, self.offset)[0]
+        self.offset += 2
+        return value
+
+    def unpack_smart_int(self):
+        byte1 = self.read_byte()
+        if (byte1 & 0x80) == 0:
+            return byte1 - 64
+        else:
+            byte2 = self.read_byte()
+            value = ((byte1 & 0x7F) << 8) | byte2
+            return value - 16384
+
+    def remaining(self):
+        return len(self.data) - self.offset
+
+    def set_position(self, pos):
+        self.offset = pos
+
+    def section(self, start, length=None):
+        """Returns a zero-copy view of data[start:start + length] (or to the end)."""
+        if length is None:
+            return self.data[start:]
+        return self.data[start:start + length]
+
+    def substream(self, start, length=None):
+        """Returns a new DataStream over a zero-copy section of this buffer."""
+        return DataStream(self.section(start, length))
+
+# =============================================================================
+# BATCHED SMART-INT DECODING
+# =============================================================================
+def unpack_smart_ints(data, count):
+    """
+    Decodes the first `count` smart ints of a byte section in one NumPy pass.
+
+    A smart int is one byte (value - 64) when the high bit is clear, otherwise
+    two big-endian bytes ((value & 0x7FFF) - 16384). Byte roles are resolved
+    from the runs of high-bit bytes: every run starts on a value boundary and
+    alternates start/continuation bytes, so a continuation byte is exactly the
+    byte following a high-bit start byte. Missing values (truncated streams)
+    decode as -64, matching DataStream.unpack_smart_int reading zero bytes.
+    """
+    if count <= 0:
+        return np.zeros(0, dtype=np.int32)
+
+    # Trailing zero so a two-byte value cut off at the end still has a low byte
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if len(raw) == 0:
+        return np.full(count, -64, dtype=np.int32)
+    b = np.zeros(len(raw) + 1, dtype=np.int32)
+    b[:len(raw)] = raw
+    n = len(raw)
+
+    high = b[:n] >= 0x80
+    positions = np.arange(n)
+    prev_high = np.concatenate(([False], high[:-1]))
+    run_start = np.where(high & ~prev_high, positions, 0)
+    run_offset = positions - np.maximum.accumulate(run_start)
+
+    high_start = high & ((run_offset & 1) == 0)
+    continuation = np.concatenate(([False], high_start[:-1]))
+    starts = np.flatnonzero(~continuation)[:count]
+
+    first = b[starts]
+    values = np.where(first >= 0x80,
+                      (((first & 0x7F) << 8) | b[starts + 1]) - 16384,
+                      first - 64)
+
+    if len(values) < count:
+        values = np.concatenate((values, np.full(count - len(values), -64, dtype=values.dtype)))
+    return values.astype(np.int32)
+
+def decode_vertices(vert_dirs_data, x_data, y_data, z_data, num_vertices):
+    """
+    Decodes delta-encoded vertex positions with NumPy.
+    Returns an (N, 3) int array in Blender axis order (x, z, -y).
+    """
+    flags = np.zeros(num_vertices, dtype=np.uint8)
+    raw_flags = np.frombuffer(vert_dirs_data, dtype=np.uint8)[:num_vertices]
+    flags[:len(raw_flags)] = raw_flags
+
+    axes = []
+    for bit, section in ((1, x_data), (2, y_data), (4, z_data)):
+        mask = (flags & bit) != 0
+        deltas = np.zeros(num_vertices, dtype=np.int64)
+        deltas[mask] = unpack_smart_ints(section, int(np.count_nonzero(mask)))
+        axes.append(np.cumsum(deltas))
+
+    x, y, z = axes
+    return np.column_stack((x, z, -y))
+
+def decode_vertices_legacy(vert_dirs_data, x_data, y_data, z_data, num_vertices):
+    """Per-vertex DataStream decoder (original implementation, kept for comparison)"""
+    vertices = []
+    last_x, last_y, last_z = 0, 0, 0
+    x_stream = DataStream(x_data); y_stream = DataStream(y_data); z_stream = DataStream(z_data)
+    for i in range(num_vertices):
+        flag = vert_dirs_data[i] if i < len(vert_dirs_data) else 0
+        dx, dy, dz = 0, 0, 0
+        if flag & 1: dx = x_stream.unpack_smart_int()
+        if flag & 2: dy = y_stream.unpack_smart_int()
+        if flag & 4: dz = z_stream.unpack_smart_int()
+        last_x += dx; last_y += dy; last_z += dz
+        vertices.append((last_x, last_z, -last_y))
+    return np.array(vertices, dtype=np.int64).reshape(-1, 3)
+
+# =============================================================================
+# DECODED MODEL
+# =============================================================================
+class ComplexTextureParams:
+    """Holds parameters for complex texture projections"""
+    def __init__(self):
+        self.scale_x = 128
+        self.scale_y = 128
+        self.scale_z = 128
+        self.rotation = 0
+        self.direction = 0
+        self.speed = 0
+        self.trans_u = 0
+        self.trans_v = 0
+
+class DecodedModel:
+    """
+    Format-neutral result of decoding a .dat model, built from NumPy arrays only.
+
+    vertices                    (V, 3) positions in Blender axis order
+    faces                       (F, 3) vertex indices
+    face_colors                 (F,)   packed HSL (or texture id for 317 textured faces)
+    face_texture_ids            (F,)   texture id, -1 when untextured
+    texture_coordinate_indices  (F,)   index into texture_triangles, -1 when unset
+    texture_triangles           (T, 3) PMN vertex indices
+    priorities/tskins/alphas    (F,)   uint8, None when the format flag is off
+    vskins                      (V,)   uint8, None when the format flag is off
+    texture_render_types        (T,)   667 only (all 0 for 317)
+    complex_params              list of ComplexTextureParams (667 only)
+    """
+    def __init__(self, format_name, vertices, faces, face_colors, face_texture_ids,
+                 texture_coordinate_indices, texture_triangles,
+                 priorities=None, tskins=None, vskins=None, alphas=None,
+                 texture_render_types=None, complex_params=None):
+        self.format_name = format_name
+        self.vertices = vertices
+        self.faces = faces
+        self.face_colors = face_colors
+        self.face_texture_ids = face_texture_ids
+        self.texture_coordinate_indices = texture_coordinate_indices
+        self.texture_triangles = texture_triangles
+        self.priorities = priorities
+        self.tskins = tskins
+        self.vskins = vskins
+        self.alphas = alphas
+        if texture_render_types is None:
+            texture_render_types = np.zeros(len(texture_triangles), dtype=np.uint8)
+        self.texture_render_types = texture_render_types
+        self.complex_params = complex_params if complex_params is not None else []
+
+    @property
+    def vertex_count(self):
+        return len(self.vertices)
+
+    @property
+    def face_count(self):
+        return len(self.faces)
+
+    @property
+    def has_priorities(self):
+        return self.priorities is not None and len(self.priorities) > 0
+
+    @property
+    def has_tskins(self):
+        return self.tskins is not None and len(self.tskins) > 0
+
+    @property
+    def has_vskins(self):
+        return self.vskins is not None and len(self.vskins) > 0
+
+    @property
+    def has_alphas(self):
+        return self.alphas is not None and len(self.alphas) > 0
+
+    def __repr__(self):
+        return (f"<DecodedModel {self.format_name} verts={self.vertex_count} faces={self.face_count} "
+                f"textured={int(np.count_nonzero(self.face_texture_ids != -1))}>")
+
+# =============================================================================
+# SECTION HELPERS
+# =============================================================================
+def _byte_layer(section, count):
+    """Copies a per-face/per-vertex byte section into its own uint8 array."""
+    return np.array(np.frombuffer(section, dtype=np.uint8)[:count])
+
+def _padded_array(section, count, dtype, fill=0):
+    """Reads up to `count` items of `dtype` from a section, padding missing items with `fill`."""
+    dtype = np.dtype(dtype)
+    available = min(count, len(section) // dtype.itemsize)
+    result = np.full(count, fill, dtype=np.int32)
+    result[:available] = np.frombuffer(section, dtype=dtype, count=available)
+    return result
+
+def _padded_triples(section, count, dtype):
+    """Reads up to `count` complete (p, m, n) short triples, zero-filling missing rows."""
+    dtype = np.dtype(dtype)
+    available = min(count, len(section) // (3 * dtype.itemsize))
+    result = np.zeros((count, 3), dtype=np.int32)
+    result[:available] = np.frombuffer(section, dtype=dtype, count=available * 3).reshape(-1, 3)
+    return result
+
+def decode_faces(types_data, indices_data, num_faces, num_vertices, missing_opcode):
+    """
+    Decodes the strip-compressed triangle indices (opcodes 1-4).
+    `missing_opcode` is used once the type section runs out.
+    """
+    faces = np.zeros((num_faces, 3), dtype=np.int32)
+    indices_stream = DataStream(indices_data)
+    max_index = num_vertices - 1
+    num_types = len(types_data)
+    v1 = v2 = v3 = 0
+    offset = 0
+    for i in range(num_faces):
+        opcode = types_data[i] if i < num_types else missing_opcode
+        if opcode == 1:
+            v1 = indices_stream.unpack_smart_int() + offset; offset = v1
+            v2 = indices_stream.unpack_smart_int() + offset; offset = v2
+            v3 = indices_stream.unpack_smart_int() + offset; offset = v3
+        elif opcode == 2:
+            v2 = v3
+            v3 = indices_stream.unpack_smart_int() + offset; offset = v3
+        elif opcode == 3:
+            v1 = v3
+            v3 = indices_stream.unpack_smart_int() + offset; offset = v3
+        elif opcode == 4:
+            v1, v2 = v2, v1
+            v3 = indices_stream.unpack_smart_int() + offset; offset = v3
+
+        v1 = max(0, min(v1, max_index)); v2 = max(0, min(v2, max_index)); v3 = max(0, min(v3, max_index))
+        faces[i] = (v1, v2, v3)
+    return faces
+
+# =============================================================================
+# 317/OSRS DECODER
+# =============================================================================
+def decode_317(data, vectorized=True):
+    """Decodes a 317/OSRS (decode1) model. Returns a DecodedModel, or None if the data is too small."""
+    if len(data) < 18:
+        print("ERROR: File too small for 317/OSRS format.")
+        return None
+
+    # Every section below is a zero-copy view into the file buffer
+    data = memoryview(data)
+    (num_vertices, num_faces, num_tex_triangles,
+     textured_flag, pri_flag, alpha_flag, tskin_flag, vskin_flag,
+     x_data_len, y_data_len, z_data_len, face_indices_len) = struct.unpack('>HHBBBBBBHHHH', data[-18:])
+
+    # --- Calculate Offsets (Logic from codex.txt) ---
+    pos = 0
+    vert_dirs_offset = pos; pos += num_vertices
+    face_types_offset = pos; pos += num_faces
+    face_priorities_offset = pos
+    if pri_flag == 255: pos += num_faces
+    face_tskins_offset = pos
+    if tskin_flag == 1: pos += num_faces
+    face_textures_offset = pos # Corresponds to face types in unversioned skeletal
+    if textured_flag == 1: pos += num_faces
+    vertex_skins_offset = pos
+    if vskin_flag == 1: pos += num_vertices
+    alpha_data_offset = pos
+    if alpha_flag == 1: pos += num_faces
+    face_indices_offset = pos; pos += face_indices_len
+    face_colors_offset = pos; pos += num_faces * 2
+    texture_coords_offset = pos
+    if textured_flag == 1: pos += num_tex_triangles * 6
+    x_data_offset = pos; pos += x_data_len
+    y_data_offset = pos; pos += y_data_len
+    z_data_offset = pos
+
+    stream = DataStream(data)
+    vert_dirs_data = stream.section(vert_dirs_offset, num_vertices)
+    x_data = stream.section(x_data_offset, x_data_len)
+    y_data = stream.section(y_data_offset, y_data_len)
+    z_data = stream.section(z_data_offset) # To the end
+
+    # --- Unpack Vertices ---
+    if vectorized:
+        vertices = decode_vertices(vert_dirs_data, x_data, y_data, z_data, num_vertices)
+    else:
+        vertices = decode_vertices_legacy(vert_dirs_data, x_data, y_data, z_data, num_vertices)
+
+    # --- Unpack Faces ---
+    faces = decode_faces(stream.section(face_types_offset, num_faces),
+                         stream.section(face_indices_offset, face_indices_len),
+                         num_faces, num_vertices, missing_opcode=0)
+
+    # --- Process Face Data ---
+    face_colors = _padded_array(stream.section(face_colors_offset, num_faces * 2), num_faces, '>u2')
+    face_texture_ids = np.full(num_faces, -1, dtype=np.int32)
+    texture_coordinate_indices = np.full(num_faces, -1, dtype=np.int32)
+    texture_triangles = np.zeros((0, 3), dtype=np.int32)
+    if textured_flag == 1:
+        texture_flags = _padded_array(stream.section(face_textures_offset, num_faces), num_faces, np.uint8)
+        textured = (texture_flags & 2) == 2
+        face_texture_ids[textured] = face_colors[textured]
+        texture_coordinate_indices[textured] = texture_flags[textured] >> 2
+
+        # --- Unpack Texture Triangles (PMN) ---
+        texture_coords_data = stream.section(texture_coords_offset, num_tex_triangles * 6)
+        if len(texture_coords_data):
+            texture_triangles = _padded_array(texture_coords_data, num_tex_triangles * 3, '>u2').reshape(-1, 3)
+
+    return DecodedModel(
+        '317', vertices, faces, face_colors, face_texture_ids, texture_coordinate_indices, texture_triangles,
+        priorities=_byte_layer(stream.section(face_priorities_offset, num_faces), num_faces) if pri_flag == 255 else None,
+        tskins=_byte_layer(stream.section(face_tskins_offset, num_faces), num_faces) if tskin_flag == 1 else None,
+        vskins=_byte_layer(stream.section(vertex_skins_offset, num_vertices), num_vertices) if vskin_flag == 1 else None,
+        alphas=_byte_layer(stream.section(alpha_data_offset, num_faces), num_faces) if alpha_flag == 1 else None,
+    )
+
+# =============================================================================
+# 667 DECODER
+# =============================================================================
+def decode_667(data, vectorized=True):
+    """Decodes a 667 versioned model with complex texture data. Returns a DecodedModel, or None."""
+    if len(data) < 23:
+        return None
+
+    # Every section below is a zero-copy view into the file buffer
+    data = memoryview(data)
+    footer_start = len(data) - 23
+    footer_data = data[footer_start:footer_start + 21]
+    vertex_count, triangle_count = struct.unpack_from('>HH', footer_data, 0)
+    textured_triangle_count = footer_data[4]
+    footer_flags = footer_data[5]
+    triangle_priority_flag = footer_data[6]
+    triangle_alpha_flag = footer_data[7]
+    triangle_skin_flag = footer_data[8]
+    texture_flag = footer_data[9]
+    vertex_skin_flag = footer_data[10]
+    (vertices_x_length, vertices_y_length, vertices_z_length,
+     triangle_indices_length, texture_coord_indices_length) = struct.unpack_from('>HHHHH', footer_data, 11)
+
+    print(f"Vertices: {vertex_count}, Triangles: {triangle_count}, Textured: {textured_triangle_count}")
+
+    # Read texture render types
+    render_type_stream = DataStream(data)
+    texture_render_types = _padded_array(render_type_stream.section(0, textured_triangle_count),
+                                         textured_triangle_count, np.uint8)
+    simple_mask = texture_render_types == 0
+    complex_mask = (texture_render_types >= 1) & (texture_render_types <= 3)
+
+    simple_texture_face_count = int(np.count_nonzero(simple_mask))
+    complex_texture_face_count = int(np.count_nonzero(complex_mask))
+    cube_texture_face_count = int(np.count_nonzero(texture_render_types == 2))
+
+    print(f"Texture types - Simple: {simple_texture_face_count}, Complex: {complex_texture_face_count}, Cube: {cube_texture_face_count}")
+
+    # Calculate offsets
+    pos = textured_triangle_count
+    vertex_flags_offset = pos; pos += vertex_count
+    triangle_info_offset = pos
+    if footer_flags & 1 == 1: pos += triangle_count
+    triangle_indices_flags_offset = pos; pos += triangle_count
+    triangle_priorities_offset = pos
+    if triangle_priority_flag == 255: pos += triangle_count
+    triangle_skin_offset = pos
+    if triangle_skin_flag == 1: pos += triangle_count
+    vertex_skin_offset = pos
+    if vertex_skin_flag == 1: pos += vertex_count
+    triangle_alpha_offset = pos
+    if triangle_alpha_flag == 1: pos += triangle_count
+    triangle_indices_offset = pos; pos += triangle_indices_length
+    triangle_materials_offset = pos
+    if texture_flag == 1: pos += triangle_count * 2
+    texture_coordinate_indices_offset = pos; pos += texture_coord_indices_length
+    triangle_colors_offset = pos; pos += triangle_count * 2
+    vertices_x_offset = pos; pos += vertices_x_length
+    vertices_y_offset = pos; pos += vertices_y_length
+    vertices_z_offset = pos; pos += vertices_z_length
+    simple_textures_offset = pos; pos += simple_texture_face_count * 6
+    complex_textures_offset = pos; pos += complex_texture_face_count * 6
+
+    # Reading complex texture parameters - matching exact game order
+    texture_bytes = 6 # Simplified default size
+    textures_scale_offset = pos; pos += complex_texture_face_count * texture_bytes # Reads Z, Speed, X
+    textures_rotation_offset = pos; pos += complex_texture_face_count
+    textures_direction_offset = pos; pos += complex_texture_face_count
+    textures_translation_offset = pos
+
+    scale_stream = render_type_stream.substream(textures_scale_offset)
+    rot_stream = render_type_stream.substream(textures_rotation_offset)
+    dir_stream = render_type_stream.substream(textures_direction_offset)
+    trans_stream = render_type_stream.substream(textures_translation_offset)
+
+    complex_params = []
+    for i in range(complex_texture_face_count):
+        p = ComplexTextureParams()
+        # Scale buffer contains 3 values in order: Z, Speed, X
+        p.scale_z = scale_stream.read_unsigned_short()
+        p.speed = scale_stream.read_unsigned_short()
+        p.scale_x = scale_stream.read_unsigned_short()
+        # Single byte values
+        p.rotation = rot_stream.read_signed_byte()
+        p.scale_y = dir_stream.read_signed_byte()  # Actually used as direction/scale
+        p.direction = trans_stream.read_signed_byte()  # Base direction value
+        complex_params.append(p)
+
+    # Cube textures read 2 additional translation bytes (index within the complex list)
+    cube_indices_in_complex_list = np.flatnonzero(texture_render_types[complex_mask] == 2)
+    for cube_idx in cube_indices_in_complex_list:
+        complex_params[cube_idx].trans_u = trans_stream.read_signed_byte()
+        complex_params[cube_idx].trans_v = trans_stream.read_signed_byte()
+
+    # Read vertices
+    vertex_flags_data = render_type_stream.section(vertex_flags_offset, vertex_count)
+    x_data = render_type_stream.section(vertices_x_offset, vertices_x_length)
+    y_data = render_type_stream.section(vertices_y_offset, vertices_y_length)
+    z_data = render_type_stream.section(vertices_z_offset, vertices_z_length)
+    if vectorized:
+        vertices = decode_vertices(vertex_flags_data, x_data, y_data, z_data, vertex_count)
+    else:
+        vertices = decode_vertices_legacy(vertex_flags_data, x_data, y_data, z_data, vertex_count)
+
+    # Read faces
+    faces = decode_faces(render_type_stream.section(triangle_indices_flags_offset, triangle_count),
+                         render_type_stream.section(triangle_indices_offset, triangle_indices_length),
+                         triangle_count, vertex_count, missing_opcode=1)
+
+    # Read face colors
+    face_colors = _padded_array(render_type_stream.section(triangle_colors_offset, triangle_count * 2),
+                                triangle_count, '>u2')
+
+    # Read texture IDs (stored +1, so a missing/zero entry means untextured)
+    if texture_flag == 1:
+        face_texture_ids = _padded_array(render_type_stream.section(triangle_materials_offset, triangle_count * 2),
+                                         triangle_count, '>u2') - 1
+    else:
+        face_texture_ids = np.full(triangle_count, -1, dtype=np.int32)
+
+    # Read texture coordinate indices: one byte per textured face, in face order
+    texture_coordinate_indices = np.full(triangle_count, -1, dtype=np.int32)
+    if texture_coord_indices_length > 0:
+        coord_data = np.frombuffer(render_type_stream.section(texture_coordinate_indices_offset,
+                                                              texture_coord_indices_length), dtype=np.uint8)
+        textured_faces = np.flatnonzero(face_texture_ids != -1)[:len(coord_data)]
+        texture_coordinate_indices[textured_faces] = coord_data[:len(textured_faces)].astype(np.int32) - 1
+
+    # Read texture triangles: simple and complex PMN rows live in separate sections
+    texture_triangles = np.zeros((textured_triangle_count, 3), dtype=np.int32)
+    texture_triangles[simple_mask] = _padded_triples(
+        render_type_stream.section(simple_textures_offset), simple_texture_face_count, '>i2')
+    texture_triangles[complex_mask] = _padded_triples(
+        render_type_stream.section(complex_textures_offset), complex_texture_face_count, '>i2')
+
+    # Read additional data
+    return DecodedModel(
+        '667', vertices, faces, face_colors, face_texture_ids, texture_coordinate_indices, texture_triangles,
+        priorities=_byte_layer(render_type_stream.section(triangle_priorities_offset, triangle_count), triangle_count) if triangle_priority_flag == 255 else None,
+        tskins=_byte_layer(render_type_stream.section(triangle_skin_offset, triangle_count), triangle_count) if triangle_skin_flag == 1 else None,
+        vskins=_byte_layer(render_type_stream.section(vertex_skin_offset, vertex_count), vertex_count) if vertex_skin_flag == 1 else None,
+        alphas=_byte_layer(render_type_stream.section(triangle_alpha_offset, triangle_count), triangle_count) if triangle_alpha_flag == 1 else None,
+        texture_render_types=texture_render_types,
+        complex_params=complex_params,
+    )
+
+# =============================================================================
+# FILE ENTRY POINT (used directly and by worker processes)
+# =============================================================================
+DECODERS = {
+    '317': decode_317,
+    '667': decode_667,
+}
+
+def decode_file(filepath, format_name, vectorized=True):
+    """Reads and decodes one .dat file. Returns (filepath, DecodedModel or None)."""
+    with open(filepath, 'rb') as f:
+        data = f.read()
+    return filepath, DECODERS[format_name](data, vectorized=vectorized)
@@ -0,0 +1,222 @@
+# dat_encoder.py
+# Blender-independent block encoders for the DAT exporter.
+#
+# Each function takes integer arrays and returns the finished section bytes,
+# byte-identical to packing values one at a time with pack_smart_int/pack_word.
+import numpy as np
+
+# =============================================================================
+# PRIMITIVE ENCODERS
+# =============================================================================
+def encode_smart_ints(values):
+    """
+    Packs integers as smart ints: one byte (value + 64) for -64..63, otherwise a
+    big-endian short (value + 49152). Values a short cannot hold raise ValueError,
+    like struct.pack did.
+    """
+    values = np.asarray(values, dtype=np.int64).ravel()
+    if len(values) == 0:
+        return b""
+
+    small = (values >= -64) & (values <= 63)
+    large_values = values[~small] + 49152
+    if len(large_values) and (large_values.min() < 0 or large_values.max() > 0xFFFF):
+        raise ValueError("smart int out of range (must be between -49152 and 16383)")
+
+    lengths = np.where(small, 1, 2)
+    starts = np.cumsum(lengths) - lengths
+    out = np.zeros(int(lengths.sum()), dtype=np.uint8)
+    out[starts[small]] = values[small] + 64
+    large_starts = starts[~small]
+    out[large_starts] = large_values >> 8
+    out[large_starts + 1] = large_values & 0xFF
+    return out.tobytes()
+
+def encode_words(values):
+    """Packs integers as big-endian unsigned shorts."""
+    values = np.asarray(values, dtype=np.int64).ravel()
+    if len(values) and (values.min() < 0 or values.max() > 0xFFFF):
+        raise ValueError("word out of range (must be between 0 and 65535)")
+    return values.astype('>u2').tobytes()
+
+def encode_bytes(values):
+    """Packs integers as unsigned bytes."""
+    values = np.asarray(values, dtype=np.int64).ravel()
+    if len(values) and (values.min() < 0 or values.max() > 0xFF):
+        raise ValueError("bytes must be in range(0, 256)")
+    return values.astype(np.uint8).tobytes()
+
+# =============================================================================
+# SECTION ENCODERS
+# =============================================================================
+def encode_vertices(coords):
+    """
+    Delta-encodes (N, 3) integer vertex positions (already in RS axis order).
+    Returns (vert_dirs_data, x_data, y_data, z_data).
+    """
+    coords = np.asarray(coords, dtype=np.int64).reshape(-1, 3)
+    deltas = np.diff(coords, axis=0, prepend=np.zeros((1, 3), dtype=np.int64))
+    moved = deltas != 0
+    flags = moved[:, 0] * 1 | moved[:, 1] * 2 | moved[:, 2] * 4
+
+    x_data = encode_smart_ints(deltas[moved[:, 0], 0])
+    y_data = encode_smart_ints(deltas[moved[:, 1], 1])
+    z_data = encode_smart_ints(deltas[moved[:, 2], 2])
+    return flags.astype(np.uint8).tobytes(), x_data, y_data, z_data
+
+def face_opcodes(faces):
+    """
+    Strip-compression opcode per triangle. After any opcode the decoder's
+    (a, b, c) state equals the triangle just emitted, so each opcode depends
+    only on the previous triangle:
+      4: shares (b, a)   3: shares (c, b)   2: shares (a, c)   1: all three indices
+    """
+    faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+    prev = np.zeros_like(faces)
+    prev[1:] = faces[:-1]
+    p1, p2 = faces[:, 0], faces[:, 1]
+    v1, v2, v3 = prev[:, 0], prev[:, 1], prev[:, 2]
+
+    op4 = (v1 == p2) & (v2 == p1)
+    op3 = ~op4 & (p1 == v3) & (p2 == v2)
+    op2 = ~op4 & ~op3 & (p1 == v1) & (p2 == v3)
+    opcodes = np.ones(len(faces), dtype=np.uint8)
+    opcodes[op2] = 2
+    opcodes[op3] = 3
+    opcodes[op4] = 4
+    return opcodes
+
+def encode_faces(faces):
+    """
+    Strip-compresses (F, 3) triangle indices.
+    Returns (face_types_data, face_indices_data).
+    """
+    faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+    opcodes = face_opcodes(faces)
+
+    # Opcode 1 writes all three indices, the others only the new third one
+    emit = np.ones(faces.shape, dtype=bool)
+    emit[:, :2] = (opcodes == 1)[:, None]
+    indices = faces[emit]
+    index_deltas = np.diff(indices, prepend=0)
+    return opcodes.tobytes(), encode_smart_ints(index_deltas)
+
+# =============================================================================
+# FACE ORDER OPTIMIZATION
+# =============================================================================
+def optimize_strip_order(faces):
+    """
+    Greedily reorders (and rotates) triangles so consecutive faces share an edge,
+    letting encode_faces emit the one-index opcodes 2/3/4 instead of opcode 1.
+
+    The triangle (a, b, c) just emitted can be followed cheaply by any face that
+    starts with (b, a), (c, b) or (a, c) - i.e. its neighbour across any edge with
+    consistent winding. Among those, the face with the fewest unvisited
+    neighbours is taken first so strips do not strand isolated faces; when a
+    strip dead-ends it restarts at the next unvisited face in original order.
+    Rotation keeps each triangle's winding.
+
+    Returns (order, reordered_faces): reordered_faces[i] is a rotation of
+    faces[order[i]], so per-face attributes are permuted with `order`.
+    """
+    faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+    face_list = faces.tolist()
+    num_faces = len(face_list)
+
+    # Directed edge (x, y) -> faces that contain it, with the position of x
+    edge_faces = {}
+    for f, (a, b, c) in enumerate(face_list):
+        for k, edge in enumerate(((a, b), (b, c), (c, a))):
+            edge_faces.setdefault(edge, []).append((f, k))
+
+    def neighbours(f):
+        a, b, c = face_list[f]
+        for edge in ((b, a), (c, b), (a, c)):
+            for g, k in edge_faces.get(edge, ()):
+                yield g, k
+
+    visited = np.zeros(num_faces, dtype=bool)
+    order = np.empty(num_faces, dtype=np.int64)
+    rotations = np.zeros(num_faces, dtype=np.int64)
+    restart = 0
+    current = None
+    for i in range(num_faces):
+        best = None
+        if current is not None:
+            best_degree = 4
+            for g, k in neighbours(current):
+                if visited[g]:
+                    continue
+                degree = sum(1 for h, _ in neighbours(g) if not visited[h])
+                if degree < best_degree:
+                    best, best_degree = (g, k), degree
+        if best is None:
+            while visited[restart]:
+                restart += 1
+            best = (restart, 0)
+
+        current, rotation = best
+        visited[current] = True
+        order[i] = current
+        rotations[i] = rotation
+        a, b, c = face_list[current]
+        # Rotate so the shared edge comes first
+        face_list[current] = [(a, b, c), (b, c, a), (c, a, b)][rotation]
+
+    reordered = np.array([face_list[f] for f in order], dtype=np.int64).reshape(-1, 3)
+    return order, reordered
+
+# =============================================================================
+# VERTEX ORDER OPTIMIZATION
+# =============================================================================
+VERTEX_ORDERS = ('NONE', 'TRAVERSAL', 'MORTON')
+
+def _spread_bits(values, bits=21):
+    """Spreads the low `bits` bits of each value so two zero bits follow every bit."""
+    values = values.astype(np.uint64)
+    spread = np.zeros_like(values)
+    for bit in range(bits):
+        spread |= ((values >> np.uint64(bit)) & np.uint64(1)) << np.uint64(3 * bit)
+    return spread
+
+def morton_codes(coords):
+    """Z-order curve key for (N, 3) integer coordinates."""
+    coords = np.asarray(coords, dtype=np.int64).reshape(-1, 3)
+    if len(coords) == 0:
+        return np.zeros(0, dtype=np.uint64)
+    shifted = coords - coords.min(axis=0)
+    return (_spread_bits(shifted[:, 0])
+            | (_spread_bits(shifted[:, 1]) << np.uint64(1))
+            | (_spread_bits(shifted[:, 2]) << np.uint64(2)))
+
+def vertex_order(coords, faces, method):
+    """
+    Permutation that lists vertices so consecutive positions are close together
+    and the delta-encoded x/y/z blocks need fewer two-byte smart ints.
+
+      'TRAVERSAL': order of first use by the (already ordered) faces, which also
+                   keeps face index deltas small. Unused vertices go last.
+      'MORTON':    Z-order curve over the integer positions.
+      'NONE':      identity.
+
+    new_coords = coords[order]; old index i becomes np.argsort(order)[i].
+    """
+    coords = np.asarray(coords, dtype=np.int64).reshape(-1, 3)
+    num_vertices = len(coords)
+    if method == 'TRAVERSAL':
+        flat = np.asarray(faces, dtype=np.int64).ravel()
+        used, first_use = np.unique(flat, return_index=True)
+        order = used[np.argsort(first_use, kind='stable')]
+        unused = np.setdiff1d(np.arange(num_vertices), used, assume_unique=True)
+        return np.concatenate([order, unused]).astype(np.int64)
+    if method == 'MORTON':
+        return np.argsort(morton_codes(coords), kind='stable')
+    if method == 'NONE':
+        return np.arange(num_vertices, dtype=np.int64)
+    raise ValueError(f"unknown vertex order '{method}' (expected one of {VERTEX_ORDERS})")
+
+def remap_indices(indices, order):
+    """Rewrites old vertex indices for vertices listed in `order`."""
+    new_index = np.empty(len(order), dtype=np.int64)
+    new_index[order] = np.arange(len(order))
+    return new_index[np.asarray(indices, dtype=np.int64)]
@@ -2,8 +2,13 @@ import bpy
 import struct
 import re
 from mathutils import Vector, Matrix
-from math import inf
+from mathutils.kdtree import KDTree
 import colorsys
+import numpy as np
+from . import rs_layers
+from . import dat_encoder
+from . import mesh_revision
+from . import export_presets
 
 # This can be left empty if you are defining colors directly in Blender materials.
 MATERIALS = []
@@ -101,36 +106,139 @@ def extract_texture_id_from_material_name(mat_name):
     print(f"Warning: Could not extract texture ID from material name '{mat_name}'. Using 0.")
     return 0
 
+def build_vertex_kdtree(mesh):
+    """Builds a balanced KD-tree over the mesh's local vertex coordinates."""
+    tree = KDTree(len(mesh.vertices))
+    for i, v in enumerate(mesh.vertices):
+        tree.insert(v.co, i)
+    tree.balance()
+    return tree
+
+def find_nearest_vertex(tree, pos):
+    """
+    Index of the vertex closest to `pos`. Coincident vertices (seams) resolve to
+    the lowest index, like the linear scan this replaces.
+    """
+    co, best_i, dist = tree.find(pos)
+    if best_i is None:
+        return -1
+    ties = tree.find_range(pos, dist * (1.0 + 1e-6) + 1e-9)
+    return min(ties, key=lambda hit: (hit[2], hit[1]))[1]
+
+class MaterialSlotRecord:
+    """What the exporter needs from one material slot, resolved once per slot instead of per triangle."""
+    def __init__(self, mat):
+        self.name = mat.name if mat else None
+        self.is_pmn = bool(mat and mat.name.startswith("PMN_"))
+        self.texture_id = extract_texture_id_from_material_name(mat.name) if self.is_pmn else 0
+
+        principled = None
+        if mat and mat.use_nodes:
+            principled = next((n for n in mat.node_tree.nodes if n.type == 'BSDF_PRINCIPLED'), None)
+
+        # HSL for untextured faces
+        self.color_hsl = 0
+        if principled:
+            color = principled.inputs["Base Color"].default_value
+            self.color_hsl = rgb_to_rune_hsl(color[0], color[1], color[2])
+
+        # Alpha byte written for faces of this material (255 = opaque)
+        self.face_alpha = 255
+        if mat and mat.blend_method != 'OPAQUE' and principled:
+            alpha_input = principled.inputs.get('Alpha')
+            if alpha_input:
+                alpha_val = int(round((1.0 - alpha_input.default_value) * 255))
+                if alpha_val < 255:
+                    self.face_alpha = alpha_val
+
+def pmn_uv_solvable(mesh, uv_layer):
+    """Per loop triangle: True if its UVs span a basis the PMN points can be solved in."""
+    num_tris = len(mesh.loop_triangles)
+    tri_loops = np.zeros(num_tris * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get('loops', tri_loops)
+    uvs = np.zeros(len(mesh.loops) * 2, dtype=np.float32)
+    uv_layer.data.foreach_get('uv', uvs)
+    uvs = uvs.reshape(-1, 2).astype(np.float64)[tri_loops].reshape(-1, 3, 2)
+    U, V = uvs[:, :, 0], 1.0 - uvs[:, :, 1]
+    det = (U[:, 1] - U[:, 0]) * (V[:, 2] - V[:, 0]) - (U[:, 2] - U[:, 0]) * (V[:, 1] - V[:, 0])
+    return np.abs(det) > 1e-6
+
+def solve_pmn_points(mesh, uv_layer, tri):
+    """Object-space P, M, N points (UV (0,0), (1,0), (0,1)) in the plane of `tri`."""
+    A, B, C = mesh.vertices[tri.vertices[0]].co, mesh.vertices[tri.vertices[1]].co, mesh.vertices[tri.vertices[2]].co
+    loops = [mesh.loops[i] for i in tri.loops]
+    Ua, Va = uv_layer.data[loops[0].index].uv.x, 1.0 - uv_layer.data[loops[0].index].uv.y
+    Ub, Vb = uv_layer.data[loops[1].index].uv.x, 1.0 - uv_layer.data[loops[1].index].uv.y
+    Uc, Vc = uv_layer.data[loops[2].index].uv.x, 1.0 - uv_layer.data[loops[2].index].uv.y
+    det = (Ub - Ua) * (Vc - Va) - (Uc - Ua) * (Vb - Va)
+
+    sP, tP = (((Vc - Va) * (0 - Ua) - (Uc - Ua) * (0 - Va)) / det, ((Ub - Ua) * (0 - Va) - (Vb - Va) * (0 - Ua)) / det)
+    P = A + sP * (B - A) + tP * (C - A)
+    sM, tM = (((Vc - Va) * (1 - Ua) - (Uc - Ua) * (0 - Va)) / det, ((Ub - Ua) * (0 - Va) - (Vb - Va) * (1 - Ua)) / det)
+    M = A + sM * (B - A) + tM * (C - A)
+    sN, tN = (((Vc - Va) * (0 - Ua) - (Uc - Ua) * (1 - Va)) / det, ((Ub - Ua) * (1 - Va) - (Vb - Va) * (0 - Ua)) / det)
+    N = A + sN * (B - A) + tN * (C - A)
+    return P, M, N
+
+def read_deform_weights(mesh):
+    """Returns flat (vertex index, group index, weight) arrays for every deform weight in one pass."""
+    vertex_indices, group_indices, weights = [], [], []
+    for v in mesh.vertices:
+        for g in v.groups:
+            vertex_indices.append(v.index)
+            group_indices.append(g.group)
+            weights.append(g.weight)
+    return (np.array(vertex_indices, dtype=np.int64),
+            np.array(group_indices, dtype=np.int64),
+            np.array(weights, dtype=np.float64))
+
+def sum_vskin_weights(mesh, vskin_group_indices):
+    """Per-vertex sum of VSKIN weights * 100, rounded and capped at 254."""
+    vertex_indices, group_indices, weights = read_deform_weights(mesh)
+    in_vskin = np.isin(group_indices, list(vskin_group_indices))
+    summed = np.zeros(len(mesh.vertices), dtype=np.float64)
+    # Unbuffered, in vertex order: the same additions the per-vertex loop made
+    np.add.at(summed, vertex_indices[in_vskin], weights[in_vskin] * 100.0)
+    return np.minimum(254, np.round(summed)).astype(np.int64)
+
+# object pointer -> (cache key, {int(weight * 100): count})
+_vskin_histogram_cache = {}
+
+def vskin_weight_histogram(obj):
+    """
+    Counts of every non-zero VSKIN weight (as int(weight * 100)) on the object's mesh.
+    Cached until the mesh or its VSKIN groups change.
+    """
+    vskin_groups = tuple((vg.index, vg.name) for vg in obj.vertex_groups if re.match(r'^VSKIN\d+:$', vg.name))
+    mesh = obj.data
+    key = (obj.name, len(mesh.vertices), vskin_groups, mesh_revision.revision(obj))
+    cached = _vskin_histogram_cache.get(obj.as_pointer())
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    histogram = {}
+    if vskin_groups:
+        vertex_indices, group_indices, weights = read_deform_weights(mesh)
+        in_vskin = np.isin(group_indices, [index for index, _ in vskin_groups]) & (weights > 0)
+        values, counts = np.unique((weights[in_vskin] * 100).astype(np.int64), return_counts=True)
+        histogram = dict(zip(values.tolist(), counts.tolist()))
+    _vskin_histogram_cache[obj.as_pointer()] = (key, histogram)
+    return histogram
+
 def detect_model_type(obj):
     """Detects the model type based on VSKIN vertex groups."""
     if not obj or obj.type != 'MESH':
         return 'UNKNOWN'
     
-    vskin_groups = [vg for vg in obj.vertex_groups if re.match(r'^VSKIN\d+:$', vg.name)]
-    if not vskin_groups:
+    if not any(re.match(r'^VSKIN\d+:$', vg.name) for vg in obj.vertex_groups):
         return 'UNKNOWN'
     
     # Get all VSKIN weights present in the model
-    vskin_weights = set()
-    mesh = obj.data
-    for vg in vskin_groups:
-        for v in mesh.vertices:
-            for g in v.groups:
-                if g.group == vg.index and g.weight > 0:
-                    vskin_weights.add(int(g.weight * 100))
+    vskin_weights = set(vskin_weight_histogram(obj))
     
-    # Define detection patterns based on unique VSKIN weights
-    detection_patterns = {
-        'HEAD': {1, 2, 3},
-        'BODY': {8, 25, 21, 26, 20, 23, 17, 22, 19},
-        'GLOVES': {28, 27},
-        'PANTS': {29, 41, 40, 42, 43, 44, 35, 34, 36, 33, 37, 31, 38, 32},
-        'BOOTS': {38, 32, 47, 48, 46, 45},
-        'SWORD': {50},
-        'SHIELD': {28},
-        'NECKLACE': {8},
-        'CAPE': {8, 10, 11, 9, 14, 15, 13, 12}  # Add cape detection pattern
-    }
+    # Detection patterns (unique VSKIN weights) come from the preset registry
+    detection_patterns = {name: preset.detect_weights
+                          for name, preset in export_presets.get_presets().items() if preset.detect_weights}
     
     # Check for best match
     best_match = 'UNKNOWN'
@@ -151,7 +259,7 @@ def detect_model_type(obj):
             return 'SHIELD'
         
         # BODY and NECKLACE both use weight 8
-        if 8 in vskin_weights and len(vskin_weights & detection_patterns['BODY']) > 1:
+        if 8 in vskin_weights and len(vskin_weights & detection_patterns.get('BODY', set())) > 1:
             return 'BODY'
         elif 8 in vskin_weights and len(vskin_weights) == 1:
             return 'NECKLACE'
@@ -160,42 +268,73 @@ def detect_model_type(obj):
     
     return 'UNKNOWN'
 
-def _export_core(filepath, obj, export_preset, drop_mode):
-    if not obj or obj.type != 'MESH':
-        print(f"Object '{obj.name}' is not a mesh. Skipping.")
-        return
-    mode_str = " (Drop Mode)" if drop_mode else ""
-    print(f"\n--- Starting DAT Export for '{obj.name}' (Preset: {export_preset}{mode_str}) ---")
-    
-    # --- 1. DATA GATHERING & PREPARATION ---
-    print("[1] GATHERING & PREPARING DATA:")
-    
-    depsgraph = bpy.context.evaluated_depsgraph_get()
-    eval_obj = obj.evaluated_get(depsgraph)
-    mesh = eval_obj.to_mesh()
-    mesh.calc_loop_triangles()
-    
-    uv_layer = mesh.uv_layers.active
-    has_uvs = uv_layer is not None
-    
-    world_matrix = obj.matrix_world
-    
-    # Compute original world vertices for median if needed
-    original_vertices_raw = [world_matrix @ v.co for v in mesh.vertices]
-    num_vertices = len(original_vertices_raw)
-    faces_raw = list(mesh.loop_triangles)
-    num_faces = len(faces_raw)
-    print(f" > Found {num_vertices} vertices and {num_faces} faces.")
-    
-    # Default final matrix
-    final_matrix = world_matrix
-    
-    # Compute final world matrix and vertices_raw
-    if drop_mode and export_preset in DROP_PARAMS:
+def transform_points(matrix, coords):
+    """
+    Applies a 4x4 matrix to (N, 3) float32 coordinates in one pass. Rounds like
+    mathutils' Matrix @ Vector (float32 products summed in double, stored as
+    float32), so exported positions truncate exactly as the per-vertex math did.
+    """
+    m = np.array(matrix, dtype=np.float32)
+    coords = np.asarray(coords, dtype=np.float32).reshape(-1, 3)
+    out = np.empty_like(coords)
+    for row in range(3):
+        products = (coords * m[row, :3]).astype(np.float64)
+        out[:, row] = (products[:, 0] + products[:, 1] + products[:, 2] + np.float64(m[row, 3])).astype(np.float32)
+    return out
+
+def vector_median(points):
+    """sum(points, Vector()) / len(points) with mathutils' float32 rounding."""
+    total = np.cumsum(points, axis=0, dtype=np.float32)[-1]
+    return Vector(total * (np.float32(1.0) / np.float32(len(points))))
+
+class GatheredModel:
+    """
+    Everything the DAT exporter reads from Blender for one object, gathered once.
+    Variants (normal, drop, other presets) are emitted from it with emit_variant()
+    without touching the mesh again.
+    """
+    def __init__(self, name, world_matrix, local_coords, faces, vertex_skins, has_vskin_groups,
+                 face_colors_hsl, face_textures, texture_triangles, face_alphas, has_alpha,
+                 custom_priorities, custom_tskins):
+        self.name = name
+        self.world_matrix = world_matrix
+        self.local_coords = local_coords        # (N, 3) float32, object space
+        self.faces = faces                      # (F, 3) vertex indices
+        self.vertex_skins = vertex_skins        # summed VSKIN weight per vertex
+        self.has_vskin_groups = has_vskin_groups
+        self.face_colors_hsl = face_colors_hsl
+        self.face_textures = face_textures
+        self.texture_triangles = texture_triangles
+        self.face_alphas = face_alphas
+        self.has_alpha = has_alpha
+        self.custom_priorities = custom_priorities  # RSPRI values per face, or None
+        self.custom_tskins = custom_tskins          # RSTSKIN values per face, or None
+        self._strip = None
+
+    @property
+    def num_vertices(self):
+        return len(self.local_coords)
+
+    @property
+    def num_faces(self):
+        return len(self.faces)
+
+    def strip_order(self):
+        """Strip optimizer result for the faces, computed once for all variants."""
+        if self._strip is None:
+            self._strip = dat_encoder.optimize_strip_order(self.faces)
+        return self._strip
+
+    def variant_matrix(self, export_preset, drop_mode):
+        """World matrix of a variant: the object's, or the drop transform for drop presets."""
+        world_matrix = self.world_matrix
+        if not (drop_mode and export_preset in DROP_PARAMS):
+            return world_matrix
+
         params = DROP_PARAMS[export_preset]
-        median = sum(original_vertices_raw, Vector()) / num_vertices
+        median = vector_median(transform_points(world_matrix, self.local_coords))
         T = Matrix.Translation(median)
-        
+
         rot_value = params.get('rot_value', 0)
         if rot_value != 0:
             orient_matrix_list = params['rot_orient_matrix']
@@ -206,20 +345,20 @@ def _export_core(filepath, obj, export_preset, drop_mode):
             after_rot_matrix = delta_trans_rot @ world_matrix
         else:
             after_rot_matrix = world_matrix
-        
+
         rot_x_value = params.get('rot_x_value', 0)
         if rot_x_value != 0:
             delta_rot_x = Matrix.Rotation(rot_x_value, 4, Vector((1, 0, 0)))
             delta_trans_rot_x = T @ delta_rot_x @ T.inverted()
             after_rot_matrix = delta_trans_rot_x @ after_rot_matrix
-        
+
         trans_type = params.get('trans_type')
         if trans_type:
             if trans_type == 'LOCAL':
                 trans_z = params['trans_z']
                 local_vec = Vector((0, 0, trans_z))
                 trans_mat = Matrix.Translation(local_vec)
-                final_matrix = after_rot_matrix @ trans_mat
+                return after_rot_matrix @ trans_mat
             else:  # GLOBAL
                 if 'trans_value' in params:
                     trans_vec = Vector(params['trans_value'])
@@ -227,378 +366,256 @@ def _export_core(filepath, obj, export_preset, drop_mode):
                     trans_vec = Vector((0, 0, params['trans_z']))
                 else:
                     trans_vec = Vector((0, 0, 0))
-                final_matrix = Matrix.Translation(trans_vec) @ after_rot_matrix
-        else:
-            final_matrix = after_rot_matrix
-    
-    vertices_raw = [final_matrix @ v.co for v in mesh.vertices]
-    
+                return Matrix.Translation(trans_vec) @ after_rot_matrix
+        return after_rot_matrix
+
+def gather_model(obj):
+    """Reads the evaluated mesh, materials, PMN, VSKIN and RS layers of `obj` into a GatheredModel."""
+    print(f"\n--- Gathering DAT export data for '{obj.name}' ---")
+    print("[1] GATHERING & PREPARING DATA:")
+
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    eval_obj = obj.evaluated_get(depsgraph)
+    mesh = eval_obj.to_mesh()
+    mesh.calc_loop_triangles()
+
+    uv_layer = mesh.uv_layers.active
+    has_uvs = uv_layer is not None
+
+    num_vertices = len(mesh.vertices)
+    faces_raw = list(mesh.loop_triangles)
+    num_faces = len(faces_raw)
+    print(f" > Found {num_vertices} vertices and {num_faces} faces.")
+
+    local_coords = np.zeros(num_vertices * 3, dtype=np.float32)
+    mesh.vertices.foreach_get('co', local_coords)
+    local_coords = local_coords.reshape(-1, 3)
+    faces = np.zeros(num_faces * 3, dtype=np.int32)
+    mesh.loop_triangles.foreach_get('vertices', faces)
+    faces = faces.reshape(-1, 3)
+
     # ============================ VSKIN LOGIC ============================
     vskin_groups = [vg for vg in obj.vertex_groups if re.match(r'^VSKIN\d+:$', vg.name)]
-    
+
     vertex_skins = [0] * num_vertices
-    
+
     if vskin_groups:
         print(f" > Found {len(vskin_groups)} VSKIN groups. Summing weights...")
         vskin_group_indices = {vg.index for vg in vskin_groups}
+        vertex_skins = sum_vskin_weights(mesh, vskin_group_indices).tolist()
 
-        for i, vert in enumerate(mesh.vertices):
-            summed_weight = 0.0
-            for g in vert.groups:
-                if g.group in vskin_group_indices:
-                    summed_weight += g.weight * 100.0
-            
-            final_skin_value = min(254, int(round(summed_weight)))
-            vertex_skins[i] = final_skin_value
-        
         print(f" > Calculated summed vertex skin weights.")
     else:
         print(" > No VSKIN groups found. Skipping VSKIN data.")
-    
-    has_vertex_skins = not drop_mode and bool(vskin_groups)
-    
+
+    # ============================ MATERIAL SLOTS ============================
+    print(" > Processing materials for face colors and textures...")
+    materials = list(obj.data.materials)
+    slot_records = [MaterialSlotRecord(mat) for mat in materials]
+    # Triangles without a valid slot share one empty record at the end
+    slot_records.append(MaterialSlotRecord(None))
+
+    material_indices = np.zeros(num_faces, dtype=np.int32)
+    mesh.loop_triangles.foreach_get('material_index', material_indices)
+    slot_indices = np.where(material_indices < len(materials), material_indices, len(materials))
+
     # ============================ TEXTURE LOGIC ============================
-    face_colors_hsl = []
-    face_textures = []
+    face_colors_hsl = np.array([record.color_hsl for record in slot_records], dtype=np.int64)[slot_indices]
+    face_textures = np.zeros(num_faces, dtype=np.int64)
     texture_triangles = []
-    pmn_material_map = {}
-    texture_id_map = {}
-    print(" > Processing materials for face colors and textures...")
-    
-    pmn_materials = []
-    if obj.data.materials:
-        for mat in obj.data.materials:
-            if mat and mat.name.startswith('PMN_'):
-                pmn_materials.append(mat)
-    
-    for mat in pmn_materials:
-        extracted_id = extract_texture_id_from_material_name(mat.name)
-        texture_id_map[mat.name] = extracted_id
-        
-    for tri_index, tri in enumerate(faces_raw):
-        mat = obj.data.materials[tri.material_index] if obj.data.materials and tri.material_index < len(obj.data.materials) else None
-        is_textured = False
-        texture_id = 0
-        
-        if mat and mat.name.startswith("PMN_"):
-            is_textured = True
-            texture_id = texture_id_map.get(mat.name, 0)
-            
-            if mat.name not in pmn_material_map:
-                p_idx, m_idx, n_idx = None, None, None
-                if has_uvs:
-                    A, B, C = mesh.vertices[tri.vertices[0]].co, mesh.vertices[tri.vertices[1]].co, mesh.vertices[tri.vertices[2]].co
-                    loops = [mesh.loops[i] for i in tri.loops]
-                    Ua, Va = uv_layer.data[loops[0].index].uv.x, 1.0 - uv_layer.data[loops[0].index].uv.y
-                    Ub, Vb = uv_layer.data[loops[1].index].uv.x, 1.0 - uv_layer.data[loops[1].index].uv.y
-                    Uc, Vc = uv_layer.data[loops[2].index].uv.x, 1.0 - uv_layer.data[loops[2].index].uv.y
-                    det = (Ub - Ua) * (Vc - Va) - (Uc - Ua) * (Vb - Va)
-                    
-                    if abs(det) > 1e-6:
-                        sP, tP = (((Vc - Va) * (0 - Ua) - (Uc - Ua) * (0 - Va)) / det, ((Ub - Ua) * (0 - Va) - (Vb - Va) * (0 - Ua)) / det)
-                        P = A + sP * (B - A) + tP * (C - A)
-                        sM, tM = (((Vc - Va) * (1 - Ua) - (Uc - Ua) * (0 - Va)) / det, ((Ub - Ua) * (0 - Va) - (Vb - Va) * (1 - Ua)) / det)
-                        M = A + sM * (B - A) + tM * (C - A)
-                        sN, tN = (((Vc - Va) * (0 - Ua) - (Uc - Ua) * (1 - Va)) / det, ((Ub - Ua) * (1 - Va) - (Vb - Va) * (0 - Ua)) / det)
-                        N = A + sN * (B - A) + tN * (C - A)
-                        
-                        indices = []
-                        for pos in [P, M, N]:
-                            best_i, min_dist_sq = -1, inf
-                            for i, v in enumerate(mesh.vertices):
-                                dist_sq = (v.co - pos).length_squared
-                                if dist_sq < min_dist_sq:
-                                    min_dist_sq, best_i = dist_sq, i
-                            indices.append(best_i)
-                        p_idx, m_idx, n_idx = indices
-                
-                if p_idx is not None and m_idx is not None and n_idx is not None:
-                    pmn_material_map[mat.name] = len(texture_triangles)
-                    texture_triangles.append((p_idx, m_idx, n_idx))
-                else:
-                    is_textured = False
-            
-            if is_textured:
-                pmn_index = pmn_material_map[mat.name]
-                face_textures.append(2 + (pmn_index << 2))
-                
-        if not is_textured:
-            face_textures.append(0)
-            color_val = 0
-            if mat and mat.use_nodes:
-                principled = next((n for n in mat.node_tree.nodes if n.type == 'BSDF_PRINCIPLED'), None)
-                if principled:
-                    color = principled.inputs["Base Color"].default_value
-                    color_val = rgb_to_rune_hsl(color[0], color[1], color[2])
-            face_colors_hsl.append(color_val)
-        else:
-            face_colors_hsl.append(texture_id)
-            
-    has_textures = bool(texture_triangles)
+
+    pmn_slots = {}  # material name -> slot indices (a material can fill several slots)
+    for slot_index, record in enumerate(slot_records):
+        if record.is_pmn:
+            pmn_slots.setdefault(record.name, []).append(slot_index)
+
+    if pmn_slots and has_uvs:
+        solvable = pmn_uv_solvable(mesh, uv_layer)
+        vertex_tree = None  # built on the first PMN lookup
+
+        # Each material's PMN comes from its first triangle with a solvable UV basis;
+        # its triangles before that one stay untextured.
+        first_textured = []
+        for name, slots in pmn_slots.items():
+            material_faces = np.isin(slot_indices, slots)
+            candidates = np.flatnonzero(material_faces & solvable)
+            if len(candidates) == 0:
+                continue
+            first_face = int(candidates[0])
+            P, M, N = solve_pmn_points(mesh, uv_layer, faces_raw[first_face])
+            if vertex_tree is None:
+                vertex_tree = build_vertex_kdtree(mesh)
+            pmn = tuple(find_nearest_vertex(vertex_tree, pos) for pos in (P, M, N))
+            first_textured.append((first_face, name, material_faces, pmn))
+
+        # PMN indices are handed out in the order the textured triangles appear
+        for pmn_index, (first_face, name, material_faces, pmn) in enumerate(sorted(first_textured, key=lambda item: item[0])):
+            texture_triangles.append(pmn)
+            textured = material_faces.copy()
+            textured[:first_face] = False
+            face_textures[textured] = 2 + (pmn_index << 2)
+            face_colors_hsl[textured] = slot_records[pmn_slots[name][0]].texture_id
+
     num_tex_triangles = len(texture_triangles)
     print(f" > Found {num_tex_triangles} unique PMN texture definitions.")
+
+    # ============================ RS LAYERS ============================
+    custom_priorities = rs_layers.read_triangle_values(mesh, rs_layers.PRIORITY_LAYER)
+    custom_tskins = rs_layers.read_triangle_values(mesh, rs_layers.TSKIN_LAYER)
+
+    # ============================ ALPHA LOGIC ============================
+    print(" > Checking for transparent materials...")
+    face_alphas = np.array([record.face_alpha for record in slot_records], dtype=np.int64)[slot_indices]
+    has_alpha = bool(np.any(face_alphas < 255))
     
+    if has_alpha:
+        print(f" > Found materials with alpha. Alpha data will be included.")
+    else:
+        print(" > No alpha detected. Skipping alpha data.")
+
+    eval_obj.to_mesh_clear()
+
+    return GatheredModel(
+        obj.name, obj.matrix_world.copy(), local_coords, faces, vertex_skins, bool(vskin_groups),
+        face_colors_hsl, face_textures, texture_triangles, face_alphas, has_alpha,
+        custom_priorities.tolist() if custom_priorities is not None else None,
+        custom_tskins.tolist() if custom_tskins is not None else None,
+    )
+
+def emit_variant(model, filepath, export_preset, drop_mode, optimize_strips=False, vertex_order='NONE', pipeline=None):
+    """
+    Builds and writes one DAT file (normal or drop, for one preset) from a GatheredModel.
+    With an export_pool.ExportPipeline the encode+write runs there and the job is returned;
+    otherwise it runs now and the written size is returned.
+    """
+    # Everything touching mathutils or shared model state happens here, on the caller's thread
+    final_matrix = np.array(model.variant_matrix(export_preset, drop_mode), dtype=np.float32)
+    if optimize_strips and model.num_faces > 1:
+        model.strip_order()
+    # The preset registry stats its files and may reload them: resolve it on this thread as well
+    preset = export_presets.get_preset(export_preset)
+    if pipeline is not None:
+        return pipeline.submit(filepath, write_variant, model, final_matrix, filepath, export_preset, preset, drop_mode,
+                               optimize_strips, vertex_order)
+    return write_variant(model, final_matrix, filepath, export_preset, preset, drop_mode, optimize_strips, vertex_order)
+
+def write_variant(model, final_matrix, filepath, export_preset, preset, drop_mode, optimize_strips, vertex_order):
+    """
+    Encodes one variant with an already computed 4x4 matrix and its resolved
+    ExportPreset (or None) and writes it. bpy-free; returns the file size.
+    """
+    mode_str = " (Drop Mode)" if drop_mode else ""
+    print(f"\n--- Starting DAT Export for '{model.name}' (Preset: {export_preset}{mode_str}) ---")
+
+    num_vertices = model.num_vertices
+    num_faces = model.num_faces
+    vertex_skins = model.vertex_skins
+    face_colors_hsl = model.face_colors_hsl
+    face_textures = model.face_textures
+    texture_triangles = model.texture_triangles
+    face_alphas = model.face_alphas
+    has_alpha = model.has_alpha
+    has_textures = bool(texture_triangles)
+    num_tex_triangles = len(texture_triangles)
+
+    vertices_raw = transform_points(final_matrix, model.local_coords)
+
+    has_vertex_skins = not drop_mode and model.has_vskin_groups
+
     # ============================ PRIORITY LOGIC ============================
     has_priorities = True
     print(f" > Using '{export_preset}' export preset for priorities.")
     
-    preset_maps = {
-        'HEAD': ({1, 2, 3}, 6),
-        'BODY': ({8}, 3, {25, 21, 26, 20, 23, 17, 22, 19}, 10),
-        'GLOVES': ({28, 27}, 10),
-        'PANTS': ({29, 41, 40, 42, 43, 44, 35, 34, 36, 33, 37, 31, 38, 32}, 1),
-        'BOOTS': ({38, 32, 47, 48, 46, 45}, 0),
-        'SWORD': ({50}, 10),
-        'SHIELD': ({28}, 11),
-        'NECKLACE': ({8}, 4)
-    }
-    
-    face_first_vertices = []
-    v1, v2, v3 = 0, 0, 0
-    for tri in faces_raw:
-        p1, p2, p3 = tri.vertices
-        if (v1, v2) == (p2, p1):
-            face_first_vertices.append(v2)
-            v1, v2, v3 = v2, v1, p3
-        elif p1 == v3 and p2 == v2:
-            face_first_vertices.append(v3)
-            v1, v2, v3 = v3, v2, p3
-        elif p1 == v1 and p2 == v3:
-            face_first_vertices.append(v1)
-            v1, v2, v3 = v1, v3, p3
-        else:
-            face_first_vertices.append(p1)
-            v1, v2, v3 = p1, p2, p3
+    # The decoder's first vertex is always the triangle's own first vertex
+    face_first_vertices = model.faces[:, 0]
     
     face_priorities = [1] * num_faces
 
     if export_preset == 'CUSTOM_PRIORITY':
-        print(" > Using CUSTOM_PRIORITY preset. Reading from 'RSPRI' vertex color layer...")
-        vcol_layer = mesh.vertex_colors.get("RSPRI")
-        if vcol_layer:
-            for i, tri in enumerate(faces_raw):
-                color = vcol_layer.data[tri.loops[0]].color
-                face_priorities[i] = int(color[0] * 255)
+        print(" > Using CUSTOM_PRIORITY preset. Reading from 'RSPRI' layer...")
+        if model.custom_priorities is not None:
+            face_priorities = list(model.custom_priorities)
             print(f" > Successfully read custom priorities for {num_faces} faces.")
         else:
             print(" > WARNING: 'CUSTOM_PRIORITY' preset but 'RSPRI' layer not found! Using default priority 1.")
             
-    elif export_preset in preset_maps:
-        mappings = preset_maps[export_preset]
-        if export_preset == 'BODY':
-            weights_p3, pri_p3, weights_p10, pri_p10 = mappings
-            for i in range(num_faces):
-                v_index = face_first_vertices[i]
-                weight_val = vertex_skins[v_index] if v_index < len(vertex_skins) else 0
-                if weight_val in weights_p3: face_priorities[i] = pri_p3
-                elif weight_val in weights_p10: face_priorities[i] = pri_p10
-        else:
-            weights, priority = mappings
-            for i in range(num_faces):
-                v_index = face_first_vertices[i]
-                weight_val = vertex_skins[v_index] if v_index < len(vertex_skins) else 0
-                if weight_val in weights: face_priorities[i] = priority
+    elif preset is not None and preset.has_priorities:
+        face_priorities = preset.face_priorities(vertex_skins, face_first_vertices)
     
     # ============================ TSKIN LOGIC ============================
     face_tskins = [0] * num_faces
     
-    tskin_preset_maps = {
-        'HEAD': {
-            1: 0,
-            2: 1, 3: 1
-        },
-        'GLOVES': {
-            27: 15,
-            28: 16
-        },
-        'BODY': {
-            8: 4,
-            25: 13, 26: 13,
-            23: 14,
-            22: 12,
-            21: 11, 20: 11,
-            17: 8,
-            19: 10
-        },
-        'PANTS': {
-            29: 22, 41: 22,
-            43: 23,
-            35: 20, 36: 20, 37: 20,
-            38: 21,
-            44: 24,
-            34: 19, 33: 19, 31: 19,
-            32: 18
-        },
-        'BOOTS': {
-            38: 21, 47: 21,
-            46: 26,
-            32: 18, 48: 18,
-            45: 25
-        },
-        'SWORD': {
-            50: 29
-        },
-        'SHIELD': {
-            28: 16
-        },
-        'NECKLACE': {
-            8: 4
-        }
-    }
-    
-    ordered_priority_maps = {
-        'BOOTS': [
-            {46, 45}
-        ],
-        'BODY': [
-            {23},
-            {25, 26},
-            {17},
-            {21, 20},
-            {22},
-            {19}
-        ],
-        'PANTS': [
-            {44},
-            {43},
-            {38},
-            {32},
-            {35, 36, 37},
-            {34, 33, 31},
-        ]
-    }
-    
     if export_preset == 'CUSTOM_PRIORITY':
-        tskin_vcol_layer = mesh.vertex_colors.get("RSTSKIN")
-        if tskin_vcol_layer:
-            print(" > Found 'RSTSKIN' vertex color layer. Reading TSKIN data...")
-            for i, tri in enumerate(faces_raw):
-                loop_index = tri.loops[0]
-                color = tskin_vcol_layer.data[loop_index].color
-                face_tskins[i] = int(color[0] * 255)
+        if model.custom_tskins is not None:
+            print(" > Found 'RSTSKIN' layer. Reading TSKIN data...")
+            face_tskins = list(model.custom_tskins)
             print(f" > Successfully read TSKIN data for {num_faces} faces.")
         else:
             print(" > No 'RSTSKIN' layer found for CUSTOM_PRIORITY. Skipping TSKIN data.")
     
-    elif export_preset in tskin_preset_maps:
-        tskin_map = tskin_preset_maps[export_preset]
-        ordered_priority_groups = ordered_priority_maps.get(export_preset, [])
-        
-        all_priority_weights = set()
-        for group in ordered_priority_groups:
-            all_priority_weights.update(group)
-
+    elif preset is not None and preset.has_tskins:
         print(f" > Applying TSKIN preset for '{export_preset}' based on vertex weights...")
-
-        for i, tri in enumerate(faces_raw):
-            applied_tskin = False
-            
-            if ordered_priority_groups:
-                for priority_group in ordered_priority_groups:
-                    for v_index in tri.vertices:
-                        weight_val = vertex_skins[v_index] if v_index < len(vertex_skins) else 0
-                        if weight_val in priority_group:
-                            face_tskins[i] = tskin_map[weight_val]
-                            applied_tskin = True
-                            break
-                    if applied_tskin:
-                        break
-            
-            if not applied_tskin:
-                for v_index in tri.vertices:
-                    weight_val = vertex_skins[v_index] if v_index < len(vertex_skins) else 0
-                    if weight_val in tskin_map and weight_val not in all_priority_weights:
-                        face_tskins[i] = tskin_map[weight_val]
-                        break
-
+        face_tskins = preset.face_tskins(vertex_skins, model.faces)
         print(f" > Applied TSKIN values to {num_faces} faces based on weight mapping.")
         
     else:
         print(f" > No TSKIN preset defined for '{export_preset}'. Skipping TSKIN data.")
     
-    has_tskins = not drop_mode and any(face_tskins)
+    has_tskins = not drop_mode and bool(np.any(face_tskins))
     
-    # ============================ ALPHA LOGIC ============================
-    has_alpha = False
-    face_alphas = [255] * num_faces
-    print(" > Checking for transparent materials...")
-    
-    mat_alpha_cache = {}
-    if obj.data.materials:
-        for mat in obj.data.materials:
-            if not mat:
-                mat_alpha_cache[mat.name if mat else None] = (False, 255)
-                continue
-            
-            is_alpha_mat = mat.blend_method != 'OPAQUE'
-            alpha_val = 255
-            
-            if is_alpha_mat and mat.use_nodes:
-                bsdf = next((n for n in mat.node_tree.nodes if n.type == 'BSDF_PRINCIPLED'), None)
-                if bsdf:
-                    alpha_input = bsdf.inputs.get('Alpha')
-                    if alpha_input:
-                        alpha_float = alpha_input.default_value
-                        alpha_val = int(round((1.0 - alpha_float) * 255))
-            
-            mat_alpha_cache[mat.name] = (is_alpha_mat, alpha_val)
-
-    for i, tri in enumerate(faces_raw):
-        mat = obj.data.materials[tri.material_index] if obj.data.materials and tri.material_index < len(obj.data.materials) else None
-        mat_name = mat.name if mat else None
-        
-        is_alpha_mat, alpha_val = mat_alpha_cache.get(mat_name, (False, 255))
-        
-        if is_alpha_mat and alpha_val < 255:
-            face_alphas[i] = alpha_val
-            has_alpha = True
-    
-    if has_alpha:
-        print(f" > Found materials with alpha. Alpha data will be included.")
-    else:
-        print(" > No alpha detected. Skipping alpha data.")
-
     # --- 2. BUILD BINARY DATA BLOCKS ---
     print("[2] BUILDING BINARY BLOCKS:")
-    
-    vert_dirs_data, x_data, y_data, z_data = bytearray(), bytearray(), bytearray(), bytearray()
-    last_x, last_y, last_z = 0, 0, 0
-    for v_co in vertices_raw:
-        vx, vy, vz = int(v_co.x), int(-v_co.z), int(v_co.y)
-        dx, dy, dz = vx - last_x, vy - last_y, vz - last_z
-        flag = (1 if dx != 0 else 0) | (2 if dy != 0 else 0) | (4 if dz != 0 else 0)
-        vert_dirs_data.append(flag)
-        if flag & 1: x_data += pack_smart_int(dx)
-        if flag & 2: y_data += pack_smart_int(dy)
-        if flag & 4: z_data += pack_smart_int(dz)
-        last_x, last_y, last_z = vx, vy, vz
-        
-    face_types_data, face_indices_raw = bytearray(), []
-    v1, v2, v3 = 0, 0, 0
-    for tri in faces_raw:
-        p1, p2, p3 = tri.vertices
-        if (v1, v2) == (p2, p1): face_types_data.append(4); face_indices_raw.append(p3); v1, v2, v3 = v2, v1, p3
-        elif p1 == v3 and p2 == v2: face_types_data.append(3); face_indices_raw.append(p3); v1, v2, v3 = v3, v2, p3
-        elif p1 == v1 and p2 == v3: face_types_data.append(2); face_indices_raw.append(p3); v1, v2, v3 = v1, v3, p3
-        else: face_types_data.append(1); face_indices_raw.extend([p1, p2, p3]); v1, v2, v3 = p1, p2, p3
-        
-    face_indices_data = bytearray()
-    last_v = 0
-    for index in face_indices_raw:
-        face_indices_data += pack_smart_int(index - last_v)
-        last_v = index
-        
-    face_priorities_data = bytes(face_priorities)
-    face_tskins_data = bytes(face_tskins)
-    vertex_skins_data = bytes(vertex_skins)
-    face_alphas_data = bytes(face_alphas)
-    face_colors_data = b"".join(pack_word(c) for c in face_colors_hsl)
-    face_textures_data = bytes(face_textures)
-    texture_coords_data = b"".join(pack_word(idx) for pmn_tuple in texture_triangles for idx in pmn_tuple)
+
+    # RS axis order: x, -z, y (truncated toward zero like int())
+    vertex_coords = np.stack([vertices_raw[:, 0], -vertices_raw[:, 2], vertices_raw[:, 1]], axis=1).astype(np.int64)
+    vert_dirs_data, x_data, y_data, z_data = dat_encoder.encode_vertices(vertex_coords)
+
+    face_vertices = model.faces
+    face_types_data, face_indices_data = dat_encoder.encode_faces(face_vertices)
+
+    if optimize_strips and num_faces > 1:
+        face_order, strip_faces = model.strip_order()
+        strip_types_data, strip_indices_data = dat_encoder.encode_faces(strip_faces)
+        print(f" > Strip optimizer: face indices {len(face_indices_data)} -> {len(strip_indices_data)} bytes.")
+        # Keep the original order unless reordering actually pays off
+        if len(strip_indices_data) < len(face_indices_data):
+            face_vertices = strip_faces
+            face_types_data, face_indices_data = strip_types_data, strip_indices_data
+            face_priorities = np.asarray(face_priorities)[face_order]
+            face_tskins = np.asarray(face_tskins)[face_order]
+            face_alphas = np.asarray(face_alphas)[face_order]
+            face_colors_hsl = np.asarray(face_colors_hsl)[face_order]
+            face_textures = np.asarray(face_textures)[face_order]
+
+    if vertex_order != 'NONE' and num_vertices > 1:
+        new_order = dat_encoder.vertex_order(vertex_coords, face_vertices, vertex_order)
+        ordered_vertex_data = dat_encoder.encode_vertices(vertex_coords[new_order])
+        ordered_faces = dat_encoder.remap_indices(face_vertices, new_order)
+        ordered_types_data, ordered_indices_data = dat_encoder.encode_faces(ordered_faces)
+        old_xyz = len(x_data) + len(y_data) + len(z_data)
+        new_xyz = sum(len(block) for block in ordered_vertex_data[1:])
+        print(f" > Vertex order '{vertex_order}': x/y/z data {old_xyz} -> {new_xyz} bytes, "
+              f"face indices {len(face_indices_data)} -> {len(ordered_indices_data)} bytes.")
+        # Keep the original order unless the combined blocks get smaller
+        if new_xyz + len(ordered_indices_data) < old_xyz + len(face_indices_data):
+            vert_dirs_data, x_data, y_data, z_data = ordered_vertex_data
+            face_vertices = ordered_faces
+            face_types_data, face_indices_data = ordered_types_data, ordered_indices_data
+            vertex_skins = np.asarray(vertex_skins)[new_order]
+            if texture_triangles:
+                texture_triangles = dat_encoder.remap_indices(np.asarray(texture_triangles).reshape(-1, 3), new_order)
+
+    face_priorities_data = dat_encoder.encode_bytes(face_priorities)
+    face_tskins_data = dat_encoder.encode_bytes(face_tskins)
+    vertex_skins_data = dat_encoder.encode_bytes(vertex_skins)
+    face_alphas_data = dat_encoder.encode_bytes(face_alphas)
+    face_colors_data = dat_encoder.encode_words(face_colors_hsl)
+    face_textures_data = dat_encoder.encode_bytes(face_textures)
+    texture_coords_data = dat_encoder.encode_words(texture_triangles)
 
     # --- 3. FINAL ASSEMBLY ---
     print("[3] FINAL ASSEMBLY & WRITE:")
-    all_data = vert_dirs_data + face_types_data
+    all_data = bytearray(vert_dirs_data + face_types_data)
     if has_priorities: all_data += face_priorities_data
     if has_tskins: all_data += face_tskins_data
     if has_textures: all_data += face_textures_data
@@ -629,17 +646,38 @@ def _export_core(filepath, obj, export_preset, drop_mode):
         f.write(all_data)
         f.write(footer)
         
-    eval_obj.to_mesh_clear()
-    print(f"--- Export of '{obj.name}' to DatMaker format is complete. ---")
+    print(f"--- Export of '{model.name}' to DatMaker format is complete. ---")
+    return len(all_data) + len(footer)
+
+def _export_core(filepath, obj, export_preset, drop_mode, optimize_strips=False, vertex_order='NONE'):
+    if not obj or obj.type != 'MESH':
+        print(f"Object '{obj.name}' is not a mesh. Skipping.")
+        return
+    emit_variant(gather_model(obj), filepath, export_preset, drop_mode,
+                 optimize_strips=optimize_strips, vertex_order=vertex_order)
 
-def export_dat(filepath, obj, export_preset='DEFAULT'):
-    """Exports the object to the specific DatMaker binary format."""
+def export_dat(filepath, obj, export_preset='DEFAULT', optimize_strips=False, vertex_order='NONE', model=None, pipeline=None):
+    """
+    Exports the object to the specific DatMaker binary format. Pass a GatheredModel
+    as `model` to reuse data that was already gathered for this object, and an
+    ExportPipeline as `pipeline` to encode and write in the background.
+    Returns the emitted variants' jobs (with a pipeline) or file sizes.
+    """
+    if not obj or obj.type != 'MESH':
+        print(f"Object '{obj.name}' is not a mesh. Skipping.")
+        return
+    if model is None:
+        model = gather_model(obj)
     if export_preset in DROP_PRESETS:
         print(f"Exporting normal model for {export_preset}...")
-        _export_core(filepath, obj, export_preset, drop_mode=False)
+        normal = emit_variant(model, filepath, export_preset, drop_mode=False, optimize_strips=optimize_strips,
+                              vertex_order=vertex_order, pipeline=pipeline)
         
         drop_filepath = filepath.replace('.dat', '_drop.dat') if filepath.endswith('.dat') else filepath + '_drop.dat'
         print(f"Exporting drop model for {export_preset}...")
-        _export_core(drop_filepath, obj, export_preset, drop_mode=True)
+        drop = emit_variant(model, drop_filepath, export_preset, drop_mode=True, optimize_strips=optimize_strips,
+                            vertex_order=vertex_order, pipeline=pipeline)
+        return [normal, drop]
     else:
-        _export_core(filepath, obj, export_preset, drop_mode=False)
\ No newline at end of file
+        return [emit_variant(model, filepath, export_preset, drop_mode=False, optimize_strips=optimize_strips,
+                             vertex_order=vertex_order, pipeline=pipeline)]
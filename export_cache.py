@@ -0,0 +1,152 @@
+# export_cache.py
+# Incremental DAT export: skips objects whose exported content has not changed.
+#
+# Each exported object gets a content hash over its gathered export data
+# (evaluated geometry, material colors and PMN textures, VSKIN weights,
+# RSPRI/RSTSKIN layers) and the export settings. Hashes are kept in a JSON manifest next to the exported
+# files; an object is skipped when its hash matches and its files are still on
+# disk with the recorded sizes.
+#
+# Within a session, a cheap key built from mesh_revision counters and the
+# object's non-mesh inputs is remembered next to each hash, so re-exporting an
+# untouched object is skipped before its mesh is gathered at all.
+import os
+import json
+import hashlib
+import bpy
+import numpy as np
+from . import dat_exporter
+from . import export_presets
+from . import mesh_revision
+
+MANIFEST_NAME = ".rsps_export_manifest.json"
+# Bump when the exporter's output changes for the same input
+CACHE_VERSION = 2
+
+def _feed_array(h, values):
+    h.update(np.ascontiguousarray(values).tobytes())
+
+def _feed_value(h, value):
+    h.update(repr(value).encode('utf-8'))
+    h.update(b'\0')
+
+def _feed_preset(h, name):
+    # The compiled tables, so edits to the preset files invalidate the hash
+    preset = export_presets.get_preset(name)
+    _feed_value(h, (name, preset is not None))
+    if preset is not None:
+        for table in (preset.priority_lut, preset.tskin_lut, preset.group_rank, preset.fallback_mask):
+            _feed_array(h, table)
+
+def object_fingerprint(model, settings, preset_names=()):
+    """
+    Hex digest of a GatheredModel's export input. `settings` is any repr-able
+    value holding the export options (presets, drop mode, optimizer choices);
+    the contents of the registry presets named in `preset_names` are included.
+    Hashes the arrays the exporter already gathered, so checking an object costs
+    no extra pass over its mesh.
+    """
+    h = hashlib.sha1()
+    _feed_value(h, (CACHE_VERSION, settings, dat_exporter.DROP_PARAMS))
+    for name in preset_names:
+        _feed_preset(h, name)
+    _feed_array(h, np.array(model.world_matrix, dtype=np.float32))
+    _feed_array(h, model.local_coords)
+    _feed_array(h, model.faces)
+    _feed_value(h, model.has_vskin_groups)
+    _feed_array(h, np.asarray(model.vertex_skins, dtype=np.int64))
+    _feed_array(h, model.face_colors_hsl)
+    _feed_array(h, model.face_textures)
+    _feed_value(h, model.texture_triangles)
+    _feed_array(h, model.face_alphas)
+    for values in (model.custom_priorities, model.custom_tskins):
+        _feed_value(h, values is not None)
+        if values is not None:
+            _feed_array(h, np.asarray(values, dtype=np.int64))
+    return h.hexdigest()
+
+def object_quick_key(obj, settings, preset_names=()):
+    """
+    Hex digest of everything object_fingerprint() depends on, read without
+    evaluating the mesh: the object's geometry revision, world matrix, material
+    slots, vertex group names and the current frame. Revisions restart every
+    session, so these keys are never stored in the manifest file.
+    """
+    h = hashlib.sha1()
+    mesh = obj.data
+    _feed_value(h, (CACHE_VERSION, settings, dat_exporter.DROP_PARAMS, obj.as_pointer(), mesh.as_pointer(),
+                    mesh_revision.revision(obj), bpy.context.scene.frame_current))
+    for name in preset_names:
+        _feed_preset(h, name)
+    _feed_value(h, [tuple(row) for row in obj.matrix_world])
+    _feed_value(h, [(vg.index, vg.name) for vg in obj.vertex_groups])
+    for mat in mesh.materials:
+        record = dat_exporter.MaterialSlotRecord(mat)
+        _feed_value(h, (record.name, record.texture_id, record.color_hsl, record.face_alpha))
+    return h.hexdigest()
+
+# (manifest path, key) -> (quick key, content hash) for objects checked or
+# exported this session
+_quick_keys = {}
+
+class ExportManifest:
+    """Exported filename -> content hash and written file sizes, stored in the output directory."""
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self.entries = {}
+        self.dirty = False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == CACHE_VERSION:
+                self.entries = data.get("objects", {})
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def is_current(self, key, fingerprint):
+        """True if `key` was exported with this hash and all its files are unchanged on disk."""
+        entry = self.entries.get(key)
+        if not entry or entry.get("hash") != fingerprint:
+            return False
+        for filename, size in entry.get("files", {}).items():
+            try:
+                if os.path.getsize(os.path.join(self.output_dir, filename)) != size:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def is_current_quick(self, key, quick_key):
+        """Like is_current(), for an object whose quick key is unchanged since it was last checked."""
+        remembered = _quick_keys.get((self.path, key))
+        return remembered is not None and remembered[0] == quick_key and self.is_current(key, remembered[1])
+
+    def remember(self, key, quick_key, fingerprint):
+        """Lets is_current_quick() match `quick_key` against this content hash."""
+        _quick_keys[(self.path, key)] = (quick_key, fingerprint)
+
+    def record(self, key, fingerprint, filepaths, quick_key=None):
+        files = {}
+        for filepath in filepaths:
+            try:
+                files[os.path.basename(filepath)] = os.path.getsize(filepath)
+            except OSError:
+                # Incomplete export: forget the entry so the next run retries
+                self.entries.pop(key, None)
+                _quick_keys.pop((self.path, key), None)
+                self.dirty = True
+                return
+        self.entries[key] = {"hash": fingerprint, "files": files}
+        if quick_key is not None:
+            self.remember(key, quick_key, fingerprint)
+        self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": CACHE_VERSION, "objects": self.entries}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
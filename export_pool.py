@@ -0,0 +1,67 @@
+# export_pool.py
+# Encode-and-write stage for batch DAT exports.
+#
+# Gathering needs bpy and stays on the main thread; encoding a gathered model
+# and writing the file does not, so those jobs run in worker threads while the
+# next object is gathered. Threads rather than processes: the encode stage
+# lives in a bpy-importing module and NumPy and file I/O release the GIL.
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+class ExportResult:
+    """Outcome of one encode+write job."""
+    def __init__(self, filepath, size=0, seconds=0.0, error=None):
+        self.filepath = filepath
+        self.size = size
+        self.seconds = seconds
+        self.error = error
+
+def _timed(filepath, fn, args, kwargs):
+    start = time.perf_counter()
+    try:
+        size = fn(*args, **kwargs)
+    except Exception as e:
+        return ExportResult(filepath, seconds=time.perf_counter() - start, error=e)
+    return ExportResult(filepath, size, time.perf_counter() - start)
+
+class ExportPipeline:
+    """Runs encode+write jobs in a thread pool (or inline) and collects per-file results."""
+    def __init__(self, use_parallel=True, worker_count=0):
+        workers = worker_count if worker_count > 0 else (os.cpu_count() or 1)
+        self.executor = ThreadPoolExecutor(max_workers=workers) if use_parallel and workers > 1 else None
+        self.jobs = []
+        self.start = time.perf_counter()
+
+    def submit(self, filepath, fn, *args, **kwargs):
+        """Queues fn(*args, **kwargs), which writes `filepath` and returns its size. Returns the job."""
+        if self.executor is not None:
+            job = self.executor.submit(_timed, filepath, fn, args, kwargs)
+        else:
+            job = _timed(filepath, fn, args, kwargs)
+        self.jobs.append(job)
+        return job
+
+    @staticmethod
+    def result(job):
+        """ExportResult of a job returned by submit()."""
+        return job.result() if hasattr(job, 'result') else job
+
+    def finish(self):
+        """Waits for all jobs, prints a per-file summary and returns the ExportResults."""
+        results = [self.result(job) for job in self.jobs]
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+        elapsed = time.perf_counter() - self.start
+
+        print("\n--- DAT Export Summary ---")
+        for result in results:
+            name = os.path.basename(result.filepath)
+            if result.error is not None:
+                print(f" > {name}: FAILED ({result.error})")
+            else:
+                print(f" > {name}: {result.size} bytes, encoded and written in {result.seconds * 1000:.1f} ms")
+        written = [result for result in results if result.error is None]
+        print(f" > {len(written)} files, {sum(result.size for result in written)} bytes in {elapsed:.2f} s")
+        return results
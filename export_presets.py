@@ -0,0 +1,144 @@
+# export_presets.py
+# Registry of weight-based export presets (priorities, TSKINs, auto-detection).
+#
+# Presets are read from export_presets.json next to this file, then from the
+# user's config directory (rsps_toolkit/export_presets.json), where entries
+# add new item types or replace built-in ones by name. Each preset is compiled
+# into 256-entry lookup tables indexed by a vertex skin value, so applying it
+# to a model is a handful of NumPy gathers.
+import os
+import json
+import numpy as np
+
+PRESET_FILENAME = "export_presets.json"
+BUILTIN_PRESETS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), PRESET_FILENAME)
+
+NO_PRIORITY = -1
+
+def _weight_list(values, preset_name):
+    weights = [int(w) for w in values]
+    for w in weights:
+        if not 0 <= w <= 255:
+            raise ValueError(f"Preset '{preset_name}': weight {w} is outside 0-255")
+    return weights
+
+class ExportPreset:
+    """One compiled preset. Vertex skin values index straight into its tables."""
+    def __init__(self, name, data):
+        self.name = name
+        self.detect_weights = set(_weight_list(data.get("detect_weights", []), name))
+
+        # Priority rules: the first rule listing a weight wins
+        self.priority_rules = [(_weight_list(rule["weights"], name), int(rule["priority"]))
+                               for rule in data.get("priorities", [])]
+        self.priority_lut = np.full(256, NO_PRIORITY, dtype=np.int16)
+        for weights, priority in reversed(self.priority_rules):
+            self.priority_lut[weights] = priority
+
+        # TSKIN map, plus ordered groups that are checked before the plain map
+        self.tskin_map = {int(w): int(t) for w, t in data.get("tskins", {}).items()}
+        _weight_list(self.tskin_map, name)
+        _weight_list(self.tskin_map.values(), name)
+        self.tskin_order = [_weight_list(group, name) for group in data.get("tskin_order", [])]
+        self.tskin_lut = np.zeros(256, dtype=np.int16)
+        for w, tskin in self.tskin_map.items():
+            self.tskin_lut[w] = tskin
+        # Rank of the first ordered group holding each weight (len(groups) = none)
+        self.group_rank = np.full(256, len(self.tskin_order), dtype=np.int16)
+        for rank in reversed(range(len(self.tskin_order))):
+            self.group_rank[self.tskin_order[rank]] = rank
+        # Weights the plain map may assign: mapped and not part of any ordered group
+        self.fallback_mask = np.zeros(256, dtype=bool)
+        self.fallback_mask[list(self.tskin_map)] = True
+        self.fallback_mask[self.group_rank < len(self.tskin_order)] = False
+
+    @property
+    def has_priorities(self):
+        return bool(self.priority_rules)
+
+    @property
+    def has_tskins(self):
+        return bool(self.tskin_map)
+
+    def face_priorities(self, vertex_skins, first_vertices, default=1):
+        """Priority per face from the skin of its first vertex; unmatched faces get `default`."""
+        priorities = self.priority_lut[np.asarray(vertex_skins, dtype=np.int64)[first_vertices]]
+        return np.where(priorities == NO_PRIORITY, default, priorities).astype(np.int64)
+
+    def face_tskins(self, vertex_skins, faces):
+        """
+        TSKIN per face. The earliest ordered group matched by any of the face's
+        vertices decides (first such vertex); otherwise the first vertex whose
+        weight is in the plain map; otherwise 0.
+        """
+        skins = np.asarray(vertex_skins, dtype=np.int64)[np.asarray(faces, dtype=np.int64).reshape(-1, 3)]
+        rows = np.arange(len(skins))
+        tskins = np.zeros(len(skins), dtype=np.int64)
+
+        if self.tskin_order:
+            ranks = self.group_rank[skins]
+            best_rank = ranks.min(axis=1)
+            grouped = best_rank < len(self.tskin_order)
+            first_in_group = np.argmax(ranks == best_rank[:, None], axis=1)
+            tskins[grouped] = self.tskin_lut[skins[rows, first_in_group]][grouped]
+        else:
+            grouped = np.zeros(len(skins), dtype=bool)
+
+        allowed = self.fallback_mask[skins]
+        fallback = ~grouped & allowed.any(axis=1)
+        first_allowed = np.argmax(allowed, axis=1)
+        tskins[fallback] = self.tskin_lut[skins[rows, first_allowed]][fallback]
+        return tskins
+
+_user_path = ()
+
+def user_presets_path():
+    """Path of the user's preset file (may not exist), or None outside Blender. Resolved once."""
+    global _user_path
+    if _user_path == ():
+        try:
+            import bpy
+            config_dir = bpy.utils.user_resource('CONFIG', path="rsps_toolkit")
+        except (ImportError, AttributeError):
+            config_dir = None
+        _user_path = os.path.join(config_dir, PRESET_FILENAME) if config_dir else None
+    return _user_path
+
+def _read_presets(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data.get("presets", {})
+
+_registry = {}
+_registry_key = None
+
+def _file_state(path):
+    try:
+        return (path, os.stat(path).st_mtime_ns)
+    except (OSError, TypeError):
+        return (path, None)
+
+def get_presets():
+    """All presets by name, built-in first. Reloaded when either registry file changes."""
+    global _registry, _registry_key
+    user_path = user_presets_path()
+    key = (_file_state(BUILTIN_PRESETS_PATH), _file_state(user_path))
+    if key == _registry_key:
+        return _registry
+
+    registry = {name: ExportPreset(name, data) for name, data in _read_presets(BUILTIN_PRESETS_PATH).items()}
+    if key[1][1] is not None:
+        try:
+            for name, data in _read_presets(user_path).items():
+                registry[name] = ExportPreset(name, data)
+            print(f"Loaded user export presets from '{user_path}'.")
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Warning: Could not read user export presets '{user_path}': {e}")
+
+    _registry = registry
+    _registry_key = key
+    return _registry
+
+def get_preset(name):
+    """The compiled preset called `name`, or None."""
+    return get_presets().get(name)
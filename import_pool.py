@@ -0,0 +1,56 @@
+# import_pool.py
+# Parallel .dat decoding for the multi-file import operators.
+import os
+import runpy
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from . import dat_decoder
+
+# Run in every worker before its first task; see import_worker.py
+_WORKER_SETUP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'import_worker.py')
+
+def resolve_worker_count(requested, file_count):
+    """0 means one worker per CPU core; never more workers than files."""
+    workers = requested if requested > 0 else (os.cpu_count() or 1)
+    return max(1, min(workers, file_count))
+
+def iter_decoded(filepaths, format_name, use_parallel=True, worker_count=0, vectorized=True):
+    """
+    Yields (filepath, model, error) for every file, in completion order.
+    Decoding runs in a process pool when it is worth it; if the pool cannot be
+    started or breaks, the remaining files are decoded in this process.
+    """
+    pending = list(filepaths)
+    workers = resolve_worker_count(worker_count, len(pending))
+
+    if use_parallel and workers > 1:
+        try:
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=runpy.run_path,
+                                     initargs=(_WORKER_SETUP, {'PACKAGE_NAME': __package__})) as executor:
+                print(f" > Decoding {len(pending)} files with {workers} worker processes...")
+                futures = {executor.submit(dat_decoder.decode_file, path, format_name, vectorized): path
+                           for path in pending}
+                for future in as_completed(futures):
+                    path = futures[future]
+                    try:
+                        _, model = future.result()
+                    except BrokenProcessPool:
+                        raise
+                    except Exception as e:
+                        pending.remove(path)
+                        yield path, None, e
+                        continue
+                    pending.remove(path)
+                    yield path, model, None
+        except (BrokenProcessPool, OSError) as e:
+            print(f"WARNING: Parallel decode unavailable ({e}); decoding {len(pending)} remaining files sequentially.")
+
+    for path in list(pending):
+        try:
+            _, model = dat_decoder.decode_file(path, format_name, vectorized)
+        except Exception as e:
+            yield path, None, e
+            continue
+        yield path, model, None
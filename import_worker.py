@@ -0,0 +1,19 @@
+# import_worker.py
+# Setup script for the import_pool worker processes. Never imported.
+#
+# Spawned workers cannot import this add-on package because its __init__ needs
+# bpy. import_pool runs this file in each worker (runpy, with PACKAGE_NAME set
+# to the package name) to register bare package modules with the add-on folder
+# as their path. The bpy-free modules (dat_decoder) then import under their real
+# names, so tasks and decoded models pickle exactly as they do in Blender.
+import os
+import sys
+import types
+
+_parts = globals()['PACKAGE_NAME'].split('.')
+for _i in range(1, len(_parts) + 1):
+    _name = '.'.join(_parts[:_i])
+    if _name not in sys.modules:
+        _package = types.ModuleType(_name)
+        _package.__path__ = [os.path.dirname(os.path.abspath(__file__))] if _i == len(_parts) else []
+        sys.modules[_name] = _package
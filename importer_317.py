@@ -1,12 +1,21 @@
 # importer_317.py
 import bpy
-import struct
 import os
 import colorsys
+import numpy as np
 from bpy_extras.io_utils import ImportHelper
-from bpy.props import StringProperty, CollectionProperty
+from bpy.props import StringProperty, CollectionProperty, BoolProperty, IntProperty
 from bpy.types import Operator, OperatorFileListElement
-from mathutils import Vector
+from . import dat_decoder
+from . import import_pool
+from . import mesh_builder
+from . import rs_layers
+from . import material_pool
+from . import texture_index
+
+# Decode vertex deltas with the batched NumPy decoder. Set to False to fall back
+# to the original per-vertex DataStream loop in dat_decoder (kept for comparison/debugging).
+USE_VECTORIZED_DECODER = True
 # =============================================================================
 # PROPERTY GROUPS FOR PMN (from merged)
 # =============================================================================
@@ -19,51 +28,6 @@ class RS_Material_PropertyGroup(bpy.types.PropertyGroup):
     scale_u: bpy.props.FloatProperty(name="Scale U", default=1.0)
     scale_v: bpy.props.FloatProperty(name="Scale V", default=1.0)
 # =============================================================================
-# DATA STREAM (updated with signed_byte and fixed smart_int)
-# =============================================================================
-class DataStream:
-    def __init__(self, data):
-        self.data = data
-        self.offset = 0
-   
-    def read_byte(self):
-        if self.offset >= len(self.data):
-            return 0
-        byte = self.data[self.offset]
-        self.offset += 1
-        return byte
-   
-    def read_signed_byte(self):
-        if self.offset >= len(self.data):
-            return 0
-        byte = self.data[self.offset]
-        self.offset += 1
-        if byte > 127:
-            byte -= 256
-        return byte
-   
-    def read_unsigned_short(self):
-        if self.offset + 1 >= len(self.data):
-            return 0
-        value = struct.unpack('>H', self.data[self.offset:self.offset+2])[0]
-        self.offset += 2
-        return value
-   
-    def unpack_smart_int(self):
-        byte1 = self.read_byte()
-        if (byte1 & 0x80) == 0:
-            return byte1 - 64
-        else:
-            byte2 = self.read_byte()
-            value = ((byte1 & 0x7F) << 8) | byte2
-            return value - 16384
-       
-    def remaining(self):
-        return len(self.data) - self.offset
-   
-    def set_position(self, pos):
-        self.offset = pos
-# =============================================================================
 # HELPER FUNCTIONS (updated from merged)
 # =============================================================================
 def to_signed_byte(value):
@@ -89,18 +53,10 @@ def find_texture_file(texture_id):
         os.path.join(base_path, "317TEX")
     ]
     patterns = [str(texture_id), f"texture_{texture_id}", f"tex_{texture_id}"]
-    supported_exts = ('.png', '.jpg', '.jpeg', '.tga', '.bmp')
-    for tex_dir in texture_dirs:
-        if not os.path.isdir(tex_dir):
-            continue
-        for filename in os.listdir(tex_dir):
-            fn_lower = filename.lower()
-            name_part, ext_part = os.path.splitext(fn_lower)
-            if ext_part in supported_exts:
-                for pattern in patterns:
-                    if name_part == pattern.lower():
-                        print(f"Found texture {texture_id}: {filename}")
-                        return os.path.join(tex_dir, filename)
+    tex_path = texture_index.find_texture_file(texture_id, texture_dirs, patterns)
+    if tex_path:
+        print(f"Found texture {texture_id}: {os.path.basename(tex_path)}")
+        return tex_path
     print(f"Texture {texture_id} not found")
     return None
 def setup_material_alpha(mat, alpha_byte):
@@ -178,11 +134,7 @@ def create_material_from_hsl(hsl_value):
     return mat
 def create_texture_material(texture_id):
     """Create a Blender material with a simplified texture node setup"""
-    mat_name = f"Texture_{texture_id}"
-    mat = bpy.data.materials.get(mat_name)
-    if mat:
-        return mat
-    mat = bpy.data.materials.new(name=mat_name)
+    mat = bpy.data.materials.new(name=f"Texture_{texture_id}")
     mat.use_nodes = True
     mat.node_tree.nodes.clear()
    
@@ -231,155 +183,54 @@ def create_texture_material(texture_id):
     output_node.location = (250, 0)
    
     return mat
-def compute_uv_from_pmn(vert, p, m, n):
-    """Computes UV coordinates for a vertex based on PMN basis"""
-    f1 = m - p
-    f2 = n - p
-    det = f1.dot(f1) * f2.dot(f2) - f1.dot(f2)**2
-    if abs(det) < 1e-9:
-        return 0.0, 0.0
-   
-    inv_det = 1.0 / det
-    inv00 = f2.dot(f2) * inv_det
-    inv01 = -f1.dot(f2) * inv_det
-    inv10 = -f1.dot(f2) * inv_det
-    inv11 = f1.dot(f1) * inv_det
-   
-    d = vert - p
-    u = inv00 * d.dot(f1) + inv01 * d.dot(f2)
-    v = inv10 * d.dot(f1) + inv11 * d.dot(f2)
-    return u, v
+def get_color_material(hsl_value, alpha_byte):
+    """Returns the pooled color material for this HSL/alpha, creating it on first use"""
+    def build():
+        mat = create_material_from_hsl(hsl_value)
+        if alpha_byte < 255:
+            mat.name = f"RS_Color_{hsl_value}_Alpha_{alpha_byte}"
+            setup_material_alpha(mat, alpha_byte)
+        return mat
+    return material_pool.acquire('color317', hsl_value, alpha_byte, build)
+def get_texture_material(texture_id, alpha_byte):
+    """Returns the pooled texture material for this id/alpha, creating it on first use"""
+    def build():
+        mat = create_texture_material(texture_id)
+        if alpha_byte < 255:
+            mat.name = f"Texture_{texture_id}_Alpha_{alpha_byte}"
+            setup_material_alpha(mat, alpha_byte)
+        return mat
+    return material_pool.acquire('texture', texture_id, alpha_byte, build)
 # =============================================================================
 # 317/OSRS IMPORT 
 # =============================================================================
 def import_old_format(data, filepath):
     """Import 317/OSRS format models (decode1)"""
     print(" > Importing 317/OSRS format model...")
-    if len(data) < 18:
-        print("ERROR: File too small for 317/OSRS format.")
+    model = dat_decoder.decode_317(data, vectorized=USE_VECTORIZED_DECODER)
+    if model is None:
         return {'CANCELLED'}
-   
-    footer_data = data[-18:]
-    (num_vertices, num_faces, num_tex_triangles,
-     textured_flag, pri_flag, alpha_flag, tskin_flag, vskin_flag,
-     x_data_len, y_data_len, z_data_len, face_indices_len) = struct.unpack('>HHBBBBBBHHHH', footer_data)
-    # --- Calculate Offsets (Logic from codex.txt) ---
-    pos = 0
-    vert_dirs_offset = pos; pos += num_vertices
-    face_types_offset = pos; pos += num_faces
-    face_priorities_offset = pos
-    if pri_flag == 255: pos += num_faces
-    face_tskins_offset = pos
-    if tskin_flag == 1: pos += num_faces
-    face_textures_offset = pos # Corresponds to face types in unversioned skeletal
-    if textured_flag == 1: pos += num_faces
-    vertex_skins_offset = pos
-    if vskin_flag == 1: pos += num_vertices
-    alpha_data_offset = pos
-    if alpha_flag == 1: pos += num_faces
-    face_indices_offset = pos; pos += face_indices_len
-    face_colors_offset = pos; pos += num_faces * 2
-    texture_coords_offset = pos
-    if textured_flag == 1: pos += num_tex_triangles * 6
-    x_data_offset = pos; pos += x_data_len
-    y_data_offset = pos; pos += y_data_len
-    z_data_offset = pos
-   
-    # Read data sections using calculated offsets
-    vert_dirs_data = data[vert_dirs_offset:vert_dirs_offset + num_vertices]
-    face_types_data = data[face_types_offset:face_types_offset + num_faces]
-    face_priorities_data = data[face_priorities_offset:face_priorities_offset + num_faces] if pri_flag == 255 else b''
-    face_tskins_data = data[face_tskins_offset:face_tskins_offset + num_faces] if tskin_flag == 1 else b''
-    face_textures_data = data[face_textures_offset:face_textures_offset + num_faces] if textured_flag == 1 else b''
-    vertex_skins_data = data[vertex_skins_offset:vertex_skins_offset + num_vertices] if vskin_flag == 1 else b''
-    alpha_data = data[alpha_data_offset:alpha_data_offset + num_faces] if alpha_flag == 1 else b''
-    face_indices_data = data[face_indices_offset:face_indices_offset + face_indices_len]
-    face_colors_data = data[face_colors_offset:face_colors_offset + num_faces * 2]
-    texture_coords_data = data[texture_coords_offset:texture_coords_offset + num_tex_triangles * 6] if textured_flag == 1 else b''
-    x_data = data[x_data_offset:x_data_offset + x_data_len]
-    y_data = data[y_data_offset:y_data_offset + y_data_len]
-    z_data = data[z_data_offset:] # To the end
-   
-    # --- Unpack Vertices ---
-    vertices = []
-    last_x, last_y, last_z = 0, 0, 0
-    x_stream = DataStream(x_data); y_stream = DataStream(y_data); z_stream = DataStream(z_data)
-    for i in range(num_vertices):
-        flag = vert_dirs_data[i]
-        dx, dy, dz = 0, 0, 0
-        if flag & 1: dx = x_stream.unpack_smart_int()
-        if flag & 2: dy = y_stream.unpack_smart_int()
-        if flag & 4: dz = z_stream.unpack_smart_int()
-        last_x += dx; last_y += dy; last_z += dz
-        vertices.append((last_x, last_z, -last_y))
-    # --- Unpack Faces ---
-    faces = []
-    v1, v2, v3 = 0, 0, 0
-    indices_stream = DataStream(face_indices_data)
-    compress_stream = DataStream(face_types_data) # This is the compress type stream in this format
-    offset = 0
-    for i in range(num_faces):
-        opcode = compress_stream.read_byte()
-        if opcode == 1:
-            v1 = indices_stream.unpack_smart_int() + offset; offset = v1
-            v2 = indices_stream.unpack_smart_int() + offset; offset = v2
-            v3 = indices_stream.unpack_smart_int() + offset; offset = v3
-        elif opcode == 2:
-            v2 = v3
-            v3 = indices_stream.unpack_smart_int() + offset; offset = v3
-        elif opcode == 3:
-            v1 = v3
-            v3 = indices_stream.unpack_smart_int() + offset; offset = v3
-        elif opcode == 4:
-            tmp = v1; v1 = v2; v2 = tmp
-            v3 = indices_stream.unpack_smart_int() + offset; offset = v3
-       
-        v1 = max(0, min(v1, num_vertices-1)); v2 = max(0, min(v2, num_vertices-1)); v3 = max(0, min(v3, num_vertices-1))
-        faces.append((v1, v2, v3))
-   
-    # --- Process Face Data ---
-    face_colors = list(struct.unpack(f'>{num_faces}H', face_colors_data))
-    face_texture_ids = [-1] * num_faces
-    texture_coordinate_indices = [-1] * num_faces
-    if textured_flag == 1:
-        for i in range(num_faces):
-            flag = face_textures_data[i]
-            if flag & 2 == 2: # Is textured
-                face_texture_ids[i] = face_colors[i]
-                texture_coordinate_indices[i] = flag >> 2
-   
-    # --- Unpack Texture Triangles (PMN) ---
-    texture_triangles = []
-    if textured_flag == 1 and texture_coords_data:
-        tex_stream = DataStream(texture_coords_data)
-        for _ in range(num_tex_triangles):
-            p = tex_stream.read_unsigned_short(); m = tex_stream.read_unsigned_short(); n = tex_stream.read_unsigned_short()
-            texture_triangles.append((p, m, n))
-    has_priorities_to_process = (pri_flag == 255)
-   
-    return create_mesh_with_uvs(
-        vertices, faces, face_colors, face_texture_ids, texture_coordinate_indices, texture_triangles, filepath,
-        face_priorities_data, face_tskins_data, vertex_skins_data, alpha_data,
-        has_priorities_to_process, tskin_flag == 1, vskin_flag == 1, num_faces, num_vertices
-    )
+    return create_mesh_with_uvs(model, filepath)
 # =============================================================================
 # MESH CREATION (from merged create_mesh_with_uvs and create_rs_data_layers)
 # =============================================================================
-def create_mesh_with_uvs(vertices, faces, face_colors, face_texture_ids,
-                         texture_coordinate_indices, texture_triangles, filepath,
-                         face_priorities_data, face_tskins_data, vertex_skins_data, face_alphas_data,
-                         has_priorities, has_tskins, has_vskins, triangle_count, vertex_count):
-    """Create mesh with proper UV mapping using PMN method"""
+def create_mesh_with_uvs(model, filepath):
+    """Create mesh with proper UV mapping using PMN method from a decoded model"""
+    vertices = model.vertices.tolist()
+    faces = model.faces.tolist()
+    face_colors = model.face_colors.tolist()
+    face_texture_ids = model.face_texture_ids.tolist()
+    triangle_count = model.face_count
+
     model_name = os.path.splitext(os.path.basename(filepath))[0]
     mesh = bpy.data.meshes.new(name=f"{model_name}_mesh")
-    mesh.from_pydata(vertices, [], faces)
-    mesh.update()
+    mesh_builder.build_triangle_mesh(mesh, model.vertices, model.faces)
     obj = bpy.data.objects.new(name=model_name, object_data=mesh)
     bpy.context.collection.objects.link(obj)
     bpy.context.view_layer.objects.active = obj
     obj.select_set(True)
    
-    face_alphas = list(face_alphas_data) if face_alphas_data else [255] * triangle_count
+    face_alphas = model.alphas.tolist() if model.has_alphas else [255] * triangle_count
     # Create materials
     material_map = {}
     for i in range(min(triangle_count, len(faces))):
@@ -389,26 +240,21 @@ def create_mesh_with_uvs(vertices, faces, face_colors, face_texture_ids,
         if tex_id != -1:
             mat_key = ('tex', tex_id, alpha_val)
             if mat_key not in material_map:
-                mat = create_texture_material(tex_id)
-                if alpha_val < 255:
-                    setup_material_alpha(mat, alpha_val)
-                material_map[mat_key] = mat
+                material_map[mat_key] = get_texture_material(tex_id, alpha_val)
         else:
             hsl = face_colors[i] if i < len(face_colors) else 0
             mat_key = ('color', hsl, alpha_val)
             if mat_key not in material_map:
-                mat = create_material_from_hsl(hsl)
-                if alpha_val < 255:
-                    setup_material_alpha(mat, alpha_val)
-                material_map[mat_key] = mat
+                material_map[mat_key] = get_color_material(hsl, alpha_val)
     # Append materials to object and assign indices
     obj_mats = list(material_map.values())
     for mat in obj_mats:
         obj.data.materials.append(mat)
    
     mat_to_idx = {mat.name: i for i, mat in enumerate(obj.data.materials)}
+    face_material_indices = [0] * len(mesh.polygons)
     if mesh.polygons:
-        for i, poly in enumerate(mesh.polygons):
+        for i in range(len(face_material_indices)):
             alpha_val = face_alphas[i] if i < len(face_alphas) else 255
             tex_id = face_texture_ids[i] if i < len(face_texture_ids) else -1
             if tex_id != -1:
@@ -419,97 +265,55 @@ def create_mesh_with_uvs(vertices, faces, face_colors, face_texture_ids,
            
             mat = material_map.get(mat_key)
             if mat:
-                poly.material_index = mat_to_idx.get(mat.name, 0)
+                face_material_indices[i] = mat_to_idx.get(mat.name, 0)
+        mesh_builder.set_material_indices(mesh, face_material_indices)
    
-    # Create overlay color vertex layer (Note: This is no longer used by the shader but is preserved as data)
-    color_layer = mesh.vertex_colors.new(name="RSCOLOR")
-    for i, poly in enumerate(mesh.polygons):
-        if i < len(face_texture_ids) and face_texture_ids[i] != -1:
-            hsl = face_colors[i]
-            rgb = rune_hsl_to_rgb(hsl)
-            col = (*rgb, 1.0)
-        else:
-            col = (1.0, 1.0, 1.0, 1.0)
-        for loop_index in poly.loop_indices:
-            color_layer.data[loop_index].color = col
+    # Overlay tint: one color per face (textured faces take their HSL, others stay white)
+    face_rgba = np.ones((len(faces), 4), dtype=np.float32)
+    rgb_cache = {}
+    for i in np.flatnonzero(model.face_texture_ids != -1):
+        hsl = face_colors[i]
+        if hsl not in rgb_cache:
+            rgb_cache[hsl] = rune_hsl_to_rgb(hsl)
+        face_rgba[i, :3] = rgb_cache[hsl]
+    rs_layers.write_face_colors(mesh, rs_layers.COLOR_LAYER, face_rgba)
 
     # Create UV Map only if there are textured faces
-    has_textured_faces = any(face_texture_ids[i] != -1 for i in range(min(len(faces), len(face_texture_ids))))
-    textured_faces_count = 0
-    if has_textured_faces:
+    num_faces = min(len(faces), len(face_texture_ids))
+    textured = np.zeros(len(faces), dtype=bool)
+    textured[:num_faces] = model.face_texture_ids[:num_faces] != -1
+    if textured.any():
         uv_layer = mesh.uv_layers.new(name="UVMap")
-        for i, poly in enumerate(mesh.polygons):
-            if i < len(face_texture_ids) and face_texture_ids[i] != -1:
-                coord_index = texture_coordinate_indices[i] if i < len(texture_coordinate_indices) else -1
-               
-                use_fallback = coord_index == -1 or not (0 <= coord_index < len(texture_triangles))
-                if use_fallback:
-                    p_idx, m_idx, n_idx = faces[i] # Use face vertices as PMN
-                else:
-                    p_idx, m_idx, n_idx = texture_triangles[coord_index]
-                if all(0 <= idx < len(vertices) for idx in [p_idx, m_idx, n_idx]):
-                    p, m, n = Vector(vertices[p_idx]), Vector(vertices[m_idx]), Vector(vertices[n_idx])
-                    for loop_index in poly.loop_indices:
-                        vert_idx = mesh.loops[loop_index].vertex_index
-                        vert = Vector(vertices[vert_idx])
-                        u, v = compute_uv_from_pmn(vert, p, m, n)
-                        uv_layer.data[loop_index].uv = (u, 1.0 - v)
-                    textured_faces_count += 1
+        # PMN triangle per face: the texture triangle, or the face itself as fallback
+        coord = model.texture_coordinate_indices
+        has_coord = (coord >= 0) & (coord < len(model.texture_triangles))
+        pmn = model.faces.copy()
+        pmn[has_coord] = model.texture_triangles[coord[has_coord]]
+        # Faces with out-of-range PMN indices keep the default (0, 0)
+        solvable = textured & np.all((pmn >= 0) & (pmn < len(vertices)), axis=1)
+
+        loop_uvs = np.zeros((len(faces), 3, 2), dtype=np.float32)
+        uv = mesh_builder.solve_pmn_uvs(model.vertices, model.faces[solvable], pmn[solvable])
+        uv[..., 1] = 1.0 - uv[..., 1]
+        loop_uvs[solvable] = uv
+        mesh_builder.write_uv_layer(uv_layer, loop_uvs)
+        textured_faces_count = int(np.count_nonzero(solvable))
         print(f"Applied UVs to {textured_faces_count} faces.")
     else:
         print("No textured faces, skipping UV map creation.")
            
-    create_rs_data_layers(obj, mesh, face_priorities_data, face_tskins_data,
-                          vertex_skins_data, has_priorities, has_tskins, has_vskins,
-                          triangle_count, vertex_count)
+    create_rs_data_layers(obj, mesh, model)
     return {'FINISHED'}
-def create_rs_data_layers(obj, mesh, face_priorities_data, face_tskins_data,
-                          vertex_skins_data, has_priorities, has_tskins, has_vskins,
-                          num_faces, num_vertices):
+def create_rs_data_layers(obj, mesh, model):
     """Create RuneScape-specific data layers"""
-    if has_priorities and face_priorities_data:
-        pri_layer = mesh.vertex_colors.new(name="RSPRI")
-        for i, poly in enumerate(mesh.polygons):
-            if i < len(face_priorities_data):
-                color = (face_priorities_data[i] / 255.0, 0.0, 0.0, 1.0)
-                for loop_index in poly.loop_indices:
-                    pri_layer.data[loop_index].color = color
-    if has_tskins and face_tskins_data:
-        tskin_layer = mesh.vertex_colors.new(name="RSTSKIN")
-        for i, poly in enumerate(mesh.polygons):
-            if i < len(face_tskins_data):
-                color = (face_tskins_data[i] / 255.0, 0.0, 0.0, 1.0)
-                for loop_index in poly.loop_indices:
-                    tskin_layer.data[loop_index].color = color
-                   
-    if has_vskins and vertex_skins_data:
+    if model.has_priorities:
+        rs_layers.write_face_values(mesh, rs_layers.PRIORITY_LAYER, model.priorities)
+    if model.has_tskins:
+        rs_layers.write_face_values(mesh, rs_layers.TSKIN_LAYER, model.tskins)
+
+    if model.has_vskins:
         print(" > Creating VSKIN vertex groups...")
-        max_weight = max(vertex_skins_data) if vertex_skins_data else 0
-        max_total_weight = max_weight / 100.0
-       
-        vskin_groups = {}
-        if max_total_weight > 0.0:
-            vskin_groups[1] = obj.vertex_groups.new(name="VSKIN1:")
-        if max_total_weight > 1.0:
-            vskin_groups[2] = obj.vertex_groups.new(name="VSKIN2:")
-        if max_total_weight > 2.0:
-            vskin_groups[3] = obj.vertex_groups.new(name="VSKIN3:")
-       
-        for vertex_idx in range(min(num_vertices, len(vertex_skins_data))):
-            skin_value = vertex_skins_data[vertex_idx]
-            if skin_value > 0:
-                total_weight = skin_value / 100.0
-                w1 = min(1.0, total_weight)
-                remaining = total_weight - w1
-                w2 = min(1.0, remaining)
-                w3 = remaining - w2
-               
-                if 1 in vskin_groups and w1 > 0.001:
-                    vskin_groups[1].add([vertex_idx], w1, 'REPLACE')
-                if 2 in vskin_groups and w2 > 0.001:
-                    vskin_groups[2].add([vertex_idx], w2, 'REPLACE')
-                if 3 in vskin_groups and w3 > 0.001:
-                    vskin_groups[3].add([vertex_idx], w3, 'REPLACE')
+        mesh_builder.create_vskin_groups(obj, model.vskins)
 # =============================================================================
 # BLENDER OPERATOR (adjusted for 317)
 # =============================================================================
@@ -524,17 +328,57 @@ class Import317Model(Operator, ImportHelper):
     files: CollectionProperty(type=OperatorFileListElement, options={'HIDDEN', 'SKIP_SAVE'})
     directory: StringProperty(subtype='DIR_PATH')
    
+    use_parallel: BoolProperty(
+        name="Parallel Decode",
+        description="Decode multiple selected files in worker processes",
+        default=True,
+    )
+    worker_count: IntProperty(
+        name="Workers",
+        description="Number of decode processes (0 = one per CPU core)",
+        default=0,
+        min=0,
+        max=64,
+    )
+   
     def execute(self, context):
         if self.files:
-            for file_elem in self.files:
-                filepath = os.path.join(self.directory, file_elem.name)
-                with open(filepath, 'rb') as f:
-                    data = f.read()
-                import_old_format(data, filepath)
+            filepaths = [os.path.join(self.directory, file_elem.name) for file_elem in self.files]
         else:
-            with open(self.filepath, 'rb') as f:
+            filepaths = [self.filepath]
+
+        if len(filepaths) == 1:
+            with open(filepaths[0], 'rb') as f:
                 data = f.read()
-            import_old_format(data, self.filepath)
+            import_old_format(data, filepaths[0])
+            return {'FINISHED'}
+
+        # Decode in worker processes; meshes are built here as results arrive
+        wm = context.window_manager
+        wm.progress_begin(0, len(filepaths))
+        imported, failed = 0, 0
+        try:
+            for done, (filepath, model, error) in enumerate(
+                    import_pool.iter_decoded(filepaths, '317', self.use_parallel, self.worker_count, USE_VECTORIZED_DECODER), 1):
+                name = os.path.basename(filepath)
+                if error is not None:
+                    print(f"ERROR: Failed to decode {name}: {error}")
+                    failed += 1
+                elif model is None:
+                    print(f"ERROR: {name} is not a valid 317 model.")
+                    failed += 1
+                else:
+                    create_mesh_with_uvs(model, filepath)
+                    imported += 1
+                print(f" > [{done}/{len(filepaths)}] {name}")
+                wm.progress_update(done)
+        finally:
+            wm.progress_end()
+
+        if failed:
+            self.report({'WARNING'}, f"Imported {imported} models, {failed} failed (see console)")
+        else:
+            self.report({'INFO'}, f"Imported {imported} models")
         return {'FINISHED'}
 def menu_func_import_317(self, context):
     self.layout.operator(Import317Model.bl_idname, text="317/OSRS Model (.dat)")
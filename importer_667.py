@@ -2,75 +2,28 @@
 # Corrected to match robust material/UV handling from dat_importer.py
 
 import bpy
-import struct
 import os
 import math
 import colorsys
+import numpy as np
 from bpy_extras.io_utils import ImportHelper
-from bpy.props import StringProperty, CollectionProperty
+from bpy.props import StringProperty, CollectionProperty, BoolProperty, IntProperty
 from bpy.types import Operator, OperatorFileListElement
 from mathutils import Vector, Matrix
-
-# =============================================================================
-# DATA STREAM
-# =============================================================================
-class DataStream:
-    def __init__(self, data):
-        self.data = data
-        self.offset = 0
-    
-    def read_byte(self):
-        if self.offset >= len(self.data):
-            return 0
-        byte = self.data[self.offset]
-        self.offset += 1
-        return byte
-    
-    def read_signed_byte(self):
-        val = self.read_byte()
-        return val - 256 if val > 127 else val
-    
-    def read_unsigned_short(self):
-        if self.offset + 1 >= len(self.data):
-            return 0
-        value = struct.unpack('>H', self.data[self.offset:self.offset+2])[0]
-        self.offset += 2
-        return value
-    
-    def read_signed_short(self):
-        val = self.read_unsigned_short()
-        return val - 65536 if val > 32767 else val
-    
-    def unpack_smart_int(self):
-        byte1 = self.read_byte()
-        if (byte1 & 0x80) == 0:
-            return byte1 - 64
-        else:
-            byte2 = self.read_byte()
-            value = (byte1 << 8) | byte2
-            return value - 49152
-    
-    def remaining(self):
-        return len(self.data) - self.offset
-
-# =============================================================================
-# COMPLEX TEXTURE PARAMETERS
-# =============================================================================
-class ComplexTextureParams:
-    """Holds parameters for complex texture projections"""
-    def __init__(self):
-        self.scale_x = 128
-        self.scale_y = 128
-        self.scale_z = 128
-        self.rotation = 0
-        self.direction = 0
-        self.speed = 0
-        self.trans_u = 0
-        self.trans_v = 0
+from . import dat_decoder
+from . import import_pool
+from . import mesh_builder
+from . import rs_layers
+from . import material_pool
+from . import texture_index
 
 # =============================================================================
 # HELPER FUNCTIONS (Consistent with dat_importer.py)
 # =============================================================================
+def _latest_blender_version(root_index):
+    versions = sorted([d for d in root_index.filenames if os.path.isdir(os.path.join(root_index.path, d))], reverse=True)
+    return versions[0] if versions else "4.5"
+
 def get_texture_dump_path():
     """Finds the texture_dump folder relative to the Blender AppData location"""
     appdata = os.getenv('APPDATA')
@@ -78,29 +31,20 @@ def get_texture_dump_path():
         return ""
     # Try to find the latest Blender version folder
     blender_root = os.path.join(appdata, "Blender Foundation", "Blender")
-    if not os.path.exists(blender_root):
+    root_index = texture_index.get_directory_index(blender_root)
+    if root_index is None:
         return ""
-    versions = sorted([d for d in os.listdir(blender_root) if os.path.isdir(os.path.join(blender_root, d))], reverse=True)
-    blender_version = versions[0] if versions else "4.5"
+    # Newest version folder, re-resolved only when the Blender folder changes
+    blender_version = root_index.cached('latest_version', _latest_blender_version)
     path = os.path.join(appdata, "Blender Foundation", "Blender", blender_version, "scripts", "addons", "polyforge_mqo_exporter", "texture_dump")
     return path
 
 def find_texture_file(texture_id):
     """Finds the first matching texture file for a given ID"""
-    texture_dirs = [get_texture_dump_path(), os.path.join(get_texture_dump_path(), "667Tex")]
+    base_path = get_texture_dump_path()
+    texture_dirs = [base_path, os.path.join(base_path, "667Tex")]
     patterns = [str(texture_id), f"texture_{texture_id}", f"tex_{texture_id}", f"pmn_{texture_id}"]
-    supported_exts = ('.png', '.jpg', '.jpeg', '.tga', '.bmp')
-    for tex_dir in texture_dirs:
-        if not os.path.isdir(tex_dir):
-            continue
-        for filename in os.listdir(tex_dir):
-            fn_lower = filename.lower()
-            name_part, ext_part = os.path.splitext(fn_lower)
-            if ext_part in supported_exts:
-                for pattern in patterns:
-                    if name_part == pattern.lower():
-                        return os.path.join(tex_dir, filename)
-    return None
+    return texture_index.find_texture_file(texture_id, texture_dirs, patterns)
 
 def setup_material_alpha(mat, alpha_byte):
     """Configures a material for alpha blending - CORRECTED from dat_importer.py"""
@@ -237,26 +181,29 @@ def create_texture_material(texture_id):
     
     return mat
 
+def get_color_material(hsl_value, alpha_byte):
+    """Returns the pooled color material for this HSL/alpha, creating it on first use"""
+    def build():
+        mat = create_material_from_hsl(hsl_value)
+        if alpha_byte < 255:
+            mat.name = f"RS_Color_{hsl_value}_Alpha_{alpha_byte}"
+            setup_material_alpha(mat, alpha_byte)
+        return mat
+    return material_pool.acquire('color667', hsl_value, alpha_byte, build)
+
+def get_texture_material(texture_id, alpha_byte):
+    """Returns the pooled texture material for this id/alpha, creating it on first use"""
+    def build():
+        mat = create_texture_material(texture_id)
+        if alpha_byte < 255:
+            mat.name = f"Texture_{texture_id}_Alpha_{alpha_byte}"
+            setup_material_alpha(mat, alpha_byte)
+        return mat
+    return material_pool.acquire('texture_tinted', texture_id, alpha_byte, build)
+
 # =============================================================================
 # UV COMPUTATION FUNCTIONS (from dat_importer.py)
 # =============================================================================
-def compute_uv_from_pmn(vert, p, m, n):
-    """Computes UV coordinates for a vertex based on PMN basis (Simple Texture)"""
-    f1 = m - p
-    f2 = n - p
-    det = f1.dot(f1) * f2.dot(f2) - f1.dot(f2)**2
-    if abs(det) < 1e-9:
-        return 0.0, 0.0
-    inv_det = 1.0 / det
-    inv00 = f2.dot(f2) * inv_det
-    inv01 = -f1.dot(f2) * inv_det
-    inv10 = -f1.dot(f2) * inv_det
-    inv11 = f1.dot(f1) * inv_det
-    d = vert - p
-    u = inv00 * d.dot(f1) + inv01 * d.dot(f2)
-    v = inv10 * d.dot(f1) + inv11 * d.dot(f2)
-    return u, v
-
 # DISABLED - Complex textures not working correctly yet (Preserved as placeholders)
 def compute_uv_cylindrical(vert, params):
     """Placeholder - returns 0,0 until fixed"""
@@ -276,218 +223,31 @@ def compute_uv_spherical(vert, params):
 def decode_667_format(data, filepath):
     """Decode 667 versioned format with complex texture support"""
     print("=== DECODING 667 VERSIONED FORMAT WITH COMPLEX TEXTURES ===")
-    if len(data) < 23:
+    model = dat_decoder.decode_667(data)
+    if model is None:
         return {'CANCELLED'}
-    
-    footer_start = len(data) - 23
-    footer_data = data[footer_start:footer_start + 21]
-    vertex_count = struct.unpack('>H', footer_data[0:2])[0]
-    triangle_count = struct.unpack('>H', footer_data[2:4])[0]
-    textured_triangle_count = footer_data[4]
-    footer_flags = footer_data[5]
-    triangle_priority_flag = footer_data[6]
-    triangle_alpha_flag = footer_data[7]
-    triangle_skin_flag = footer_data[8]
-    texture_flag = footer_data[9]
-    vertex_skin_flag = footer_data[10]
-    vertices_x_length = struct.unpack('>H', footer_data[11:13])[0]
-    vertices_y_length = struct.unpack('>H', footer_data[13:15])[0]
-    vertices_z_length = struct.unpack('>H', footer_data[15:17])[0]
-    triangle_indices_length = struct.unpack('>H', footer_data[17:19])[0]
-    texture_coord_indices_length = struct.unpack('>H', footer_data[19:21])[0]
-    
-    print(f"Vertices: {vertex_count}, Triangles: {triangle_count}, Textured: {textured_triangle_count}")
-    
-    # Read texture render types
-    render_type_stream = DataStream(data)
-    texture_render_types = [render_type_stream.read_byte() for _ in range(textured_triangle_count)]
-    
-    simple_texture_face_count = texture_render_types.count(0)
-    complex_texture_face_count = sum(1 for t in texture_render_types if t in [1, 2, 3])
-    cube_texture_face_count = texture_render_types.count(2)
-    
-    print(f"Texture types - Simple: {simple_texture_face_count}, Complex: {complex_texture_face_count}, Cube: {cube_texture_face_count}")
-    
-    # Calculate offsets
-    pos = textured_triangle_count
-    vertex_flags_offset = pos; pos += vertex_count
-    triangle_info_offset = pos
-    if footer_flags & 1 == 1: pos += triangle_count
-    triangle_indices_flags_offset = pos; pos += triangle_count
-    triangle_priorities_offset = pos
-    if triangle_priority_flag == 255: pos += triangle_count
-    triangle_skin_offset = pos
-    if triangle_skin_flag == 1: pos += triangle_count
-    vertex_skin_offset = pos
-    if vertex_skin_flag == 1: pos += vertex_count
-    triangle_alpha_offset = pos
-    if triangle_alpha_flag == 1: pos += triangle_count
-    triangle_indices_offset = pos; pos += triangle_indices_length
-    triangle_materials_offset = pos
-    if texture_flag == 1: pos += triangle_count * 2
-    texture_coordinate_indices_offset = pos; pos += texture_coord_indices_length
-    triangle_colors_offset = pos; pos += triangle_count * 2
-    vertices_x_offset = pos; pos += vertices_x_length
-    vertices_y_offset = pos; pos += vertices_y_length
-    vertices_z_offset = pos; pos += vertices_z_length
-    simple_textures_offset = pos; pos += simple_texture_face_count * 6
-    complex_textures_offset = pos; pos += complex_texture_face_count * 6
-    
-    # === START OF INEFFICIENT/COMPLEX TEXTURE READING BLOCK ===
-    # Reading complex texture parameters - matching exact game order
-    texture_bytes = 6 # Simplified default size
-    textures_scale_offset = pos; pos += complex_texture_face_count * texture_bytes # Reads Z, Speed, X
-    textures_rotation_offset = pos; pos += complex_texture_face_count
-    textures_direction_offset = pos; pos += complex_texture_face_count
-    textures_translation_offset = pos
-    
-    scale_stream = DataStream(data[textures_scale_offset:])
-    rot_stream = DataStream(data[textures_rotation_offset:])
-    dir_stream = DataStream(data[textures_direction_offset:])
-    trans_stream = DataStream(data[textures_translation_offset:])
-    
-    # Track which complex textures are cubes (need extra trans params)
-    cube_indices_in_complex_list = []
-    complex_counter = 0
-    for r_type in texture_render_types:
-        if r_type in [1, 2, 3]:
-            if r_type == 2:
-                cube_indices_in_complex_list.append(complex_counter)
-            complex_counter += 1
-    
-    complex_params = []
-    for i in range(complex_texture_face_count):
-        p = ComplexTextureParams()
-        # Scale buffer contains 3 values in order: Z, Speed, X
-        p.scale_z = scale_stream.read_unsigned_short()
-        p.speed = scale_stream.read_unsigned_short()
-        p.scale_x = scale_stream.read_unsigned_short()
-        # Single byte values
-        p.rotation = rot_stream.read_signed_byte()
-        p.scale_y = dir_stream.read_signed_byte()  # Actually used as direction/scale
-        p.direction = trans_stream.read_signed_byte()  # Base direction value
-        complex_params.append(p)
-    
-    # Cube textures read 2 additional translation bytes
-    for cube_idx in cube_indices_in_complex_list:
-        if cube_idx < len(complex_params):
-            complex_params[cube_idx].trans_u = trans_stream.read_signed_byte()
-            complex_params[cube_idx].trans_v = trans_stream.read_signed_byte()
-    # === END OF INEFFICIENT/COMPLEX TEXTURE READING BLOCK ===
-
-    # Read vertices
-    vertices = []
-    vertex_flags_data = data[vertex_flags_offset:vertex_flags_offset + vertex_count]
-    x_stream = DataStream(data[vertices_x_offset:vertices_x_offset + vertices_x_length])
-    y_stream = DataStream(data[vertices_y_offset:vertices_y_offset + vertices_y_length])
-    z_stream = DataStream(data[vertices_z_offset:vertices_z_offset + vertices_z_length])
-    start_x = start_y = start_z = 0
-    for vertex in range(vertex_count):
-        position_flag = vertex_flags_data[vertex] if vertex < len(vertex_flags_data) else 0
-        x_off = x_stream.unpack_smart_int() if (position_flag & 1) != 0 else 0
-        y_off = y_stream.unpack_smart_int() if (position_flag & 2) != 0 else 0
-        z_off = z_stream.unpack_smart_int() if (position_flag & 4) != 0 else 0
-        start_x += x_off
-        start_y += y_off
-        start_z += z_off
-        vertices.append((start_x, start_z, -start_y))
-
-    # Read faces
-    faces = []
-    indices_data = data[triangle_indices_offset:triangle_indices_offset + triangle_indices_length]
-    flags_data = data[triangle_indices_flags_offset:triangle_indices_flags_offset + triangle_count]
-    indices_stream = DataStream(indices_data)
-    a = b = c = 0
-    last = 0
-    for triangle_index in range(triangle_count):
-        opcode = flags_data[triangle_index] if triangle_index < len(flags_data) else 1
-        if opcode == 1:
-            a = indices_stream.unpack_smart_int() + last; last = a
-            b = indices_stream.unpack_smart_int() + last; last = b
-            c = indices_stream.unpack_smart_int() + last; last = c
-        elif opcode == 2:
-            b = c; c = indices_stream.unpack_smart_int() + last; last = c
-        elif opcode == 3:
-            a = c; c = indices_stream.unpack_smart_int() + last; last = c
-        elif opcode == 4:
-            tmp = a; a = b; b = tmp
-            c = indices_stream.unpack_smart_int() + last; last = c
-        a = max(0, min(a, vertex_count - 1))
-        b = max(0, min(b, vertex_count - 1))
-        c = max(0, min(c, vertex_count - 1))
-        faces.append((a, b, c))
-
-    # Read face colors
-    face_colors_data = data[triangle_colors_offset:triangle_colors_offset + triangle_count * 2]
-    face_colors = list(struct.unpack(f'>{triangle_count}H', face_colors_data[:triangle_count * 2]))
-
-    # Read texture IDs
-    face_texture_ids = [-1] * triangle_count
-    if texture_flag == 1:
-        material_data = data[triangle_materials_offset:triangle_materials_offset + triangle_count * 2]
-        for i in range(triangle_count):
-            if i * 2 + 2 <= len(material_data):
-                tex_id = struct.unpack('>H', material_data[i*2:(i+1)*2])[0] - 1
-                face_texture_ids[i] = tex_id
-
-    # Read texture coordinate indices
-    texture_coordinate_indices = [-1] * triangle_count
-    if texture_coord_indices_length > 0:
-        coord_data = data[texture_coordinate_indices_offset:texture_coordinate_indices_offset + texture_coord_indices_length]
-        coord_stream = DataStream(coord_data)
-        for i in range(triangle_count):
-            if face_texture_ids[i] != -1 and coord_stream.remaining() > 0:
-                coord_index = coord_stream.read_byte() - 1
-                texture_coordinate_indices[i] = coord_index
-
-    # Read texture triangles
-    texture_triangles = []
-    simple_stream = DataStream(data[simple_textures_offset:])
-    complex_stream = DataStream(data[complex_textures_offset:])
-    for i in range(textured_triangle_count):
-        render_type = texture_render_types[i]
-        if render_type == 0 and simple_stream.remaining() >= 6:
-            p = simple_stream.read_signed_short()
-            m = simple_stream.read_signed_short()
-            n = simple_stream.read_signed_short()
-            texture_triangles.append((p, m, n))
-        elif render_type in [1, 2, 3] and complex_stream.remaining() >= 6:
-            p = complex_stream.read_signed_short()
-            m = complex_stream.read_signed_short()
-            n = complex_stream.read_signed_short()
-            texture_triangles.append((p, m, n))
-        else:
-            texture_triangles.append((0, 0, 0))
-
-    # Read additional data
-    face_priorities_data = data[triangle_priorities_offset:triangle_priorities_offset + triangle_count] if triangle_priority_flag == 255 else b''
-    face_tskins_data = data[triangle_skin_offset:triangle_skin_offset + triangle_count] if triangle_skin_flag == 1 else b''
-    vertex_skins_data = data[vertex_skin_offset:vertex_skin_offset + vertex_count] if vertex_skin_flag == 1 else b''
-    face_alphas_data = data[triangle_alpha_offset:triangle_alpha_offset + triangle_count] if triangle_alpha_flag == 1 else b''
-    
-    return create_667_mesh(vertices, faces, face_colors, face_texture_ids,
-                           texture_coordinate_indices, texture_triangles, texture_render_types, complex_params, filepath,
-                           face_priorities_data, face_tskins_data, vertex_skins_data, face_alphas_data,
-                           triangle_priority_flag == 255, triangle_skin_flag == 1, 
-                           vertex_skin_flag == 1, triangle_count, vertex_count)
+    return create_667_mesh(model, filepath)
 
-def create_667_mesh(vertices, faces, face_colors, face_texture_ids,
-                    texture_coordinate_indices, texture_triangles, texture_render_types, complex_params, filepath,
-                    face_priorities_data, face_tskins_data, vertex_skins_data, face_alphas_data,
-                    has_priorities, has_tskins, has_vskins, triangle_count, vertex_count):
+def create_667_mesh(model, filepath):
     """Create mesh for 667 format with complex texture support - CORRECTED material/UV flow"""
+    vertices = model.vertices.tolist()
+    faces = model.faces.tolist()
+    face_colors = model.face_colors.tolist()
+    face_texture_ids = model.face_texture_ids.tolist()
+    complex_params = model.complex_params
+    triangle_count = model.face_count
+
     model_name = os.path.splitext(os.path.basename(filepath))[0]
     mesh = bpy.data.meshes.new(name=f"{model_name}_mesh")
-    mesh.from_pydata(vertices, [], faces)
-    mesh.update()
+    mesh_builder.build_triangle_mesh(mesh, model.vertices, model.faces)
     
     obj = bpy.data.objects.new(name=model_name, object_data=mesh)
     bpy.context.collection.objects.link(obj)
     bpy.context.view_layer.objects.active = obj
     obj.select_set(True)
     
-    if face_alphas_data:
-        face_alphas = list(face_alphas_data)
+    if model.has_alphas:
+        face_alphas = model.alphas.tolist()
     else:
         face_alphas = [255] * triangle_count
     
@@ -500,14 +260,10 @@ def create_667_mesh(vertices, faces, face_colors, face_texture_ids,
         
         if i < len(face_texture_ids) and face_texture_ids[i] != -1:
             tex_id = face_texture_ids[i]
-            coord_index = texture_coordinate_indices[i] if i < len(texture_coordinate_indices) else -1
-            mat_key = ('tex', tex_id, coord_index, alpha_val)
+            mat_key = ('tex', tex_id, alpha_val)
             
             if mat_key not in material_map:
-                mat = create_texture_material(tex_id)
-                if alpha_val < 255 and len(face_alphas_data) > 0:
-                    mat.name = f"Texture_{tex_id}_Alpha_{alpha_val}"
-                    setup_material_alpha(mat, alpha_val)
+                mat = get_texture_material(tex_id, alpha_val)
                 material_map[mat_key] = len(obj.data.materials)
                 obj.data.materials.append(mat)
             face_material_indices[i] = material_map[mat_key]
@@ -515,152 +271,82 @@ def create_667_mesh(vertices, faces, face_colors, face_texture_ids,
             hsl = face_colors[i] if i < len(face_colors) else 0
             mat_key = ('color', hsl, alpha_val)
             if mat_key not in material_map:
-                mat = create_material_from_hsl(hsl)
-                if alpha_val < 255 and len(face_alphas_data) > 0:
-                    mat.name = f"RS_Color_{hsl}_Alpha_{alpha_val}"
-                    setup_material_alpha(mat, alpha_val)
+                mat = get_color_material(hsl, alpha_val)
                 material_map[mat_key] = len(obj.data.materials)
                 obj.data.materials.append(mat)
             face_material_indices[i] = material_map[mat_key]
     
-    if mesh.polygons:
-        for i, poly in enumerate(mesh.polygons):
-            if i < len(face_material_indices):
-                poly.material_index = face_material_indices[i]
+    mesh_builder.set_material_indices(mesh, face_material_indices)
     
-    # Create overlay color vertex layer for 667
-    print(" > Creating RSCOLOR vertex color layer for overlay...")
-    color_layer = mesh.vertex_colors.new(name="RSCOLOR")
-    for i, poly in enumerate(mesh.polygons):
-        if i < len(face_texture_ids) and face_texture_ids[i] != -1:
-            # Textured face: use the face HSL color as the tint (stored in face_colors[i])
-            hsl = face_colors[i] if i < len(face_colors) else 0
-            rgb = rune_hsl_to_rgb(hsl)
-            col = (*rgb, 1.0)
-        else:
-            # Non-textured face: no tint (white)
-            col = (1.0, 1.0, 1.0, 1.0)
-        for loop_index in poly.loop_indices:
-            color_layer.data[loop_index].color = col
+    # Create overlay color layer for 667
+    print(" > Creating RSCOLOR face color layer for overlay...")
+    face_rgba = np.ones((len(faces), 4), dtype=np.float32)
+    rgb_cache = {}
+    for i in np.flatnonzero(model.face_texture_ids != -1):
+        hsl = face_colors[i]
+        if hsl not in rgb_cache:
+            rgb_cache[hsl] = rune_hsl_to_rgb(hsl)
+        face_rgba[i, :3] = rgb_cache[hsl]
+    rs_layers.write_face_colors(mesh, rs_layers.COLOR_LAYER, face_rgba)
     
     # Create UV map with complex texture support
     print(" > Creating UV map with complex texture projection support...")
     uv_layer = mesh.uv_layers.new(name="UVMap")
-    textured_faces_count = 0
+    num_faces = min(triangle_count, len(faces))
+    loop_uvs = np.zeros((len(faces), 3, 2), dtype=np.float32)
+
+    # Textured faces without a usable coordinate index or PMN keep the (0, 0) fallback
+    coord = model.texture_coordinate_indices[:num_faces]
+    textured = np.zeros(len(faces), dtype=bool)
+    textured[:num_faces] = (model.face_texture_ids[:num_faces] != -1) & (coord >= 0) & (coord < len(model.texture_triangles))
+    pmn = np.zeros((len(faces), 3), dtype=np.int32)
+    render_types = np.zeros(len(faces), dtype=np.int32)
+    pmn[textured] = model.texture_triangles[model.texture_coordinate_indices[textured]]
+    render_types[textured] = model.texture_render_types[model.texture_coordinate_indices[textured]]
+    textured &= np.all((pmn >= 0) & (pmn < len(vertices)), axis=1)
+
+    # Simple textures (render type 0): batched PMN projection
+    simple = textured & (render_types == 0)
+    uv = mesh_builder.solve_pmn_uvs(model.vertices, model.faces[simple], pmn[simple])
+    uv[..., 1] = 1.0 - uv[..., 1]
+    loop_uvs[simple] = uv
+
+    # Other render types go through the (placeholder) complex projections
     complex_tex_params_used = 0
-    
-    for i, poly in enumerate(mesh.polygons):
-        if i >= min(triangle_count, len(faces)):
-            continue
-        
-        # This block correctly assigns UVs using the appropriate method.
-        if i < len(face_texture_ids) and face_texture_ids[i] != -1:
-            coord_index = texture_coordinate_indices[i] if i < len(texture_coordinate_indices) else -1
-            
-            if coord_index == -1 or coord_index >= len(texture_triangles):
-                # No UV coordinates provided - fallback to no UV
-                for loop_index in poly.loop_indices:
-                    uv_layer.data[loop_index].uv = (0.0, 0.0)
-                continue
-            
-            render_type = texture_render_types[coord_index] if coord_index < len(texture_render_types) else 0
-            
-            # Get texture parameters for complex types
-            params = None
-            if render_type in [1, 2, 3]:
-                if complex_tex_params_used < len(complex_params):
-                    params = complex_params[complex_tex_params_used]
-            
-            # Get PMN vertices (from texture_triangles for this coord_index)
-            p_idx, m_idx, n_idx = texture_triangles[coord_index]
-            if not all(0 <= idx < len(vertices) for idx in [p_idx, m_idx, n_idx]):
-                # Invalid PMN indices - fallback to no UV
-                for loop_index in poly.loop_indices:
-                    uv_layer.data[loop_index].uv = (0.0, 0.0)
-                continue
-            
-            p = Vector(vertices[p_idx])
-            m = Vector(vertices[m_idx])
-            n = Vector(vertices[n_idx])
-            
-            # Compute UVs for each vertex in the face
-            for loop_index in poly.loop_indices:
-                vert_idx = mesh.loops[loop_index].vertex_index
-                if 0 <= vert_idx < len(vertices):
-                    vert = Vector(vertices[vert_idx])
-                    normal = poly.normal
-                    u, v = 0.0, 0.0
-                    
-                    # Compute UV based on render type
-                    if render_type == 0:  # Simple texture (PMN)
-                        u, v = compute_uv_from_pmn(vert, p, m, n)
-                    elif params:
-                        # COMPLEX TYPE: This relies on the placeholder functions above
-                        if render_type == 1:  # Cylindrical
-                            u, v = compute_uv_cylindrical(vert, params.__dict__)
-                        elif render_type == 2:  # Cube
-                            u, v = compute_uv_cube(vert, normal, params.__dict__)
-                        elif render_type == 3:  # Spherical
-                            u, v = compute_uv_spherical(vert, params.__dict__)
-                    
-                    uv_layer.data[loop_index].uv = (u, 1.0 - v)
-            
-            textured_faces_count += 1
-            
-            # Increment complex params counter if we used one
-            if render_type in [1, 2, 3]:
-                complex_tex_params_used += 1
-        else:
-             # Non-textured face - no UV (0.0, 0.0) is the safe default
-            for loop_index in poly.loop_indices:
-                uv_layer.data[loop_index].uv = (0.0, 0.0)
-    
+    for i in np.flatnonzero(textured & (render_types != 0)):
+        render_type = render_types[i]
+        params = None
+        if render_type in [1, 2, 3]:
+            if complex_tex_params_used < len(complex_params):
+                params = complex_params[complex_tex_params_used]
+            complex_tex_params_used += 1
+
+        normal = mesh.polygons[i].normal
+        for corner, vert_idx in enumerate(faces[i]):
+            vert = Vector(vertices[vert_idx])
+            u, v = 0.0, 0.0
+            if params:
+                # COMPLEX TYPE: This relies on the placeholder functions above
+                if render_type == 1:  # Cylindrical
+                    u, v = compute_uv_cylindrical(vert, params.__dict__)
+                elif render_type == 2:  # Cube
+                    u, v = compute_uv_cube(vert, normal, params.__dict__)
+                elif render_type == 3:  # Spherical
+                    u, v = compute_uv_spherical(vert, params.__dict__)
+            loop_uvs[i, corner] = (u, 1.0 - v)
+
+    mesh_builder.write_uv_layer(uv_layer, loop_uvs)
+    textured_faces_count = int(np.count_nonzero(textured))
     print(f"Applied UVs to {textured_faces_count} textured faces")
     
     # Create RS data layers
-    if has_priorities and face_priorities_data:
-        pri_layer = mesh.vertex_colors.new(name="RSPRI")
-        for i, poly in enumerate(mesh.polygons):
-            if i < len(face_priorities_data):
-                color = (face_priorities_data[i] / 255.0, 0.0, 0.0, 1.0)
-                for loop_index in poly.loop_indices:
-                    pri_layer.data[loop_index].color = color
+    if model.has_priorities:
+        rs_layers.write_face_values(mesh, rs_layers.PRIORITY_LAYER, model.priorities)
+    if model.has_tskins:
+        rs_layers.write_face_values(mesh, rs_layers.TSKIN_LAYER, model.tskins)
     
-    if has_tskins and face_tskins_data:
-        tskin_layer = mesh.vertex_colors.new(name="RSTSKIN")
-        for i, poly in enumerate(mesh.polygons):
-            if i < len(face_tskins_data):
-                color = (face_tskins_data[i] / 255.0, 0.0, 0.0, 1.0)
-                for loop_index in poly.loop_indices:
-                    tskin_layer.data[loop_index].color = color
-    
-    if has_vskins and vertex_skins_data:
-        max_weight = max(vertex_skins_data) if vertex_skins_data else 0
-        max_total_weight = max_weight / 100.0
-        
-        vskin_groups = {}
-        if max_total_weight > 0.0:
-            vskin_groups[1] = obj.vertex_groups.new(name="VSKIN1:")
-        if max_total_weight > 1.0:
-            vskin_groups[2] = obj.vertex_groups.new(name="VSKIN2:")
-        if max_total_weight > 2.0:
-            vskin_groups[3] = obj.vertex_groups.new(name="VSKIN3:")
-        
-        for vertex_idx in range(min(vertex_count, len(vertex_skins_data))):
-            skin_value = vertex_skins_data[vertex_idx]
-            if skin_value > 0:
-                total_weight = skin_value / 100.0
-                w1 = min(1.0, total_weight)
-                remaining = total_weight - w1
-                w2 = min(1.0, remaining)
-                w3 = remaining - w2
-                
-                if 1 in vskin_groups and w1 > 0.001:
-                    vskin_groups[1].add([vertex_idx], w1, 'REPLACE')
-                if 2 in vskin_groups and w2 > 0.001:
-                    vskin_groups[2].add([vertex_idx], w2, 'REPLACE')
-                if 3 in vskin_groups and w3 > 0.001:
-                    vskin_groups[3].add([vertex_idx], w3, 'REPLACE')
+    if model.has_vskins:
+        mesh_builder.create_vskin_groups(obj, model.vskins)
     
     print(f"--- Successfully imported 667 model {model_name}.dat ---")
     return {'FINISHED'}
@@ -679,17 +365,57 @@ class Import667Model(Operator, ImportHelper):
     files: CollectionProperty(type=OperatorFileListElement, options={'HIDDEN', 'SKIP_SAVE'})
     directory: StringProperty(subtype='DIR_PATH')
     
+    use_parallel: BoolProperty(
+        name="Parallel Decode",
+        description="Decode multiple selected files in worker processes",
+        default=True,
+    )
+    worker_count: IntProperty(
+        name="Workers",
+        description="Number of decode processes (0 = one per CPU core)",
+        default=0,
+        min=0,
+        max=64,
+    )
+    
     def execute(self, context):
         if self.files:
-            for file_elem in self.files:
-                filepath = os.path.join(self.directory, file_elem.name)
-                with open(filepath, 'rb') as f:
-                    data = f.read()
-                decode_667_format(data, filepath)
+            filepaths = [os.path.join(self.directory, file_elem.name) for file_elem in self.files]
         else:
-            with open(self.filepath, 'rb') as f:
+            filepaths = [self.filepath]
+
+        if len(filepaths) == 1:
+            with open(filepaths[0], 'rb') as f:
                 data = f.read()
-            decode_667_format(data, self.filepath)
+            decode_667_format(data, filepaths[0])
+            return {'FINISHED'}
+
+        # Decode in worker processes; meshes are built here as results arrive
+        wm = context.window_manager
+        wm.progress_begin(0, len(filepaths))
+        imported, failed = 0, 0
+        try:
+            for done, (filepath, model, error) in enumerate(
+                    import_pool.iter_decoded(filepaths, '667', self.use_parallel, self.worker_count, True), 1):
+                name = os.path.basename(filepath)
+                if error is not None:
+                    print(f"ERROR: Failed to decode {name}: {error}")
+                    failed += 1
+                elif model is None:
+                    print(f"ERROR: {name} is not a valid 667 model.")
+                    failed += 1
+                else:
+                    create_667_mesh(model, filepath)
+                    imported += 1
+                print(f" > [{done}/{len(filepaths)}] {name}")
+                wm.progress_update(done)
+        finally:
+            wm.progress_end()
+
+        if failed:
+            self.report({'WARNING'}, f"Imported {imported} models, {failed} failed (see console)")
+        else:
+            self.report({'INFO'}, f"Imported {imported} models")
         return {'FINISHED'}
 
 def menu_func_import_667(self, context):
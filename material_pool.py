@@ -0,0 +1,77 @@
+# material_pool.py
+# Shared material registry for the 317 and 667 importers.
+#
+# Every pooled material carries its key in a custom property, so the pool
+# survives save/reload and is rebuilt from bpy.data whenever it goes stale.
+import bpy
+
+POOL_KEY_PROP = "rs_pool_key"
+
+# Pool key -> material name. Rebuilt from bpy.data on a stale/missed lookup.
+_pool = {}
+_scanned_material_count = -1
+
+def make_key(kind, ident, alpha):
+    """
+    Pool key for a material. `kind` is 'color317' / 'color667' (HSL, each
+    importer's own shader settings), 'texture' (317 texture graph) or
+    'texture_tinted' (667 texture graph with the RSCOLOR tint).
+    """
+    return f"{kind}:{ident}:{alpha}"
+
+def _rescan():
+    global _scanned_material_count
+    _pool.clear()
+    for mat in bpy.data.materials:
+        key = mat.get(POOL_KEY_PROP)
+        if key:
+            _pool[key] = mat.name
+    _scanned_material_count = len(bpy.data.materials)
+
+def _lookup(key):
+    name = _pool.get(key)
+    mat = bpy.data.materials.get(name) if name else None
+    if mat is not None and mat.get(POOL_KEY_PROP) == key:
+        return mat
+    # Stale entry or materials added/removed outside the pool
+    if name is not None or len(bpy.data.materials) != _scanned_material_count:
+        _rescan()
+        name = _pool.get(key)
+        mat = bpy.data.materials.get(name) if name else None
+    return mat
+
+def acquire(kind, ident, alpha, factory):
+    """Returns the pooled material for (kind, ident, alpha), building it with factory() on first use."""
+    global _scanned_material_count
+    key = make_key(kind, ident, alpha)
+    mat = _lookup(key)
+    if mat is None:
+        mat = factory()
+        mat[POOL_KEY_PROP] = key
+        _pool[key] = mat.name
+        _scanned_material_count = len(bpy.data.materials)
+    return mat
+
+def purge_orphans():
+    """Removes pooled materials that no longer have any users. Returns the count removed."""
+    orphans = [mat for mat in bpy.data.materials
+               if mat.get(POOL_KEY_PROP) and mat.users == 0]
+    for mat in orphans:
+        bpy.data.materials.remove(mat)
+    _rescan()
+    return len(orphans)
+
+class RSPS_OT_purge_material_pool(bpy.types.Operator):
+    """Remove imported RS materials that are no longer used by any object"""
+    bl_idname = "rsps.purge_material_pool"
+    bl_label = "Purge Unused RS Materials"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        removed = purge_orphans()
+        self.report({'INFO'}, f"Removed {removed} unused RS materials ({len(_pool)} pooled materials remain).")
+        return {'FINISHED'}
+
+classes = (
+    RSPS_OT_purge_material_pool,
+)
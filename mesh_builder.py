@@ -0,0 +1,125 @@
+# mesh_builder.py
+# Bulk mesh construction for the importers: flat NumPy arrays written with
+# foreach_set instead of from_pydata and per-polygon RNA loops.
+import numpy as np
+
+def _is_readonly(collection, prop_name):
+    prop = collection.bl_rna.properties.get(prop_name)
+    return prop is None or prop.is_readonly
+
+def build_triangle_mesh(mesh, vertices, faces):
+    """
+    Fills an empty mesh with triangles. `vertices` is (V, 3), `faces` is (F, 3).
+    Polygon i always owns loops 3i..3i+2 in face vertex order, same as from_pydata.
+    """
+    vertices = np.asarray(vertices, dtype=np.float32).reshape(-1, 3)
+    faces = np.asarray(faces, dtype=np.int32).reshape(-1, 3)
+
+    num_faces = len(faces)
+    mesh.vertices.add(len(vertices))
+    mesh.loops.add(num_faces * 3)
+    mesh.polygons.add(num_faces)
+
+    mesh.vertices.foreach_set('co', vertices.ravel())
+    mesh.loops.foreach_set('vertex_index', faces.ravel())
+    mesh.polygons.foreach_set('loop_start', np.arange(0, num_faces * 3, 3, dtype=np.int32))
+    # loop_total is derived from loop_start in newer Blender versions
+    if not _is_readonly(mesh.polygons, 'loop_total'):
+        mesh.polygons.foreach_set('loop_total', np.full(num_faces, 3, dtype=np.int32))
+
+    mesh.update(calc_edges=True)
+    return mesh
+
+def set_material_indices(mesh, material_indices):
+    """Assigns one material slot index per polygon in a single call."""
+    indices = np.asarray(material_indices, dtype=np.int32)
+    if len(indices) != len(mesh.polygons):
+        raise ValueError(f"got {len(indices)} material indices for {len(mesh.polygons)} polygons")
+    mesh.polygons.foreach_set('material_index', indices)
+
+# =============================================================================
+# BATCHED PMN UV SOLVER
+# =============================================================================
+def solve_pmn_uvs(vertices, faces, pmn_triangles):
+    """
+    Solves PMN texture coordinates for whole faces at once.
+
+    `faces` (K, 3) are the face vertex indices and `pmn_triangles` (K, 3) the
+    P, M, N vertex indices used for each face. Each distinct PMN triangle has its
+    2x2 Gram matrix inverted once; degenerate triangles map to (0, 0) like
+    compute_uv_from_pmn. Returns a (K, 3, 2) array of raw (u, v).
+    """
+    vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+    pmn_triangles = np.asarray(pmn_triangles, dtype=np.int64).reshape(-1, 3)
+    if len(faces) == 0:
+        return np.zeros((0, 3, 2), dtype=np.float64)
+
+    unique_pmn, inverse = np.unique(pmn_triangles, axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+
+    p = vertices[unique_pmn[:, 0]]
+    f1 = vertices[unique_pmn[:, 1]] - p
+    f2 = vertices[unique_pmn[:, 2]] - p
+    a = np.einsum('ij,ij->i', f1, f1)
+    b = np.einsum('ij,ij->i', f1, f2)
+    c = np.einsum('ij,ij->i', f2, f2)
+    det = a * c - b * b
+
+    valid = np.abs(det) >= 1e-9
+    inv_det = np.zeros_like(det)
+    inv_det[valid] = 1.0 / det[valid]
+    inv00 = c * inv_det
+    inv01 = -b * inv_det
+    inv11 = a * inv_det
+
+    # Per-loop projections onto the face's PMN basis
+    d = vertices[faces] - p[inverse][:, None, :]
+    d1 = np.einsum('kij,kj->ki', d, f1[inverse])
+    d2 = np.einsum('kij,kj->ki', d, f2[inverse])
+    u = inv00[inverse][:, None] * d1 + inv01[inverse][:, None] * d2
+    v = inv01[inverse][:, None] * d1 + inv11[inverse][:, None] * d2
+    return np.stack((u, v), axis=-1)
+
+def write_uv_layer(uv_layer, loop_uvs):
+    """Writes one UV pair per loop with a single foreach_set."""
+    uv_layer.data.foreach_set('uv', np.asarray(loop_uvs, dtype=np.float32).ravel())
+
+# =============================================================================
+# VSKIN VERTEX GROUPS
+# =============================================================================
+def create_vskin_groups(obj, vertex_skins):
+    """
+    Creates the VSKIN1:/VSKIN2:/VSKIN3: groups from per-vertex skin bytes.
+    A skin value of N splits N / 100 across the groups, 1.0 per group. Vertices
+    sharing a weight are added with one vertex_groups.add call.
+    """
+    skins = np.asarray(vertex_skins, dtype=np.float64)
+    if len(skins) == 0:
+        return {}
+    max_total_weight = skins.max() / 100.0
+
+    vskin_groups = {}
+    if max_total_weight > 0.0:
+        vskin_groups[1] = obj.vertex_groups.new(name="VSKIN1:")
+    if max_total_weight > 1.0:
+        vskin_groups[2] = obj.vertex_groups.new(name="VSKIN2:")
+    if max_total_weight > 2.0:
+        vskin_groups[3] = obj.vertex_groups.new(name="VSKIN3:")
+
+    total_weight = skins / 100.0
+    w1 = np.minimum(1.0, total_weight)
+    remaining = total_weight - w1
+    w2 = np.minimum(1.0, remaining)
+    w3 = remaining - w2
+    skinned = skins > 0
+
+    for group_number, weights in ((1, w1), (2, w2), (3, w3)):
+        group = vskin_groups.get(group_number)
+        if group is None:
+            continue
+        selected = skinned & (weights > 0.001)
+        for weight in np.unique(weights[selected]):
+            indices = np.flatnonzero(selected & (weights == weight))
+            group.add(indices.tolist(), float(weight), 'REPLACE')
+    return vskin_groups
@@ -0,0 +1,83 @@
+# mesh_revision.py
+# Per-object geometry revision counters for caches that must not outlive an edit.
+#
+# A depsgraph_update_post handler bumps an object's counter whenever the
+# depsgraph reports a geometry update for it or for its mesh (edit mode,
+# weight paint, modifiers, ...). Caches key their entries on revision(obj)
+# instead of re-reading or hashing the mesh every time.
+#
+# shape_revision(obj) is a second counter that skips updates announced with
+# mark_value_edit(): edits that only changed attribute values, which caches
+# of positions and topology can patch in place instead of rebuilding.
+import bpy
+from bpy.app.handlers import persistent
+
+# id pointer -> revision
+_revisions = {}
+# id pointer -> revision, not bumped by value-only edits
+_shape_revisions = {}
+# Pointers whose next geometry update only changed attribute values
+_value_edits = set()
+# Bumped on file load, so keys taken before the load can never match again
+_generation = 0
+
+def _bump(id_block):
+    key = id_block.as_pointer()
+    _revisions[key] = _revisions.get(key, 0) + 1
+    if key not in _value_edits:
+        _shape_revisions[key] = _shape_revisions.get(key, 0) + 1
+
+def revision(obj):
+    """Changes whenever the object's or its mesh's geometry was updated."""
+    obj_revision = _revisions.get(obj.as_pointer(), 0)
+    data = getattr(obj, "data", None)
+    data_revision = _revisions.get(data.as_pointer(), 0) if data is not None else 0
+    return (_generation, obj_revision, data_revision)
+
+def shape_revision(obj):
+    """Like revision(), but unchanged by edits announced with mark_value_edit()."""
+    obj_revision = _shape_revisions.get(obj.as_pointer(), 0)
+    data = getattr(obj, "data", None)
+    data_revision = _shape_revisions.get(data.as_pointer(), 0) if data is not None else 0
+    return (_generation, obj_revision, data_revision)
+
+def mark_value_edit(obj):
+    """
+    Announces that the next depsgraph update of `obj` only changes attribute
+    values (e.g. RSPRI on some faces), not positions or topology.
+    """
+    _value_edits.add(obj.as_pointer())
+    data = getattr(obj, "data", None)
+    if data is not None:
+        _value_edits.add(data.as_pointer())
+
+@persistent
+def revision_depsgraph_handler(scene, depsgraph):
+    for update in depsgraph.updates:
+        if update.is_updated_geometry:
+            _bump(update.id.original)
+    _value_edits.clear()
+
+@persistent
+def revision_load_handler(*args):
+    # Pointers are not stable across file loads
+    global _generation
+    _generation += 1
+    _revisions.clear()
+    _shape_revisions.clear()
+    _value_edits.clear()
+
+def register_handlers():
+    if revision_depsgraph_handler not in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.append(revision_depsgraph_handler)
+    if revision_load_handler not in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.append(revision_load_handler)
+
+def unregister_handlers():
+    if revision_depsgraph_handler in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(revision_depsgraph_handler)
+    if revision_load_handler in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(revision_load_handler)
+    _revisions.clear()
+    _shape_revisions.clear()
+    _value_edits.clear()
@@ -0,0 +1,146 @@
+# overlay_manager.py
+# Single pair of viewport draw handlers for all RS overlays (priorities, TSKINs, weights).
+#
+# Each redraw of a 3D view builds one FrameState (selected meshes, view
+# matrices) in the POST_VIEW pass, and the POST_PIXEL pass of the same region
+# reuses it. Every enabled overlay is then dispatched with that state and timed,
+# so adding overlays never repeats the per-frame setup.
+import bpy
+import blf
+import time
+import traceback
+from bpy.app.handlers import persistent
+from . import overlays
+from . import priorities
+from . import tskins
+from . import weighter
+
+class FrameState:
+    """Everything overlays share during one redraw of one region."""
+    def __init__(self, context):
+        self.context = context
+        self.scene = context.scene
+        self.region = context.region
+        self.region_pointer = self.region.as_pointer() if self.region is not None else 0
+        self.selected_meshes = [obj for obj in context.selected_objects if obj.type == 'MESH']
+        rv3d = context.region_data
+        self.view = overlays.ViewState(self.region, rv3d) if self.region is not None and rv3d is not None else None
+
+# Weight of the newest frame in each overlay's smoothed draw time
+SMOOTHING = 0.1
+
+class Overlay:
+    """One overlay: when it is enabled and what it draws in each pass."""
+    def __init__(self, name, enabled, draw_view=None, draw_pixel=None):
+        self.name = name
+        self.enabled = enabled          # enabled(scene) -> bool
+        self.draw_view = draw_view      # draw_view(frame), 3D space (POST_VIEW)
+        self.draw_pixel = draw_pixel    # draw_pixel(frame), region pixels (POST_PIXEL)
+        self.frame_ms = 0.0             # Smoothed time of both passes per frame
+        self._pass_ms = 0.0
+
+    def run(self, draw, frame):
+        start = time.perf_counter()
+        try:
+            draw(frame)
+        except Exception as e:
+            print(f"ERROR in {self.name} overlay: {e}")
+            traceback.print_exc()
+        self._pass_ms += (time.perf_counter() - start) * 1000.0
+
+    def end_frame(self):
+        self.frame_ms = self.frame_ms * (1.0 - SMOOTHING) + self._pass_ms * SMOOTHING
+        self._pass_ms = 0.0
+
+# Drawn in this order: face overlays first, weight points on top
+OVERLAYS = (
+    Overlay("Priority", priorities.priority_overlay_enabled,
+            priorities.draw_priority_overlay, priorities.draw_priority_text),
+    Overlay("TSKIN", tskins.tskin_overlay_enabled,
+            tskins.draw_tskin_overlay, tskins.draw_tskin_text),
+    Overlay("Weights", weighter.weight_overlay_enabled,
+            weighter.draw_weight_overlay, weighter.draw_weight_text),
+)
+
+# FrameState built by the last POST_VIEW pass, consumed by the POST_PIXEL pass
+_frame = None
+
+def _active_overlays(scene):
+    return [overlay for overlay in OVERLAYS if overlay.enabled(scene)]
+
+def draw_view_handler():
+    global _frame
+    context = bpy.context
+    _frame = None
+    active = _active_overlays(context.scene)
+    if not active:
+        return
+
+    frame = FrameState(context)
+    _frame = frame
+    if not frame.selected_meshes:
+        return
+    for overlay in active:
+        if overlay.draw_view is not None:
+            overlay.run(overlay.draw_view, frame)
+
+def draw_pixel_handler():
+    global _frame
+    context = bpy.context
+    frame, _frame = _frame, None
+    active = _active_overlays(context.scene)
+    if not active:
+        return
+
+    region = context.region
+    if frame is None or region is None or frame.region_pointer != region.as_pointer():
+        frame = FrameState(context)
+    if frame.selected_meshes:
+        for overlay in active:
+            if overlay.draw_pixel is not None:
+                overlay.run(overlay.draw_pixel, frame)
+    for overlay in active:
+        overlay.end_frame()
+
+    if getattr(context.scene, 'rsps_show_overlay_stats', False):
+        draw_overlay_stats(active)
+
+def draw_overlay_stats(active):
+    """Lists the smoothed per-frame draw time of each active overlay in the viewport corner."""
+    font_id = 0
+    blf.size(font_id, 12)
+    blf.color(font_id, 1.0, 1.0, 1.0, 0.9)
+    y = 20
+    for overlay in reversed(active):
+        blf.position(font_id, 20, y, 0)
+        blf.draw(font_id, f"{overlay.name}: {overlay.frame_ms:.2f} ms")
+        y += 16
+    blf.position(font_id, 20, y, 0)
+    blf.draw(font_id, f"RS overlays: {sum(overlay.frame_ms for overlay in active):.2f} ms")
+
+@persistent
+def overlay_load_handler(*args):
+    # Cached batches belong to the previous file's meshes
+    global _frame
+    _frame = None
+    overlays.clear_cache()
+
+_handlers = []
+
+def register_handlers():
+    if _handlers:
+        return
+    _handlers.append(bpy.types.SpaceView3D.draw_handler_add(draw_view_handler, (), 'WINDOW', 'POST_VIEW'))
+    _handlers.append(bpy.types.SpaceView3D.draw_handler_add(draw_pixel_handler, (), 'WINDOW', 'POST_PIXEL'))
+    if overlay_load_handler not in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.append(overlay_load_handler)
+
+def unregister_handlers():
+    global _frame
+    for handler in _handlers:
+        bpy.types.SpaceView3D.draw_handler_remove(handler, 'WINDOW')
+    _handlers.clear()
+    if overlay_load_handler in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(overlay_load_handler)
+    _frame = None
+    overlays.clear_cache()
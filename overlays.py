@@ -0,0 +1,470 @@
+# overlays.py
+# Cached GPU batches and text labels for the per-face RS data overlays (priorities,
+# TSKINs) and the per-vertex VSKIN weight heatmap.
+#
+# Batches are built once per object, layer and mesh revision in object space,
+# then redrawn every frame under the object's world matrix via the GPU matrix
+# stack. Moving or rotating the object never rebuilds them; editing the mesh
+# does (see mesh_revision). Labels reuse cached face centres and normals and
+# are projected, culled and decluttered in bulk each frame.
+#
+# Objects in edit mode are read from their edit bmesh instead of the stale
+# mesh data. Painting values there patches the cached face values and
+# re-uploads only the index buffers of the values that changed.
+import gpu
+import blf
+import bmesh
+import numpy as np
+from gpu_extras.batch import batch_for_shader
+from . import rs_layers
+from . import mesh_revision
+from . import dat_exporter
+
+def fan_triangles(mesh):
+    """
+    Fan-triangulates every polygon of `mesh` (v0, vi, vi+1).
+    Returns ((T, 3) vertex indices, (T,) polygon index of each triangle).
+    """
+    num_polys = len(mesh.polygons)
+    loop_starts = np.zeros(num_polys, dtype=np.int64)
+    loop_totals = np.zeros(num_polys, dtype=np.int64)
+    mesh.polygons.foreach_get('loop_start', loop_starts)
+    mesh.polygons.foreach_get('loop_total', loop_totals)
+    loop_verts = np.zeros(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get('vertex_index', loop_verts)
+
+    tri_counts = np.maximum(loop_totals - 2, 0)
+    tri_polys = np.repeat(np.arange(num_polys), tri_counts)
+    # Position of each triangle inside its polygon's fan: 0, 1, 2, ...
+    fan_offsets = np.arange(len(tri_polys)) - np.repeat(np.cumsum(tri_counts) - tri_counts, tri_counts)
+    starts = loop_starts[tri_polys]
+    tris = np.stack([loop_verts[starts],
+                     loop_verts[starts + fan_offsets + 1],
+                     loop_verts[starts + fan_offsets + 2]], axis=1)
+    return tris.astype(np.int32), tri_polys
+
+class FaceValueBatches:
+    """Object-space triangle batches of one mesh, grouped by a per-face layer value."""
+    def __init__(self, key, batches):
+        self.key = key
+        self.batches = batches  # [(value, GPUBatch)], ascending by value
+
+# (object pointer, layer name) -> FaceValueBatches
+_batch_cache = {}
+
+def _cache_key(obj, layer_name):
+    mesh = obj.data
+    return (mesh.as_pointer(), mesh_revision.revision(obj), len(mesh.vertices), len(mesh.polygons),
+            rs_layers.has_face_layer(mesh, layer_name))
+
+def _build_batches(obj, layer_name, shader):
+    mesh = obj.data
+    face_values = rs_layers.read_face_values(mesh, layer_name)
+    if face_values is None or len(face_values) == 0:
+        return []
+
+    coords = np.zeros(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get('co', coords)
+    coords = coords.reshape(-1, 3)
+    tris, tri_polys = fan_triangles(mesh)
+    tri_values = face_values[tri_polys]
+
+    batches = []
+    for value in np.unique(tri_values).tolist():
+        indices = np.ascontiguousarray(tris[tri_values == value])
+        batches.append((value, batch_for_shader(shader, 'TRIS', {"pos": coords}, indices=indices)))
+    return batches
+
+def face_value_batches(obj, layer_name, shader):
+    """[(value, batch)] for the object's layer, rebuilt only when its mesh changed."""
+    if obj.mode == 'EDIT':
+        return edit_face_state(obj, layer_name).batch_list()
+    cache_id = (obj.as_pointer(), layer_name)
+    key = _cache_key(obj, layer_name)
+    entry = _batch_cache.get(cache_id)
+    if entry is None or entry.key != key:
+        entry = _batch_cache[cache_id] = FaceValueBatches(key, _build_batches(obj, layer_name, shader))
+    return entry.batches
+
+def draw_face_value_overlay(objects, layer_name, colors, alpha):
+    """
+    Draws every object's face-value batches in flat colors, lower values first
+    across all objects, each under its object's world matrix.
+    """
+    shader = gpu.shader.from_builtin('UNIFORM_COLOR')
+    draws = []
+    for obj in objects:
+        for value, batch in face_value_batches(obj, layer_name, shader):
+            draws.append((value, obj, batch))
+    draws.sort(key=lambda item: item[0])
+    _prune({(obj.as_pointer(), layer_name) for obj in objects})
+
+    shader.bind()
+    for value, obj, batch in draws:
+        color = colors[value % len(colors)]
+        shader.uniform_float("color", (*color[:3], alpha))
+        with gpu.matrix.push_pop():
+            gpu.matrix.multiply_matrix(obj.matrix_world)
+            batch.draw(shader)
+    return len(draws)
+
+MAX_CACHED_MESHES = 64
+
+def _prune(in_use, caches=None, same_layer_only=True):
+    """
+    Forgets data of objects that are no longer drawn once a cache grows large.
+    Only entries of the layers in `in_use` are dropped, so the priority and
+    TSKIN overlays never evict each other's entries.
+    """
+    layers = {cache_id[1] for cache_id in in_use}
+    for cache in caches or (_batch_cache, _label_cache, _edit_cache):
+        if len(cache) > MAX_CACHED_MESHES:
+            for cache_id in [cache_id for cache_id in cache
+                             if cache_id not in in_use and (cache_id[1] in layers or not same_layer_only)]:
+                del cache[cache_id]
+
+def clear_cache():
+    """Drops all cached batches and label data (on file load and add-on unregister)."""
+    _batch_cache.clear()
+    _label_cache.clear()
+    _weight_cache.clear()
+    _edit_cache.clear()
+
+# =============================================================================
+# TEXT LABELS
+# =============================================================================
+class FaceLabelData:
+    """Object-space centre, normal and layer value of every face."""
+    def __init__(self, key, centers, normals, values):
+        self.key = key
+        self.centers = centers
+        self.normals = normals
+        self.values = values
+
+# (object pointer, layer name) -> FaceLabelData
+_label_cache = {}
+
+def _build_label_data(obj, layer_name, key):
+    mesh = obj.data
+    values = rs_layers.read_face_values(mesh, layer_name)
+    if values is None:
+        return FaceLabelData(key, np.zeros((0, 3)), np.zeros((0, 3)), np.zeros(0, dtype=np.int32))
+
+    num_polys = len(mesh.polygons)
+    # Median of the face's vertices, like BMFace.calc_center_median()
+    centers = np.zeros(num_polys * 3, dtype=np.float32)
+    mesh.polygons.foreach_get('center', centers)
+    normals = np.zeros(num_polys * 3, dtype=np.float32)
+    mesh.polygons.foreach_get('normal', normals)
+    return FaceLabelData(key, centers.reshape(-1, 3).astype(np.float64),
+                         normals.reshape(-1, 3).astype(np.float64), values)
+
+def face_label_data(obj, layer_name):
+    if obj.mode == 'EDIT':
+        return edit_face_state(obj, layer_name).label_data
+    cache_id = (obj.as_pointer(), layer_name)
+    key = _cache_key(obj, layer_name)
+    entry = _label_cache.get(cache_id)
+    if entry is None or entry.key != key:
+        entry = _label_cache[cache_id] = _build_label_data(obj, layer_name, key)
+    return entry
+
+class ViewState:
+    """Region size and view matrices of one viewport redraw, read once as NumPy arrays."""
+    def __init__(self, region, rv3d):
+        self.region = region
+        self.rv3d = rv3d
+        self.width = region.width
+        self.height = region.height
+        self.perspective = np.array(rv3d.perspective_matrix, dtype=np.float64)
+        self.view_inverse = np.array(rv3d.view_matrix.inverted(), dtype=np.float64)
+        self.is_perspective = rv3d.is_perspective
+
+def project_points(points, matrix_world, view):
+    """
+    Projects object-space points to region pixels in one pass.
+    Returns (world positions (N, 3), screen xy (N, 2), clip w (N,), mask of
+    points in front of the view and inside the region).
+    """
+    model = np.array(matrix_world, dtype=np.float64)
+    persp = view.perspective
+    world = points @ model[:3, :3].T + model[:3, 3]
+    clip = world @ persp[:, :3].T + persp[:, 3]
+    w = clip[:, 3]
+    visible = w > 1e-6
+
+    safe_w = np.where(visible, w, 1.0)
+    half_w, half_h = view.width / 2.0, view.height / 2.0
+    xy = np.stack([half_w + half_w * clip[:, 0] / safe_w,
+                   half_h + half_h * clip[:, 1] / safe_w], axis=1)
+    visible &= (xy[:, 0] >= 0) & (xy[:, 0] < view.width) & (xy[:, 1] >= 0) & (xy[:, 1] < view.height)
+    return world, xy, w, visible
+
+def project_labels(data, matrix_world, view):
+    """
+    Projects face centres to region pixels and culls faces that are behind the
+    view, outside the region or facing away.
+    Returns (screen xy (K, 2), depth (K,), values (K,)).
+    """
+    if len(data.values) == 0:
+        return np.zeros((0, 2)), np.zeros(0), data.values
+
+    world, xy, w, visible = project_points(data.centers, matrix_world, view)
+
+    # Back faces: world normals via the inverse transpose, against the eye direction.
+    # A zero-scaled object has no inverse; draw its labels without culling.
+    model = np.array(matrix_world, dtype=np.float64)
+    if abs(np.linalg.det(model[:3, :3])) > 1e-12:
+        normal_matrix = np.linalg.inv(model[:3, :3]).T
+        normals = data.normals @ normal_matrix.T
+        if view.is_perspective:
+            to_face = world - view.view_inverse[:3, 3]
+        else:
+            to_face = np.broadcast_to(-view.view_inverse[:3, 2], world.shape)
+        visible &= np.einsum('ij,ij->i', normals, to_face) < 0.0
+    return xy[visible], w[visible], data.values[visible]
+
+def declutter(xy, depth, cell_size, budget):
+    """
+    Keeps at most one label per `cell_size` pixel grid cell (the nearest one)
+    and at most `budget` labels overall, nearest first. Returns kept indices.
+    """
+    if len(xy) == 0:
+        return np.zeros(0, dtype=np.int64)
+    order = np.argsort(depth, kind='stable')
+    cells = np.floor(xy[order] / cell_size).astype(np.int64)
+    cell_ids = cells[:, 0] * 1000003 + cells[:, 1]
+    _, first = np.unique(cell_ids, return_index=True)
+    kept = order[np.sort(first)]
+    return kept[:budget]
+
+def draw_face_value_labels(view, objects, layer_name, font_size, budget, skip_zero=False, x_offset=0):
+    """Draws decluttered value labels on the visible faces of `objects`. Returns the number drawn."""
+    all_xy, all_depth, all_values = [], [], []
+    for obj in objects:
+        xy, depth, values = project_labels(face_label_data(obj, layer_name), obj.matrix_world, view)
+        if skip_zero:
+            nonzero = values != 0
+            xy, depth, values = xy[nonzero], depth[nonzero], values[nonzero]
+        all_xy.append(xy)
+        all_depth.append(depth)
+        all_values.append(values)
+    if not all_xy:
+        return 0
+
+    _prune({(obj.as_pointer(), layer_name) for obj in objects})
+
+    xy = np.concatenate(all_xy)
+    depth = np.concatenate(all_depth)
+    values = np.concatenate(all_values)
+    kept = declutter(xy, depth, cell_size=max(8, font_size * 2), budget=budget)
+
+    font_id = 0
+    blf.size(font_id, font_size)
+    blf.color(font_id, 1.0, 1.0, 1.0, 1.0)
+    for (x, y), value in zip(xy[kept].tolist(), values[kept].tolist()):
+        blf.position(font_id, x + x_offset, y, 0)
+        blf.draw(font_id, str(value))
+    return len(kept)
+
+# =============================================================================
+# VERTEX WEIGHT HEATMAP
+# =============================================================================
+WEIGHT_EPSILON = 0.001
+
+class VertexWeightData:
+    """Object-space position and weight of every visible vertex weighted in one group."""
+    def __init__(self, key, coords, weights):
+        self.key = key
+        self.coords = coords    # (K, 3) float32
+        self.weights = weights  # (K,) float32
+        self._batch = None
+
+    def batch(self, shader):
+        """Point batch colored by weight, built on first draw."""
+        if self._batch is None:
+            self._batch = batch_for_shader(shader, 'POINTS', {"pos": self.coords, "color": weight_colors(self.weights)})
+        return self._batch
+
+def weight_colors(weights):
+    """RGBA per weight on a blue (0) - green (0.5) - red (1) ramp."""
+    w = np.clip(np.asarray(weights, dtype=np.float32), 0.0, 1.0)
+    red = np.clip(2.0 * w - 1.0, 0.0, 1.0)
+    blue = np.clip(1.0 - 2.0 * w, 0.0, 1.0)
+    return np.stack([red, 1.0 - red - blue, blue, np.ones_like(w)], axis=1).astype(np.float32)
+
+# (object pointer, group index) -> VertexWeightData
+_weight_cache = {}
+
+def _build_weight_data(obj, group_index, key):
+    mesh = obj.data
+    num_vertices = len(mesh.vertices)
+    vertex_indices, group_indices, weights = dat_exporter.read_deform_weights(mesh)
+    in_group = group_indices == group_index
+    vertex_weights = np.zeros(num_vertices, dtype=np.float32)
+    vertex_weights[vertex_indices[in_group]] = weights[in_group]
+
+    coords = np.zeros(num_vertices * 3, dtype=np.float32)
+    mesh.vertices.foreach_get('co', coords)
+    hidden = np.zeros(num_vertices, dtype=bool)
+    mesh.vertices.foreach_get('hide', hidden)
+
+    shown = (vertex_weights > WEIGHT_EPSILON) & ~hidden
+    return VertexWeightData(key, coords.reshape(-1, 3)[shown], vertex_weights[shown])
+
+def vertex_weight_data(obj, group_index):
+    """Weights of one vertex group on the object's mesh, re-read only when the mesh changed."""
+    cache_id = (obj.as_pointer(), group_index)
+    mesh = obj.data
+    key = (mesh.as_pointer(), mesh_revision.revision(obj), len(mesh.vertices))
+    entry = _weight_cache.get(cache_id)
+    if entry is None or entry.key != key:
+        entry = _weight_cache[cache_id] = _build_weight_data(obj, group_index, key)
+    return entry
+
+def draw_weight_heatmap(objects_groups, point_size):
+    """Draws each (object, group index) pair's weighted vertices as colored points under its world matrix."""
+    shader = gpu.shader.from_builtin('POINT_FLAT_COLOR')
+    gpu.state.point_size_set(point_size)
+    drawn = 0
+    for obj, group_index in objects_groups:
+        data = vertex_weight_data(obj, group_index)
+        if len(data.weights) == 0:
+            continue
+        with gpu.matrix.push_pop():
+            gpu.matrix.multiply_matrix(obj.matrix_world)
+            data.batch(shader).draw(shader)
+        drawn += len(data.weights)
+    _prune({(obj.as_pointer(), group_index) for obj, group_index in objects_groups}, (_weight_cache,), same_layer_only=False)
+    return drawn
+
+def draw_weight_labels(view, objects_groups, cursor_location, font_size, budget):
+    """
+    Draws weight values for the weighted vertices closest to `cursor_location`
+    (world space), decluttered and capped at `budget` labels. Returns the number drawn.
+    """
+    cursor = np.array(cursor_location, dtype=np.float64)
+    all_xy, all_rank, all_weights = [], [], []
+    for obj, group_index in objects_groups:
+        data = vertex_weight_data(obj, group_index)
+        if len(data.weights) == 0:
+            continue
+        world, xy, w, visible = project_points(data.coords, obj.matrix_world, view)
+        all_xy.append(xy[visible])
+        all_rank.append(np.linalg.norm(world[visible] - cursor, axis=1))
+        all_weights.append(data.weights[visible])
+    _prune({(obj.as_pointer(), group_index) for obj, group_index in objects_groups}, (_weight_cache,), same_layer_only=False)
+    if not all_xy:
+        return 0
+
+    xy = np.concatenate(all_xy)
+    weights = np.concatenate(all_weights)
+    kept = declutter(xy, np.concatenate(all_rank), cell_size=max(8, font_size * 3), budget=budget)
+
+    font_id = 0
+    blf.size(font_id, font_size)
+    blf.color(font_id, 0.2, 1.0, 0.8, 1.0)
+    for (x, y), weight in zip(xy[kept].tolist(), weights[kept].tolist()):
+        blf.position(font_id, x + 5, y + 5, 0)
+        blf.draw(font_id, f"{weight:.3f}")
+    return len(kept)
+
+# =============================================================================
+# EDIT MODE
+# =============================================================================
+class EditFaceState:
+    """
+    Face-value overlay data of an object in edit mode, read from its edit bmesh:
+    one shared vertex buffer and one index buffer per value, plus label data.
+    Face values are patched in place by patch_face_values().
+    """
+    def __init__(self, key, coords, tris, tri_faces, face_values, centers, normals):
+        self.key = key
+        self.tris = tris            # (T, 3) vertex indices of the bmesh loop triangles
+        self.tri_faces = tri_faces  # (T,) face index of each triangle
+        self.face_values = face_values
+        self.label_data = FaceLabelData(key, centers, normals, face_values)
+        self.vbo = None
+        if len(coords):
+            vert_format = gpu.types.GPUVertFormat()
+            vert_format.attr_add(id="pos", comp_type='F32', len=3, fetch_mode='FLOAT')
+            self.vbo = gpu.types.GPUVertBuf(format=vert_format, len=len(coords))
+            self.vbo.attr_fill(id="pos", data=coords)
+        self.batches = {}
+        self.rebuild_values(np.unique(face_values[tri_faces]).tolist())
+
+    def rebuild_values(self, values):
+        """Re-uploads the index buffers of the given values only."""
+        tri_values = self.face_values[self.tri_faces]
+        for value in values:
+            in_value = tri_values == value
+            if self.vbo is None or not in_value.any():
+                self.batches.pop(value, None)
+                continue
+            indices = np.ascontiguousarray(self.tris[in_value])
+            elements = gpu.types.GPUIndexBuf(type='TRIS', seq=indices)
+            self.batches[value] = gpu.types.GPUBatch(type='TRIS', buf=self.vbo, elem=elements)
+
+    def batch_list(self):
+        return sorted(self.batches.items(), key=lambda item: item[0])
+
+# (object pointer, layer name) -> EditFaceState
+_edit_cache = {}
+
+def _edit_key(obj, bm, layer_name):
+    # Value-only edits (see patch_face_values) do not change the shape revision
+    return (obj.data.as_pointer(), mesh_revision.shape_revision(obj), len(bm.verts), len(bm.faces),
+            rs_layers.bmesh_face_layer(bm, layer_name) is not None)
+
+def _build_edit_state(bm, layer_name, key):
+    face_layer = rs_layers.bmesh_face_layer(bm, layer_name)
+    if face_layer is None:
+        # Like object mode, a mesh without the layer draws nothing
+        return EditFaceState(key, np.zeros((0, 3), dtype=np.float32), np.zeros((0, 3), dtype=np.int32),
+                             np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int32),
+                             np.zeros((0, 3)), np.zeros((0, 3)))
+
+    bm.verts.index_update()
+    bm.faces.index_update()
+    coords = np.array([v.co for v in bm.verts], dtype=np.float32).reshape(-1, 3)
+    face_values = np.array([face_layer.get(f) for f in bm.faces], dtype=np.int32)
+
+    looptris = bm.calc_loop_triangles()
+    tris = np.array([[loop.vert.index for loop in tri] for tri in looptris], dtype=np.int32).reshape(-1, 3)
+    tri_faces = np.array([tri[0].face.index for tri in looptris], dtype=np.int64)
+
+    centers = np.array([f.calc_center_median() for f in bm.faces], dtype=np.float64).reshape(-1, 3)
+    normals = np.array([f.normal for f in bm.faces], dtype=np.float64).reshape(-1, 3)
+    return EditFaceState(key, coords, tris, tri_faces, face_values, centers, normals)
+
+def edit_face_state(obj, layer_name):
+    """EditFaceState of an object in edit mode, rebuilt only when its shape or topology changed."""
+    bm = bmesh.from_edit_mesh(obj.data)
+    cache_id = (obj.as_pointer(), layer_name)
+    key = _edit_key(obj, bm, layer_name)
+    entry = _edit_cache.get(cache_id)
+    if entry is None or entry.key != key:
+        entry = _edit_cache[cache_id] = _build_edit_state(bm, layer_name, key)
+    return entry
+
+def patch_face_values(obj, layer_name, face_indices, value):
+    """
+    Records that the edit-mode faces `face_indices` now hold `value` in
+    `layer_name`. Call after writing the bmesh layer and update_edit_mesh();
+    the overlay then updates without re-reading the bmesh.
+    """
+    cache_id = (obj.as_pointer(), layer_name)
+    entry = _edit_cache.get(cache_id)
+    if entry is None:
+        return
+    bm = bmesh.from_edit_mesh(obj.data)
+    if entry.key != _edit_key(obj, bm, layer_name):
+        # Out of date already (or the layer was just created): rebuild on the next draw
+        del _edit_cache[cache_id]
+        return
+
+    face_indices = np.asarray(face_indices, dtype=np.int64)
+    changed = np.unique(entry.face_values[face_indices]).tolist()
+    entry.face_values[face_indices] = value
+    entry.rebuild_values(set(changed) | {value})
+    mesh_revision.mark_value_edit(obj)
@@ -36,6 +36,7 @@ from bpy.types import (
 )
 from mathutils import Vector
 from bpy.app.handlers import persistent
+from . import texture_index
 # ===============================================================
 # GLOBAL VARIABLES & SETTINGS
 # ===============================================================
@@ -93,6 +94,7 @@ def get_texture_dump_path():
 def natural_sort_key(s):
     """Sorts strings numerically (e.g., 'tex10' comes after 'tex2')."""
     return [int(text) if text.isdigit() else text.lower() for text in re.split(r'([0-9]+)', s)]
+_enum_items_cache = {}
 def load_textures_for_enum(self, context):
     """Populates the texture list EnumProperty, sorted naturally."""
     items = []
@@ -108,10 +110,15 @@ def load_textures_for_enum(self, context):
         pcoll = bpy.utils.previews.new()
         preview_collections["main"] = pcoll
  
-    try:
-        filenames = sorted(os.listdir(texture_dir), key=natural_sort_key)
-    except OSError:
+    index = texture_index.get_directory_index(texture_dir)
+    if index is None:
         return [("NONE", "Error", "Cannot access the folder.", 'ERROR', 0)]
+
+    # Items only change with the folder contents; reuse them between redraws
+    cache_key = (texture_dir, index.mtime, id(pcoll))
+    if _enum_items_cache.get('key') == cache_key:
+        return _enum_items_cache['items']
+    filenames = index.sorted_filenames(natural_sort_key)
  
     processed_icons = set(pcoll.keys())
     for i, filename in enumerate(filenames):
@@ -125,8 +132,10 @@ def load_textures_for_enum(self, context):
             items.append((filepath, filename, f"Texture: {filename}", icon.icon_id, i))
          
     if not items:
-        return [("NONE", "No Textures Found", "No images in 'texture_dump' folder.", 'QUESTION', 0)]
+        items = [("NONE", "No Textures Found", "No images in 'texture_dump' folder.", 'QUESTION', 0)]
      
+    _enum_items_cache['key'] = cache_key
+    _enum_items_cache['items'] = items
     return items
 def create_datmaker_uvs(context, obj, operator):
     """Creates a 'Project from View (Bounds)' style UV layout on selected faces."""
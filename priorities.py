@@ -4,10 +4,8 @@ import bpy
 import bmesh
 import re
 import gpu
-import blf
-from gpu_extras.batch import batch_for_shader
-from bpy_extras.view3d_utils import location_3d_to_region_2d
-from mathutils import Vector
+from . import rs_layers
+from . import overlays
 from . import materials as material_data # Import the material data
 
 # --- Global Cache for Parsed Colors ---
@@ -42,24 +40,15 @@ def parse_material_colors():
     print(f"DEBUG: Successfully parsed {len(PARSED_MATERIALS)} colors.")
     return PARSED_MATERIALS
 
-def triangulate_face_indices(face):
-    """Simple fan triangulation for the face."""
-    if len(face.verts) == 3:
-        return [tuple(v.index for v in face.verts)]
-    tris = []
-    for i in range(1, len(face.verts) - 1):
-        tris.append((face.verts[0].index, face.verts[i].index, face.verts[i + 1].index))
-    return tris
-
 # --- Visualization Draw Handlers ---
 
-def draw_priority_overlay(context):
-    """Draws the colored overlay on faces based on their priority data for selected mesh objects."""
-    alpha = context.scene.rsps_priority_alpha
-    if alpha <= 0.0:
-        return
+def priority_overlay_enabled(scene):
+    return scene.rsps_priority_alpha > 0.0
 
-    selected_meshes = [obj for obj in context.selected_objects if obj.type == 'MESH']
+def draw_priority_overlay(frame):
+    """Draws the colored overlay on faces based on their priority data for the frame's selected meshes."""
+    alpha = frame.scene.rsps_priority_alpha
+    selected_meshes = frame.selected_meshes
 
     if not selected_meshes:
         return
@@ -80,76 +69,8 @@ def draw_priority_overlay(context):
         gpu.state.face_culling_set('BACK')
         # =====================================================================
 
-        shader = gpu.shader.from_builtin('UNIFORM_COLOR')
-
-        # Precompute data for all objects
-        obj_data = {}
-        all_priorities = set()
-        for obj in selected_meshes:
-            bm = bmesh.new()
-            bm.from_mesh(obj.data)
-            bm.verts.ensure_lookup_table()
-            bm.faces.ensure_lookup_table()
-
-            if not obj.data.vertex_colors:
-                bm.free()
-                continue
-
-            priority_layer = bm.loops.layers.color.get('RSPRI')
-            if not priority_layer:
-                bm.free()
-                continue
-
-            verts_3d = [obj.matrix_world @ v.co for v in bm.verts]
-            
-            faces_by_priority = {}
-            for face in bm.faces:
-                priority = int(face.loops[0][priority_layer][0] * 255)
-                if priority not in faces_by_priority:
-                    faces_by_priority[priority] = []
-                
-                tris = triangulate_face_indices(face)
-                faces_by_priority[priority].extend(tris)
-
-            if faces_by_priority:
-                obj_data[obj] = {
-                    'bm': bm,
-                    'verts_3d': verts_3d,
-                    'faces_by_priority': faces_by_priority
-                }
-                all_priorities.update(faces_by_priority.keys())
-
-        if not obj_data:
-            return
-
-        # Sort priorities ascending: draw lower priorities first, higher on top
-        sorted_priorities = sorted(all_priorities)
-
-        for priority in sorted_priorities:
-            for obj, data in obj_data.items():
-                tris_list = data['faces_by_priority'].get(priority, [])
-                if not tris_list:
-                    continue
-                    
-                color = colors[priority % len(colors)]
-                
-                # ========================= VISUALIZATION FIX =========================
-                # Flat bright color with alpha based on slider
-                shader.uniform_float("color", (*color[:3], alpha))
-                # =====================================================================
-
-                # Draw all triangles for this priority without per-triangle sorting for performance
-                batch = batch_for_shader(shader, 'TRIS', {"pos": data['verts_3d']}, indices=tris_list)
-                batch.draw(shader)
-
-        # Clean up bmeshes
-        for data in obj_data.values():
-            data['bm'].free()
-            
-    except Exception as e:
-        print(f"ERROR in priority overlay draw handler: {e}")
-        import traceback
-        traceback.print_exc()
+        # Cached object-space batches, drawn under each object's world matrix
+        overlays.draw_face_value_overlay(selected_meshes, rs_layers.PRIORITY_LAYER, colors, alpha)
         
     finally:
         # Restore original GPU states to not affect the rest of Blender's UI
@@ -157,70 +78,14 @@ def draw_priority_overlay(context):
         gpu.state.blend_set(original_blend)
         gpu.state.face_culling_set('NONE')
 
-def draw_priority_text(context):
-    """Draws text labels for priorities on faces for selected mesh objects."""
-    if context.scene.rsps_priority_alpha <= 0.0:
+def draw_priority_text(frame):
+    """Draws priority labels on the visible, front-facing faces of the frame's selected meshes."""
+    if not frame.selected_meshes or frame.view is None:
         return
 
-    selected_meshes = [obj for obj in context.selected_objects if obj.type == 'MESH']
-
-    if not selected_meshes:
-        return
-
-    try:
-        region = context.region
-        rv3d = context.space_data.region_3d
-        view_matrix = rv3d.view_matrix
-        view_inv = view_matrix.inverted()
-        view_dir_world = (view_inv.to_3x3() @ Vector((0, 0, -1))).normalized()
-        
-        font_id = 0
-        blf.size(font_id, 16)
-        blf.color(font_id, 1.0, 1.0, 1.0, 1.0)
-        
-        gpu.state.blend_set('ALPHA')
-        
-        for obj in selected_meshes:
-            bm = None
-            try:
-                if obj.mode == 'EDIT_MESH':
-                    bm = bmesh.from_edit_mesh(obj.data)
-                else:
-                    bm = bmesh.new()
-                    bm.from_mesh(obj.data)
-                    
-                bm.verts.ensure_lookup_table()
-                bm.faces.ensure_lookup_table()
-
-                priority_layer = bm.loops.layers.color.get('RSPRI')
-                if not priority_layer:
-                    continue
-
-                for face in bm.faces:
-                    priority = int(face.loops[0][priority_layer][0] * 255)
-                    
-                    # Always display numbers, no front-facing check
-                    face_center = sum((v.co for v in face.verts), Vector()) / len(face.verts)
-                    world_center = obj.matrix_world @ face_center
-                    screen_pos = location_3d_to_region_2d(region, rv3d, world_center)
-                    if screen_pos is None: continue
-                        
-                    blf.position(font_id, screen_pos[0], screen_pos[1], 0)
-                    blf.draw(font_id, f"{priority}")
-
-            except Exception as e:
-                print(f"ERROR in priority text draw handler for {obj.name}: {e}")
-                import traceback
-                traceback.print_exc()
-                
-            finally:
-                if bm and bm.is_valid and obj.mode != 'EDIT_MESH':
-                    bm.free()
-
-    except Exception as e:
-        print(f"ERROR in priority text draw handler: {e}")
-        import traceback
-        traceback.print_exc()
+    gpu.state.blend_set('ALPHA')
+    overlays.draw_face_value_labels(frame.view, frame.selected_meshes, rs_layers.PRIORITY_LAYER,
+                                    font_size=16, budget=frame.scene.rsps_label_budget)
 
 # --- Operators ---
 
@@ -264,14 +129,11 @@ class RSPS_OT_apply_priority_by_number(bpy.types.Operator):
         colors = parse_material_colors()
         vis_color = colors[priority_value % len(colors)]
         
-        red_value = priority_value / 255.0
-        
         bm = bmesh.from_edit_mesh(mesh)
         
-        priority_layer = bm.loops.layers.color.get('RSPRI')
-        if priority_layer is None:
-            priority_layer = bm.loops.layers.color.new('RSPRI')
-            self.report({'INFO'}, "Created 'RSPRI' vertex color layer for exporter.")
+        priority_layer, created = rs_layers.ensure_bmesh_face_layer(bm, rs_layers.PRIORITY_LAYER)
+        if created:
+            self.report({'INFO'}, "Created 'RSPRI' face attribute for exporter.")
 
         vis_layer_name = f"RSPRI_{priority_value}"
         vis_layer = bm.loops.layers.color.get(vis_layer_name)
@@ -284,15 +146,16 @@ class RSPS_OT_apply_priority_by_number(bpy.types.Operator):
             self.report({'WARNING'}, "No faces are selected.")
             return {'CANCELLED'}
 
-        priority_data = (red_value, 0.0, 0.0, 1.0)
         vis_data = vis_color
 
         for face in selected_faces:
+            priority_layer.set(face, priority_value)
             for loop in face.loops:
-                loop[priority_layer] = priority_data
                 loop[vis_layer] = vis_data
         
         bmesh.update_edit_mesh(mesh)
+        # Live overlay: patch only the painted faces instead of re-reading the bmesh
+        overlays.patch_face_values(obj, rs_layers.PRIORITY_LAYER, [f.index for f in selected_faces], priority_value)
         
         for area in context.screen.areas:
             if area.type == 'VIEW_3D':
@@ -334,6 +197,8 @@ class VIEW3D_PT_rsps_priorities(bpy.types.Panel):
         vis_box = layout.box()
         vis_box.label(text="Visualization", icon='HIDE_OFF')
         vis_box.prop(scene, "rsps_priority_alpha", text="Priority Intensity")
+        vis_box.prop(scene, "rsps_label_budget")
+        vis_box.prop(scene, "rsps_show_overlay_stats")
         vis_box.label(text="Controls overlay alpha (0=off) and shows labels on selected mesh objects (front-facing only, optimized)", icon='INFO')
         
         debug_box = layout.box()
@@ -343,8 +208,8 @@ class VIEW3D_PT_rsps_priorities(bpy.types.Panel):
         if obj and obj.type == 'MESH':
             if context.mode == 'EDIT_MESH':
                 bm = bmesh.from_edit_mesh(obj.data)
-                priority_layer = bm.loops.layers.color.get('RSPRI')
-                if priority_layer:
+                priority_layer = rs_layers.bmesh_face_layer(bm, rs_layers.PRIORITY_LAYER)
+                if priority_layer is not None:
                     debug_box.label(text="RSPRI layer found", icon='CHECKMARK')
                 else:
                     debug_box.label(text="No RSPRI layer", icon='ERROR')
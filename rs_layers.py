@@ -0,0 +1,127 @@
+# rs_layers.py
+# Storage and lookup for the per-face RuneScape data layers.
+#
+# RSPRI and RSTSKIN are stored as face-domain INT attributes and RSCOLOR as a
+# face-domain BYTE_COLOR attribute. Older files keep them as loop color layers
+# (mesh.vertex_colors) with the value in the red channel (value / 255); every
+# reader here accepts either representation.
+import numpy as np
+
+PRIORITY_LAYER = "RSPRI"
+TSKIN_LAYER = "RSTSKIN"
+COLOR_LAYER = "RSCOLOR"
+
+# =============================================================================
+# MESH (object mode) ACCESS
+# =============================================================================
+def _face_int_attribute(mesh, name):
+    attr = mesh.attributes.get(name)
+    if attr is not None and attr.domain == 'FACE' and attr.data_type == 'INT':
+        return attr
+    return None
+
+def has_face_layer(mesh, name):
+    """True if the mesh carries the layer in either representation."""
+    return _face_int_attribute(mesh, name) is not None or mesh.vertex_colors.get(name) is not None
+
+def write_face_values(mesh, name, values):
+    """Stores one integer per polygon as a face-domain INT attribute (missing values are 0)."""
+    face_values = np.zeros(len(mesh.polygons), dtype=np.int32)
+    values = np.asarray(values, dtype=np.int32)[:len(face_values)]
+    face_values[:len(values)] = values
+    attr = _face_int_attribute(mesh, name)
+    if attr is None:
+        if name in mesh.attributes:
+            mesh.attributes.remove(mesh.attributes[name])
+        attr = mesh.attributes.new(name=name, type='INT', domain='FACE')
+    attr.data.foreach_set('value', face_values)
+    return attr
+
+def write_face_colors(mesh, name, colors):
+    """Stores one RGBA color per polygon as a face-domain BYTE_COLOR attribute."""
+    if name in mesh.attributes:
+        mesh.attributes.remove(mesh.attributes[name])
+    attr = mesh.attributes.new(name=name, type='BYTE_COLOR', domain='FACE')
+    # color_srgb stores the values as given, matching the legacy vertex color layers
+    attr.data.foreach_set('color_srgb', np.asarray(colors, dtype=np.float32).ravel())
+    return attr
+
+def read_face_values(mesh, name):
+    """Returns an int array with one value per polygon, or None if the layer is missing."""
+    attr = _face_int_attribute(mesh, name)
+    if attr is not None:
+        values = np.zeros(len(mesh.polygons), dtype=np.int32)
+        attr.data.foreach_get('value', values)
+        return values
+
+    layer = mesh.vertex_colors.get(name)
+    if layer is not None:
+        loop_starts = np.zeros(len(mesh.polygons), dtype=np.int32)
+        mesh.polygons.foreach_get('loop_start', loop_starts)
+        return _legacy_loop_values(mesh, layer)[loop_starts]
+    return None
+
+def read_triangle_values(mesh, name):
+    """
+    Returns an int array with one value per mesh.loop_triangles entry, or None.
+    Legacy loop layers are sampled at each triangle's first loop, as the exporter always did.
+    """
+    num_tris = len(mesh.loop_triangles)
+    attr = _face_int_attribute(mesh, name)
+    if attr is not None:
+        face_values = np.zeros(len(mesh.polygons), dtype=np.int32)
+        attr.data.foreach_get('value', face_values)
+        polygon_indices = np.zeros(num_tris, dtype=np.int32)
+        mesh.loop_triangles.foreach_get('polygon_index', polygon_indices)
+        return face_values[polygon_indices]
+
+    layer = mesh.vertex_colors.get(name)
+    if layer is not None:
+        tri_loops = np.zeros(num_tris * 3, dtype=np.int32)
+        mesh.loop_triangles.foreach_get('loops', tri_loops)
+        return _legacy_loop_values(mesh, layer)[tri_loops[0::3]]
+    return None
+
+def _legacy_loop_values(mesh, layer):
+    colors = np.zeros(len(mesh.loops) * 4, dtype=np.float32)
+    layer.data.foreach_get('color', colors)
+    return (colors[0::4] * 255).astype(np.int32)
+
+# =============================================================================
+# BMESH ACCESS
+# =============================================================================
+class BMFaceLayer:
+    """Reads and writes one integer per BMFace on either layer representation."""
+    def __init__(self, layer, is_legacy):
+        self.layer = layer
+        self.is_legacy = is_legacy
+
+    def get(self, face):
+        if self.is_legacy:
+            return int(face.loops[0][self.layer][0] * 255)
+        return face[self.layer]
+
+    def set(self, face, value):
+        if self.is_legacy:
+            color = (value / 255.0, 0.0, 0.0, 1.0)
+            for loop in face.loops:
+                loop[self.layer] = color
+        else:
+            face[self.layer] = value
+
+def bmesh_face_layer(bm, name):
+    """Returns a BMFaceLayer for an existing layer, or None."""
+    layer = bm.faces.layers.int.get(name)
+    if layer is not None:
+        return BMFaceLayer(layer, is_legacy=False)
+    layer = bm.loops.layers.color.get(name)
+    if layer is not None:
+        return BMFaceLayer(layer, is_legacy=True)
+    return None
+
+def ensure_bmesh_face_layer(bm, name):
+    """Returns (BMFaceLayer, created). New layers are always face-domain INT."""
+    face_layer = bmesh_face_layer(bm, name)
+    if face_layer is not None:
+        return face_layer, False
+    return BMFaceLayer(bm.faces.layers.int.new(name), is_legacy=False), True
@@ -0,0 +1,260 @@
+# test_pure_modules.py
+# Tests for the Blender-independent modules (dat_decoder, dat_encoder, export_presets).
+#
+# Run from the add-on folder with `python -m pytest tests`. The add-on package
+# itself needs bpy, so the pure modules are imported by their plain names.
+import os
+import sys
+import struct
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dat_decoder
+import dat_encoder
+import export_presets
+
+# =============================================================================
+# REFERENCE IMPLEMENTATIONS (the original per-value exporter loops)
+# =============================================================================
+def pack_smart_int(value):
+    if -64 <= value <= 63:
+        return struct.pack('>B', value + 64)
+    return struct.pack('>H', value + 49152)
+
+def reference_encode_vertices(coords):
+    vert_dirs_data, x_data, y_data, z_data = bytearray(), bytearray(), bytearray(), bytearray()
+    last_x, last_y, last_z = 0, 0, 0
+    for vx, vy, vz in coords:
+        dx, dy, dz = vx - last_x, vy - last_y, vz - last_z
+        flag = (1 if dx != 0 else 0) | (2 if dy != 0 else 0) | (4 if dz != 0 else 0)
+        vert_dirs_data.append(flag)
+        if flag & 1: x_data += pack_smart_int(dx)
+        if flag & 2: y_data += pack_smart_int(dy)
+        if flag & 4: z_data += pack_smart_int(dz)
+        last_x, last_y, last_z = vx, vy, vz
+    return bytes(vert_dirs_data), bytes(x_data), bytes(y_data), bytes(z_data)
+
+def reference_encode_faces(faces):
+    face_types_data, face_indices_raw = bytearray(), []
+    v1, v2, v3 = 0, 0, 0
+    for p1, p2, p3 in faces:
+        if (v1, v2) == (p2, p1): face_types_data.append(4); face_indices_raw.append(p3); v1, v2, v3 = v2, v1, p3
+        elif p1 == v3 and p2 == v2: face_types_data.append(3); face_indices_raw.append(p3); v1, v2, v3 = v3, v2, p3
+        elif p1 == v1 and p2 == v3: face_types_data.append(2); face_indices_raw.append(p3); v1, v2, v3 = v1, v3, p3
+        else: face_types_data.append(1); face_indices_raw.extend([p1, p2, p3]); v1, v2, v3 = p1, p2, p3
+    face_indices_data = bytearray()
+    last_v = 0
+    for index in face_indices_raw:
+        face_indices_data += pack_smart_int(index - last_v)
+        last_v = index
+    return bytes(face_types_data), bytes(face_indices_data)
+
+def reference_face_tskins(preset, vertex_skins, faces):
+    all_priority_weights = set()
+    for group in preset.tskin_order:
+        all_priority_weights.update(group)
+    face_tskins = [0] * len(faces)
+    for i, tri in enumerate(faces):
+        applied_tskin = False
+        for priority_group in preset.tskin_order:
+            for v_index in tri:
+                weight_val = vertex_skins[v_index]
+                if weight_val in priority_group:
+                    face_tskins[i] = preset.tskin_map[weight_val]
+                    applied_tskin = True
+                    break
+            if applied_tskin:
+                break
+        if not applied_tskin:
+            for v_index in tri:
+                weight_val = vertex_skins[v_index]
+                if weight_val in preset.tskin_map and weight_val not in all_priority_weights:
+                    face_tskins[i] = preset.tskin_map[weight_val]
+                    break
+    return face_tskins
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+def random_mesh(rng, num_vertices=60, num_faces=120, spread=3000):
+    coords = rng.integers(-spread, spread, size=(num_vertices, 3))
+    # Repeat some coordinates so zero deltas (cleared flag bits) are covered
+    coords[1::7] = coords[0:-1:7]
+    faces = np.array([rng.choice(num_vertices, 3, replace=False) for _ in range(num_faces)], dtype=np.int64)
+    # Chain some faces across a shared edge so opcodes 2-4 appear
+    for i in range(1, num_faces, 3):
+        a, b, c = faces[i - 1]
+        d = next(v for v in rng.permutation(num_vertices) if v not in (a, b, c))
+        faces[i] = [(b, a, d), (c, b, d), (a, c, d)][i % 3]
+    return coords, faces
+
+def build_317(coords, faces, rng, num_tex_triangles=2):
+    """A complete 317 file with every optional section enabled."""
+    num_vertices, num_faces = len(coords), len(faces)
+    vert_dirs, x_data, y_data, z_data = dat_encoder.encode_vertices(coords)
+    face_types, face_indices = dat_encoder.encode_faces(faces)
+    priorities = rng.integers(0, 12, num_faces).astype(np.uint8)
+    tskins = rng.integers(0, 30, num_faces).astype(np.uint8)
+    texture_flags = np.where(rng.random(num_faces) < 0.3, 2 + (rng.integers(0, num_tex_triangles, num_faces) << 2), 0)
+    vskins = rng.integers(0, 60, num_vertices).astype(np.uint8)
+    alphas = rng.integers(0, 256, num_faces).astype(np.uint8)
+    colors = rng.integers(0, 65536, num_faces).astype('>u2')
+    tex_coords = rng.integers(0, num_vertices, (num_tex_triangles, 3)).astype('>u2')
+
+    body = b''.join([vert_dirs, face_types, priorities.tobytes(), tskins.tobytes(),
+                     texture_flags.astype(np.uint8).tobytes(), vskins.tobytes(), alphas.tobytes(),
+                     face_indices, colors.tobytes(), tex_coords.tobytes(), x_data, y_data, z_data])
+    footer = struct.pack('>HHBBBBBBHHHH', num_vertices, num_faces, num_tex_triangles,
+                         1, 255, 1, 1, 1, len(x_data), len(y_data), len(z_data), len(face_indices))
+    return body + footer
+
+def build_667(coords, faces, rng):
+    """A 667 file with priorities, skins, alphas and simple (PMN) textures."""
+    num_vertices, num_faces = len(coords), len(faces)
+    num_tex_triangles = 3
+    vert_dirs, x_data, y_data, z_data = dat_encoder.encode_vertices(coords)
+    face_types, face_indices = dat_encoder.encode_faces(faces)
+    render_types = np.zeros(num_tex_triangles, dtype=np.uint8)
+    priorities = rng.integers(0, 12, num_faces).astype(np.uint8)
+    tskins = rng.integers(0, 30, num_faces).astype(np.uint8)
+    vskins = rng.integers(0, 60, num_vertices).astype(np.uint8)
+    alphas = rng.integers(0, 256, num_faces).astype(np.uint8)
+    materials = np.where(rng.random(num_faces) < 0.3, rng.integers(1, 500, num_faces), 0).astype('>u2')
+    coord_indices = rng.integers(0, num_tex_triangles + 1, int(np.count_nonzero(materials))).astype(np.uint8)
+    colors = rng.integers(0, 65536, num_faces).astype('>u2')
+    tex_coords = rng.integers(0, num_vertices, (num_tex_triangles, 3)).astype('>i2')
+
+    body = b''.join([render_types.tobytes(), vert_dirs, face_types, priorities.tobytes(), tskins.tobytes(),
+                     vskins.tobytes(), alphas.tobytes(), face_indices, materials.tobytes(),
+                     coord_indices.tobytes(), colors.tobytes(), x_data, y_data, z_data, tex_coords.tobytes()])
+    footer = struct.pack('>HHBBBBBBBHHHHH', num_vertices, num_faces, num_tex_triangles,
+                         0, 255, 1, 1, 1, 1, len(x_data), len(y_data), len(z_data),
+                         len(face_indices), len(coord_indices))
+    return body + footer + b'\xff\xff'
+
+def assert_models_equal(a, b):
+    for name in ('vertices', 'faces', 'face_colors', 'face_texture_ids', 'texture_coordinate_indices',
+                 'texture_triangles', 'priorities', 'tskins', 'vskins', 'alphas', 'texture_render_types'):
+        left, right = getattr(a, name), getattr(b, name)
+        if left is None or right is None:
+            assert left is None and right is None, name
+        else:
+            np.testing.assert_array_equal(left, right, err_msg=name)
+
+# =============================================================================
+# DECODER
+# =============================================================================
+@pytest.mark.parametrize("seed", range(5))
+def test_unpack_smart_ints_matches_stream(seed):
+    rng = np.random.default_rng(seed)
+    values = rng.integers(-16384, 16384, 300)
+    values[::3] = rng.integers(-64, 64, 100)
+    data = dat_encoder.encode_smart_ints(values)
+    # Truncated sections decode the missing values like the stream does
+    for cut in (len(data), len(data) - 1, len(data) // 2, 0):
+        section = data[:cut]
+        stream = dat_decoder.DataStream(section)
+        expected = [stream.unpack_smart_int() for _ in range(len(values))]
+        np.testing.assert_array_equal(dat_decoder.unpack_smart_ints(section, len(values)), expected)
+
+def test_unpack_smart_ints_random_bytes():
+    rng = np.random.default_rng(7)
+    for _ in range(50):
+        data = rng.integers(0, 256, rng.integers(0, 64)).astype(np.uint8).tobytes()
+        count = int(rng.integers(0, 80))
+        stream = dat_decoder.DataStream(data)
+        expected = [stream.unpack_smart_int() for _ in range(count)]
+        np.testing.assert_array_equal(dat_decoder.unpack_smart_ints(data, count), expected)
+
+@pytest.mark.parametrize("seed", range(3))
+def test_decode_317_matches_legacy_and_source(seed):
+    rng = np.random.default_rng(seed)
+    coords, faces = random_mesh(rng)
+    data = build_317(coords, faces, rng)
+    model = dat_decoder.decode_317(data, vectorized=True)
+    assert_models_equal(model, dat_decoder.decode_317(data, vectorized=False))
+    np.testing.assert_array_equal(model.vertices, np.column_stack((coords[:, 0], coords[:, 2], -coords[:, 1])))
+    np.testing.assert_array_equal(model.faces, faces)
+
+@pytest.mark.parametrize("seed", range(3))
+def test_decode_667_matches_legacy_and_source(seed):
+    rng = np.random.default_rng(seed)
+    coords, faces = random_mesh(rng)
+    data = build_667(coords, faces, rng)
+    model = dat_decoder.decode_667(data, vectorized=True)
+    assert_models_equal(model, dat_decoder.decode_667(data, vectorized=False))
+    np.testing.assert_array_equal(model.vertices, np.column_stack((coords[:, 0], coords[:, 2], -coords[:, 1])))
+    np.testing.assert_array_equal(model.faces, faces)
+
+# =============================================================================
+# ENCODER
+# =============================================================================
+@pytest.mark.parametrize("seed", range(5))
+def test_encode_smart_ints_matches_pack_smart_int(seed):
+    rng = np.random.default_rng(seed)
+    values = rng.integers(-16384, 16384, 500)
+    values[::2] = rng.integers(-70, 70, 250)
+    assert dat_encoder.encode_smart_ints(values) == b''.join(pack_smart_int(int(v)) for v in values)
+
+@pytest.mark.parametrize("seed", range(5))
+def test_encode_blocks_match_reference(seed):
+    rng = np.random.default_rng(seed)
+    coords, faces = random_mesh(rng)
+    assert tuple(map(bytes, dat_encoder.encode_vertices(coords))) == reference_encode_vertices(coords.tolist())
+    assert tuple(map(bytes, dat_encoder.encode_faces(faces))) == reference_encode_faces(faces.tolist())
+
+# =============================================================================
+# FACE AND VERTEX REORDERING
+# =============================================================================
+def triangle_set(coords, faces):
+    """Triangles as rotation-normalized tuples of positions (winding kept)."""
+    result = []
+    for tri in np.asarray(coords)[np.asarray(faces)].tolist():
+        tri = [tuple(p) for p in tri]
+        k = tri.index(min(tri))
+        result.append(tuple(tri[k:] + tri[:k]))
+    return sorted(result)
+
+@pytest.mark.parametrize("seed", range(3))
+def test_optimize_strip_order_keeps_triangles(seed):
+    rng = np.random.default_rng(seed)
+    coords, faces = random_mesh(rng)
+    order, reordered = dat_encoder.optimize_strip_order(faces)
+    np.testing.assert_array_equal(np.sort(order), np.arange(len(faces)))
+    for f, tri in zip(order.tolist(), reordered.tolist()):
+        a, b, c = faces[f].tolist()
+        assert tri in ([a, b, c], [b, c, a], [c, a, b])
+    assert triangle_set(coords, reordered) == triangle_set(coords, faces)
+
+    types, indices = dat_encoder.encode_faces(reordered)
+    decoded = dat_decoder.decode_faces(types, indices, len(faces), len(coords), missing_opcode=1)
+    np.testing.assert_array_equal(decoded, reordered)
+
+@pytest.mark.parametrize("method", dat_encoder.VERTEX_ORDERS)
+def test_vertex_order_keeps_triangles(method):
+    rng = np.random.default_rng(11)
+    coords, faces = random_mesh(rng)
+    order = dat_encoder.vertex_order(coords, faces, method)
+    np.testing.assert_array_equal(np.sort(order), np.arange(len(coords)))
+    new_faces = dat_encoder.remap_indices(faces, order)
+    assert triangle_set(coords[order], new_faces) == triangle_set(coords, faces)
+
+# =============================================================================
+# EXPORT PRESETS
+# =============================================================================
+@pytest.mark.parametrize("name", sorted(export_presets.get_presets()))
+def test_preset_tables_match_rule_loops(name):
+    preset = export_presets.get_preset(name)
+    rng = np.random.default_rng(3)
+    weights = sorted(set(preset.tskin_map) | set(preset.detect_weights) | {0, 99})
+    vertex_skins = rng.choice(weights, 200).tolist()
+    faces = rng.integers(0, 200, (400, 3))
+
+    expected_priorities = []
+    for first in faces[:, 0].tolist():
+        priority = next((p for rule, p in preset.priority_rules if vertex_skins[first] in rule), 1)
+        expected_priorities.append(priority)
+    assert preset.face_priorities(vertex_skins, faces[:, 0]).tolist() == expected_priorities
+    assert preset.face_tskins(vertex_skins, faces).tolist() == reference_face_tskins(preset, vertex_skins, faces.tolist())
@@ -0,0 +1,86 @@
+# texture_index.py
+# Cached texture directory listings shared by the importers and the PMN texture browser.
+#
+# Each directory is listed once and re-listed only when its mtime changes
+# (files added, removed or renamed), so texture lookups no longer call
+# os.listdir per texture id.
+import os
+
+SUPPORTED_EXTS = ('.png', '.jpg', '.jpeg', '.tga', '.bmp')
+
+class TextureDirectoryIndex:
+    """Listing of one directory plus a lowercase image stem -> filename lookup."""
+    def __init__(self, path):
+        self.path = path
+        self.mtime = None
+        self.filenames = []
+        self.image_stems = {}  # stem -> (listing position, filename); first file wins
+        self.derived = {}
+
+    def refresh(self):
+        """Re-lists the directory if it changed. Returns False if it is missing."""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime == self.mtime:
+                return True
+            filenames = os.listdir(self.path)
+        except OSError:
+            self.mtime = None
+            self.filenames = []
+            self.image_stems = {}
+            self.derived = {}
+            return False
+
+        image_stems = {}
+        for position, filename in enumerate(filenames):
+            stem, ext = os.path.splitext(filename.lower())
+            if ext in SUPPORTED_EXTS and stem not in image_stems:
+                image_stems[stem] = (position, filename)
+
+        self.mtime = mtime
+        self.filenames = filenames
+        self.image_stems = image_stems
+        self.derived = {}
+        return True
+
+    def find(self, patterns):
+        """Returns the filename listed first among images whose stem matches any pattern, or None."""
+        best = None
+        for pattern in patterns:
+            match = self.image_stems.get(pattern.lower())
+            if match is not None and (best is None or match[0] < best[0]):
+                best = match
+        return best[1] if best else None
+
+    def cached(self, name, compute):
+        """Returns compute(self), memoized under `name` until the directory changes."""
+        if name not in self.derived:
+            self.derived[name] = compute(self)
+        return self.derived[name]
+
+    def sorted_filenames(self, key):
+        """Directory listing sorted with `key`, cached until the directory changes."""
+        return self.cached(('sorted', key), lambda index: sorted(index.filenames, key=key))
+
+_indexes = {}
+
+def get_directory_index(path):
+    """Returns the up-to-date index for `path`, or None if it is not a readable directory."""
+    if not path:
+        return None
+    path = os.path.normpath(path)
+    index = _indexes.get(path)
+    if index is None:
+        index = _indexes[path] = TextureDirectoryIndex(path)
+    return index if index.refresh() else None
+
+def find_texture_file(texture_id, texture_dirs, patterns):
+    """Returns the path of the first texture matching one of `patterns` in `texture_dirs`, or None."""
+    for tex_dir in texture_dirs:
+        index = get_directory_index(tex_dir)
+        if index is None:
+            continue
+        filename = index.find(patterns)
+        if filename:
+            return os.path.join(tex_dir, filename)
+    return None
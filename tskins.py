@@ -3,10 +3,8 @@ import bpy
 import bmesh
 import re
 import gpu
-import blf
-from gpu_extras.batch import batch_for_shader
-from bpy_extras.view3d_utils import location_3d_to_region_2d
-from mathutils import Vector
+from . import rs_layers
+from . import overlays
 from . import materials as material_data  # Import the material data
 
 # --- Global Cache for Parsed Colors ---
@@ -40,24 +38,15 @@ def parse_material_colors():
     print(f"DEBUG: Successfully parsed {len(PARSED_MATERIALS)} colors.")
     return PARSED_MATERIALS
 
-def triangulate_face_indices(face):
-    """Simple fan triangulation for the face."""
-    if len(face.verts) == 3:
-        return [tuple(v.index for v in face.verts)]
-    tris = []
-    for i in range(1, len(face.verts) - 1):
-        tris.append((face.verts[0].index, face.verts[i].index, face.verts[i + 1].index))
-    return tris
-
 # --- Visualization Draw Handlers ---
 
-def draw_tskin_overlay(context):
-    """Draws the colored overlay on faces based on their TSKIN data for selected mesh objects."""
-    alpha = context.scene.rsps_tskin_alpha
-    if alpha <= 0.0:
-        return
+def tskin_overlay_enabled(scene):
+    return scene.rsps_tskin_alpha > 0.0
 
-    selected_meshes = [obj for obj in context.selected_objects if obj.type == 'MESH']
+def draw_tskin_overlay(frame):
+    """Draws the colored overlay on faces based on their TSKIN data for the frame's selected meshes."""
+    alpha = frame.scene.rsps_tskin_alpha
+    selected_meshes = frame.selected_meshes
 
     if not selected_meshes:
         return
@@ -74,66 +63,8 @@ def draw_tskin_overlay(context):
         gpu.state.blend_set('ALPHA')
         gpu.state.face_culling_set('BACK')
 
-        shader = gpu.shader.from_builtin('UNIFORM_COLOR')
-
-        # Precompute data for all objects
-        obj_data = {}
-        all_tskins = set()
-        for obj in selected_meshes:
-            bm = bmesh.new()
-            bm.from_mesh(obj.data)
-            bm.verts.ensure_lookup_table()
-            bm.faces.ensure_lookup_table()
-
-            if not obj.data.vertex_colors:
-                bm.free()
-                continue
-
-            tskin_layer = bm.loops.layers.color.get('RSTSKIN')
-            if not tskin_layer:
-                bm.free()
-                continue
-
-            verts_3d = [obj.matrix_world @ v.co for v in bm.verts]
-            
-            faces_by_tskin = {}
-            for face in bm.faces:
-                tskin = int(face.loops[0][tskin_layer][0] * 255)
-                if tskin not in faces_by_tskin:
-                    faces_by_tskin[tskin] = []
-                
-                tris = triangulate_face_indices(face)
-                faces_by_tskin[tskin].extend(tris)
-
-            if faces_by_tskin:
-                obj_data[obj] = {
-                    'bm': bm,
-                    'verts_3d': verts_3d,
-                    'faces_by_tskin': faces_by_tskin
-                }
-                all_tskins.update(faces_by_tskin.keys())
-
-        if not obj_data:
-            return
-
-        # Sort tskins ascending: draw lower first
-        sorted_tskins = sorted(all_tskins)
-
-        for tskin in sorted_tskins:
-            for obj, data in obj_data.items():
-                tris_list = data['faces_by_tskin'].get(tskin, [])
-                if not tris_list:
-                    continue
-                    
-                color = colors[tskin % len(colors)]
-                
-                # Flat bright color with alpha based on slider
-                shader.uniform_float("color", (*color[:3], alpha))
-
-                verts = [data['verts_3d'][i] for tri in tris_list for i in tri]
-                
-                batch = batch_for_shader(shader, 'TRIS', {"pos": verts})
-                batch.draw(shader)
+        # Cached object-space batches, drawn under each object's world matrix
+        overlays.draw_face_value_overlay(selected_meshes, rs_layers.TSKIN_LAYER, colors, alpha)
 
     finally:
         # Restore original GPU states
@@ -141,51 +72,14 @@ def draw_tskin_overlay(context):
         gpu.state.blend_set(original_blend)
         gpu.state.face_culling_set('NONE')
 
-        # Free BMesh data
-        for data in obj_data.values():
-            data['bm'].free()
-
-def draw_tskin_text(context):
-    """Draws TSKIN values as text labels on face centers for selected mesh objects."""
-    if context.scene.rsps_tskin_alpha <= 0.0:
+def draw_tskin_text(frame):
+    """Draws non-zero TSKIN labels on the visible, front-facing faces of the frame's selected meshes."""
+    if not frame.selected_meshes or frame.view is None:
         return
 
-    selected_meshes = [obj for obj in context.selected_objects if obj.type == 'MESH']
-
-    if not selected_meshes:
-        return
-
-    font_id = 0
-    blf.size(font_id, 12)
-    blf.color(font_id, 1.0, 1.0, 1.0, 1.0)  # White text for visibility
-
-    region = context.region
-    rv3d = context.region_data
-
-    for obj in selected_meshes:
-        bm = bmesh.new()
-        bm.from_mesh(obj.data)
-        bm.faces.ensure_lookup_table()
-
-        tskin_layer = bm.loops.layers.color.get('RSTSKIN')
-        if not tskin_layer:
-            bm.free()
-            continue
-
-        for face in bm.faces:
-            tskin_value = int(face.loops[0][tskin_layer][0] * 255)
-            if tskin_value == 0:
-                continue
-
-            center = obj.matrix_world @ face.calc_center_median()
-
-            # Project to 2D screen space
-            coord_2d = location_3d_to_region_2d(region, rv3d, center)
-            if coord_2d:
-                blf.position(font_id, coord_2d.x + 5, coord_2d.y, 0)
-                blf.draw(font_id, str(tskin_value))
-
-        bm.free()
+    overlays.draw_face_value_labels(frame.view, frame.selected_meshes, rs_layers.TSKIN_LAYER,
+                                    font_size=12, budget=frame.scene.rsps_label_budget,
+                                    skip_zero=True, x_offset=5)
 
 # --- Operators ---
 
@@ -229,14 +123,11 @@ class RSPS_OT_apply_tskin_by_number(bpy.types.Operator):
         colors = parse_material_colors()
         vis_color = colors[tskin_value % len(colors)]
         
-        red_value = tskin_value / 255.0
-        
         bm = bmesh.from_edit_mesh(mesh)
         
-        tskin_layer = bm.loops.layers.color.get('RSTSKIN')
-        if tskin_layer is None:
-            tskin_layer = bm.loops.layers.color.new('RSTSKIN')
-            self.report({'INFO'}, "Created 'RSTSKIN' vertex color layer for exporter.")
+        tskin_layer, created = rs_layers.ensure_bmesh_face_layer(bm, rs_layers.TSKIN_LAYER)
+        if created:
+            self.report({'INFO'}, "Created 'RSTSKIN' face attribute for exporter.")
 
         vis_layer_name = f"RSTSKIN_{tskin_value}"
         vis_layer = bm.loops.layers.color.get(vis_layer_name)
@@ -249,15 +140,15 @@ class RSPS_OT_apply_tskin_by_number(bpy.types.Operator):
             self.report({'WARNING'}, "No faces are selected.")
             return {'CANCELLED'}
 
-        tskin_data = (red_value, 0.0, 0.0, 1.0)
         vis_data = vis_color
 
         for face in selected_faces:
+            tskin_layer.set(face, tskin_value)
             for loop in face.loops:
-                loop[tskin_layer] = tskin_data
                 loop[vis_layer] = vis_data
         
         bmesh.update_edit_mesh(mesh)
+        overlays.patch_face_values(obj, rs_layers.TSKIN_LAYER, [f.index for f in selected_faces], tskin_value)
         
         for area in context.screen.areas:
             if area.type == 'VIEW_3D':
@@ -299,6 +190,8 @@ class VIEW3D_PT_rsps_tskins(bpy.types.Panel):
         vis_box = layout.box()
         vis_box.label(text="Visualization", icon='HIDE_OFF')
         vis_box.prop(scene, "rsps_tskin_alpha", text="TSKIN Intensity")
+        vis_box.prop(scene, "rsps_label_budget")
+        vis_box.prop(scene, "rsps_show_overlay_stats")
         vis_box.label(text="Controls overlay alpha (0=off) and shows labels on selected mesh objects (front-facing only, optimized)", icon='INFO')
         
         debug_box = layout.box()
@@ -308,8 +201,8 @@ class VIEW3D_PT_rsps_tskins(bpy.types.Panel):
         if obj and obj.type == 'MESH':
             if context.mode == 'EDIT_MESH':
                 bm = bmesh.from_edit_mesh(obj.data)
-                tskin_layer = bm.loops.layers.color.get('RSTSKIN')
-                if tskin_layer:
+                tskin_layer = rs_layers.bmesh_face_layer(bm, rs_layers.TSKIN_LAYER)
+                if tskin_layer is not None:
                     debug_box.label(text="RSTSKIN layer found", icon='CHECKMARK')
                 else:
                     debug_box.label(text="No RSTSKIN layer", icon='ERROR')
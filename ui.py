@@ -1,7 +1,9 @@
 # ui.py
 import bpy
 import os
-from .dat_exporter import export_dat, detect_model_type
+from .dat_exporter import export_dat, detect_model_type, gather_model, emit_variant
+from . import export_cache
+from . import export_pool
 # --- OPERATOR ---
 class EXPORTER_OT_export_model(bpy.types.Operator):
     """Exports selected objects to the chosen format with a specific preset."""
@@ -22,45 +24,99 @@ class EXPORTER_OT_export_model(bpy.types.Operator):
             os.makedirs(output_dir)
         selected_objects = context.selected_objects
         exported_count = 0
+        optimize_strips = scene.exporter_optimize_strips
+        vertex_order = scene.exporter_vertex_order
+        manifest = export_cache.ExportManifest(output_dir) if scene.exporter_skip_unchanged else None
+        skipped_count = 0
+        # Gathering stays on this thread; encoding and writing run in the pipeline
+        pipeline = export_pool.ExportPipeline(use_parallel=scene.exporter_use_parallel)
+        pending_records = []
        
-        for obj in selected_objects:
-            if obj.type == 'MESH':
-                # Determine the export preset
-                export_preset = self.export_preset
+        try:
+            for obj in selected_objects:
+                if obj.type == 'MESH':
+                    # Determine the export preset
+                    export_preset = self.export_preset
                
-                # Auto-detect model type if enabled (for drop model transformations)
-                detected_type = 'UNKNOWN'
-                if self.auto_detect:
-                    detected_type = detect_model_type(obj)
-                    if detected_type != 'UNKNOWN':
-                        print(f"Auto-detected model type: {detected_type}")
-                        # For weight-based, use detected type as preset
-                        if self.export_preset == 'DEFAULT':
-                            export_preset = detected_type
-                    else:
-                        self.report({'WARNING'}, f"Could not auto-detect model type for '{obj.name}'.")
+                    # Auto-detect model type if enabled (for drop model transformations)
+                    detected_type = 'UNKNOWN'
+                    if self.auto_detect:
+                        detected_type = detect_model_type(obj)
+                        if detected_type != 'UNKNOWN':
+                            print(f"Auto-detected model type: {detected_type}")
+                            # For weight-based, use detected type as preset
+                            if self.export_preset == 'DEFAULT':
+                                export_preset = detected_type
+                        else:
+                            self.report({'WARNING'}, f"Could not auto-detect model type for '{obj.name}'.")
                
-                filename = f"{obj.name}.{self.export_format.lower()}"
-                filepath = os.path.join(output_dir, filename)
+                    filename = f"{obj.name}.{self.export_format.lower()}"
+                    filepath = os.path.join(output_dir, filename)
+                    drop_filepath = filepath.replace('.dat', '_drop.dat') if filepath.endswith('.dat') else filepath + '_drop.dat'
                
-                if self.export_format == 'DAT':
-                    # For CUSTOM_PRIORITY with auto_detect, pass the detected type for drop transformations
-                    if self.export_preset == 'CUSTOM_PRIORITY' and self.auto_detect and detected_type != 'UNKNOWN':
-                        # Export normal with CUSTOM_PRIORITY preset
-                        from .dat_exporter import _export_core
-                        _export_core(filepath, obj, 'CUSTOM_PRIORITY', drop_mode=False)
+                    fingerprint = quick_key = None
+                    if manifest is not None:
+                        settings = (self.export_format, self.export_preset, export_preset, self.auto_detect,
+                                    detected_type, optimize_strips, vertex_order)
+                        preset_names = (export_preset, detected_type)
+                        # Untouched since it was last checked this session: skip without gathering
+                        quick_key = export_cache.object_quick_key(obj, settings, preset_names)
+                        if manifest.is_current_quick(filename, quick_key):
+                            print(f"'{obj.name}' is unchanged since the last export. Skipping.")
+                            skipped_count += 1
+                            exported_count += 1
+                            continue
+
+                    # Gather once; the fingerprint and every variant are built from the same data
+                    model = gather_model(obj)
+                    if manifest is not None:
+                        fingerprint = export_cache.object_fingerprint(model, settings, preset_names)
+                        if manifest.is_current(filename, fingerprint):
+                            manifest.remember(filename, quick_key, fingerprint)
+                            print(f"'{obj.name}' is unchanged since the last export. Skipping.")
+                            skipped_count += 1
+                            exported_count += 1
+                            continue
+               
+                    jobs = []
+                    if self.export_format == 'DAT':
+                        # For CUSTOM_PRIORITY with auto_detect, pass the detected type for drop transformations
+                        if self.export_preset == 'CUSTOM_PRIORITY' and self.auto_detect and detected_type != 'UNKNOWN':
+                            # Both variants only differ in transform and preset
+                            # Export normal with CUSTOM_PRIORITY preset
+                            jobs.append(emit_variant(model, filepath, 'CUSTOM_PRIORITY', drop_mode=False, optimize_strips=optimize_strips,
+                                                     vertex_order=vertex_order, pipeline=pipeline))
                        
-                        # Export drop with detected type transformations
-                        drop_filepath = filepath.replace('.dat', '_drop.dat') if filepath.endswith('.dat') else filepath + '_drop.dat'
-                        _export_core(drop_filepath, obj, detected_type, drop_mode=True)
-                        print(f"Exported CUSTOM_PRIORITY normal + {detected_type} drop model")
-                    else:
-                        export_dat(filepath, obj, export_preset=export_preset)
+                            # Export drop with detected type transformations
+                            jobs.append(emit_variant(model, drop_filepath, detected_type, drop_mode=True, optimize_strips=optimize_strips,
+                                                     vertex_order=vertex_order, pipeline=pipeline))
+                            print(f"Queued CUSTOM_PRIORITY normal + {detected_type} drop model")
+                        else:
+                            jobs = export_dat(filepath, obj, export_preset=export_preset, optimize_strips=optimize_strips,
+                                              vertex_order=vertex_order, model=model, pipeline=pipeline)
                
-                exported_count += 1
+                    pending_records.append((filename, quick_key, fingerprint, jobs))
+                    exported_count += 1
+       
+        finally:
+            # Always wait for queued jobs, even if gathering an object failed
+            results = pipeline.finish()
+            if manifest is not None:
+                for filename, quick_key, fingerprint, jobs in pending_records:
+                    job_results = [pipeline.result(job) for job in jobs]
+                    if all(result.error is None for result in job_results):
+                        manifest.record(filename, fingerprint, [result.filepath for result in job_results], quick_key)
+                manifest.save()
+        failed = [result for result in results if result.error is not None]
        
+        if failed:
+            self.report({'ERROR'}, f"{len(failed)} files failed to export: " +
+                        ", ".join(os.path.basename(result.filepath) for result in failed))
         if exported_count > 0:
-            self.report({'INFO'}, f"Exported {exported_count} models to {output_dir}.")
+            skipped_str = f" ({skipped_count} unchanged, skipped)" if skipped_count else ""
+            total_bytes = sum(result.size for result in results if result.error is None)
+            self.report({'INFO'}, f"Exported {exported_count} models to {output_dir}{skipped_str}, "
+                                  f"{len(results) - len(failed)} files, {total_bytes} bytes.")
         else:
             self.report({'WARNING'}, "No mesh objects were selected for export.")
         return {'FINISHED'}
@@ -84,6 +140,10 @@ class VIEW3D_PT_rsps_model_io(bpy.types.Panel):
        
         if context.mode == 'OBJECT':
             export_box.prop(scene, "exporter_output_dir")
+            export_box.prop(scene, "exporter_optimize_strips")
+            export_box.prop(scene, "exporter_vertex_order")
+            export_box.prop(scene, "exporter_skip_unchanged")
+            export_box.prop(scene, "exporter_use_parallel")
             export_box.separator()
             # --- TWO MAIN EXPORT BUTTONS ---
             col = export_box.column(align=True)
@@ -132,6 +192,7 @@ class VIEW3D_PT_rsps_model_io(bpy.types.Panel):
         row = import_box.row(align=True)
         row.operator("import_scene.rs_317_model", text="Import 317/OSRS Model", icon='IMPORT')
         row.operator("import_scene.rs_667_model", text="Import 667 Model", icon='IMPORT')
+        import_box.operator("rsps.purge_material_pool", text="Purge Unused RS Materials", icon='TRASH')
 # A tuple containing all classes from this file for registration by __init__.py
 classes = (
     EXPORTER_OT_export_model,
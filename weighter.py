@@ -1,9 +1,8 @@
 # weighter.py
 import bpy
-import blf
 import gpu
 import re  # <-- ADDED: Import for regex matching
-from bpy_extras.view3d_utils import location_3d_to_region_2d
+from . import overlays
 # --- Global Configuration ---
 # --- Helper & Core Functions ---
 def force_viewport_redraw(self, context):
@@ -11,50 +10,58 @@ def force_viewport_redraw(self, context):
     for area in context.screen.areas:
         if area.type == 'VIEW_3D':
             area.tag_redraw()
-def draw_weights_callback(self, context):
-    """Draws weight values on the 3D viewport."""
-    ctx = bpy.context
-    
-    if not (hasattr(ctx.scene, 'show_weight_overlay') and ctx.scene.show_weight_overlay):
+WEIGHT_POINT_SIZE = 8.0
+WEIGHT_FONT_SIZE = 16
+
+def _weighted_objects(frame):
+    """(object, group index) of every visible selected mesh that has the active VSKIN layer's group."""
+    group_name = f"VSKIN{frame.scene.vskin_layer}:"
+    objects_groups = []
+    for obj in frame.selected_meshes:
+        if obj.hide_viewport or obj.hide_get() or not obj.visible_get():
+            continue
+        vg = obj.vertex_groups.get(group_name)
+        if vg is not None:
+            objects_groups.append((obj, vg.index))
+    return objects_groups
+
+def weight_overlay_enabled(scene):
+    return getattr(scene, 'show_weight_overlay', False)
+
+def draw_weight_text(frame):
+    """Draws weight values on the 3D viewport, nearest the 3D cursor first, up to the label budget."""
+    scene = frame.scene
+    if scene.weight_overlay_mode == 'HEATMAP' or frame.view is None:
         return
         
-    selected_objects = [obj for obj in ctx.selected_objects if obj.type == 'MESH']
-    if not selected_objects:
+    objects_groups = _weighted_objects(frame)
+    if not objects_groups:
         return
     
-    font_id = 0
-    blf.size(font_id, 16); blf.color(font_id, 0.2, 1.0, 0.8, 1.0); gpu.state.blend_set('ALPHA')
-    
-    region = ctx.region
-    space_data = ctx.space_data
-    
-    for obj in selected_objects:
-        if obj.hide_viewport or obj.hide_get() or not obj.visible_get():
-            continue
-        
-        if not obj.vertex_groups:
-            continue
-        
-        group_name = f"VSKIN{ctx.scene.vskin_layer}:"
-        if group_name not in obj.vertex_groups:
-            continue
-        
-        vg = obj.vertex_groups[group_name]
-        vg_index = vg.index
+    gpu.state.blend_set('ALPHA')
+    overlays.draw_weight_labels(frame.view, objects_groups, scene.cursor.location,
+                                WEIGHT_FONT_SIZE, scene.rsps_label_budget)
+
+def draw_weight_overlay(frame):
+    """Draws weighted vertices as colored points (blue = 0, red = 1) on the 3D viewport."""
+    if frame.scene.weight_overlay_mode == 'LABELS':
+        return
         
-        for vert in obj.data.vertices:
-            if vert.hide:
-                continue
-                
-            for group in vert.groups:
-                if group.group == vg_index and group.weight > 0.001:
-                    world_pos = obj.matrix_world @ vert.co
-                    screen_pos = location_3d_to_region_2d(region, space_data.region_3d, world_pos)
-                    
-                    if screen_pos:
-                        blf.position(font_id, screen_pos.x + 5, screen_pos.y + 5, 0)
-                        blf.draw(font_id, f"{group.weight:.3f}")
-                    break
+    objects_groups = _weighted_objects(frame)
+    if not objects_groups:
+        return
+    
+    original_depth_test = gpu.state.depth_test_get()
+    original_blend = gpu.state.blend_get()
+    try:
+        gpu.state.depth_test_set('LESS_EQUAL')
+        gpu.state.blend_set('ALPHA')
+        overlays.draw_weight_heatmap(objects_groups, WEIGHT_POINT_SIZE)
+    finally:
+        gpu.state.depth_test_set(original_depth_test)
+        gpu.state.blend_set(original_blend)
+        gpu.state.point_size_set(1.0)
+
 def get_or_create_weight_group(obj, group_name):
     if group_name not in obj.vertex_groups:
         return obj.vertex_groups.new(name=group_name)
@@ -269,6 +276,10 @@ class VIEW3D_PT_epic_weighter(bpy.types.Panel):
         row = tools_box.row(align=True)
         row.operator("epic.refresh_display", icon='FILE_REFRESH'); row.operator("epic.clear_weights", icon='TRASH')
         tools_box.prop(context.scene, "show_weight_overlay", text="Show Weight Values", toggle=True)
+        if context.scene.show_weight_overlay:
+            row = tools_box.row(align=True)
+            row.prop(context.scene, "weight_overlay_mode", expand=True)
+            tools_box.prop(context.scene, "rsps_label_budget")
 # A tuple containing all classes from this file to be imported by __init__.py
 classes = (
     EPIC_OT_assign_weight, EPIC_OT_skull, EPIC_OT_neck_upper, EPIC_OT_neck_lower, EPIC_OT_torso, EPIC_OT_shoulder_joint, 